@@ -0,0 +1,7 @@
+# Create FX cards for every PNG sequence in a chosen folder, laid out in a grid.
+# Cards of the same sequence are instances sharing one material network.
+
+import FX_Card_Maker
+
+if __name__ == "__main__":
+    FX_Card_Maker.make_fx_cards_from_folder()
@@ -1,10 +1,22 @@
-# Create a Redshift FX card from a selected PNG sequence.
-
+# Create a Redshift FX card from a selected PNG sequence, or from a range of a
+# .mov/.mp4 extracted on demand into the shared frame cache.
+# With atlas=True the frames are packed into flipbook atlas pages and the card
+# steps through tiles with place2dTexture offsets instead of one file per frame.
+# Frames are driven by shared cycling animCurves (fx_card_drivers), not expressions.
+# make_fx_cards_from_folder makes a card per sequence in a folder; repeat cards
+# of a sequence are instances sharing one material network.
+
+import math
 import os
 import re
 
 import maya.cmds as cmds  # type: ignore
 
+import frame_cache
+import fx_card_drivers
+import proxySwitch
+import sequence_index
+
 
 PNG_SEQUENCE_PATTERN = re.compile(r"^(.*?)(\d+)(\.png)$", re.IGNORECASE)
 
@@ -13,6 +25,10 @@ EMISSION_COLOR_ATTRS = ["emission_color", "emissionColor"]
 EMISSION_WEIGHT_ATTRS = ["emission_weight", "emissionWeight"]
 OPACITY_ATTRS = ["opacity_color", "opacityColor", "opacity", "transparency"]
 
+# Marks a card's plane with its sequence so later cards can instance it
+CARD_KEY_ATTR = "jwFxCardKey"
+BATCH_CARD_SPACING = 25
+
 
 def _safe_name(name):
     cleaned = re.sub(r"[^A-Za-z0-9_]+", "_", name)
@@ -105,8 +121,8 @@ def _set_attr_if_exists(node, attr, value):
 
 def _choose_png_sequence_file():
     paths = cmds.fileDialog2(
-        caption="Choose PNG Sequence Frame",
-        fileFilter="PNG files (*.png)",
+        caption="Choose PNG Sequence Frame or Video",
+        fileFilter="PNG or video files (*.png *.mov *.mp4);;PNG files (*.png);;Video files (*.mov *.mp4)",
         fileMode=1,
         dialogStyle=2,
     )
@@ -115,7 +131,50 @@ def _choose_png_sequence_file():
     return paths[0]
 
 
-def _sequence_info(path):
+def _prompt_video_frame_range(video_path):
+    frame_count = frame_cache.video_frame_count(video_path)
+    scene_length = int(cmds.playbackOptions(query=True, maxTime=True) - cmds.playbackOptions(query=True, minTime=True)) + 1
+    default_range = "1-{}".format(min(frame_count, scene_length))
+
+    result = cmds.promptDialog(
+        title="Video Frame Range",
+        message="Frames to use from {} (1-{}):".format(os.path.basename(video_path), frame_count),
+        text=default_range,
+        button=["OK", "Cancel"],
+        defaultButton="OK",
+        cancelButton="Cancel",
+        dismissString="Cancel",
+    )
+    if result != "OK":
+        return None
+
+    match = re.match(r"^\s*(\d+)\s*(?:-\s*(\d+))?\s*$", cmds.promptDialog(query=True, text=True))
+    if not match:
+        cmds.error("Enter a frame range like 1-40.")
+        return None
+
+    start_frame = int(match.group(1))
+    end_frame = int(match.group(2) or start_frame)
+    return min(start_frame, end_frame), max(start_frame, end_frame)
+
+
+def _extract_video_frames(video_path, frame_range):
+    """
+    Extract only the requested frames into the frame cache and return the
+    cached sequence limited to that range.
+    """
+    start_frame, end_frame = frame_range
+    print("Extracting frames {}-{} of {} into the frame cache".format(start_frame, end_frame, video_path))
+    sequence = frame_cache.extract_frames(video_path, start_frame, end_frame)
+    # Cached video frames share a folder with other ranges of the same clip
+    return dict(sequence, frame_ranges=[[max(1, start_frame), end_frame]])
+
+
+def _sequence_info(path, sequence=None):
+    """
+    sequence is the scanned sequence spec path belongs to; it is looked up
+    when omitted.
+    """
     folder, filename = os.path.split(path)
     match = PNG_SEQUENCE_PATTERN.match(filename)
     if not match:
@@ -126,34 +185,29 @@ def _sequence_info(path):
     padding = len(frame_text)
     base_name = _safe_name(prefix.rstrip("._- ") or os.path.splitext(filename)[0])
 
-    frame_pattern = re.compile(
-        r"^{}(\d{{{}}}){}$".format(
-            re.escape(prefix),
-            padding,
-            re.escape(extension),
-        ),
-        re.IGNORECASE,
-    )
-
-    frames = []
-    for entry in os.listdir(folder):
-        entry_match = frame_pattern.match(entry)
-        if entry_match:
-            frames.append(int(entry_match.group(1)))
-
-    frames = sorted(set(frames))
-    if not frames:
-        frames = [int(frame_text)]
+    sequence = sequence or sequence_index.find_sequence_for_file(path)
+    if not sequence:
+        sequence = {
+            "input_dir": folder,
+            "prefix": prefix,
+            "base_name": base_name,
+            "padding": padding,
+            "extension": extension,
+            "frame_ranges": [[int(frame_text), int(frame_text)]],
+        }
+    frame_ranges = sequence["frame_ranges"]
 
     return {
         "folder": folder,
         "path": path,
         "base_name": base_name,
-        "first_frame": frames[0],
-        "last_frame": frames[-1],
-        "sequence_length": len(frames),
+        "first_frame": sequence_index.first_frame(frame_ranges),
+        "last_frame": sequence_index.last_frame(frame_ranges),
+        "sequence_length": sequence_index.frame_count(frame_ranges),
+        "frame_ranges": frame_ranges,
         "padding": padding,
-        "has_gaps": len(frames) != (frames[-1] - frames[0] + 1),
+        "has_gaps": sequence_index.has_gaps(frame_ranges),
+        "sequence": sequence,
     }
 
 
@@ -196,54 +250,70 @@ def _configure_interactive_sequence_cache(file_node, sequence_info):
     _set_attr_if_exists(file_node, "byCycleIncrement", 1)
 
 
-def _create_loop_expression(file_node, sequence_info):
-    expr_name = _make_unique_name(sequence_info["base_name"] + "_frameLoop_EXP")
-    scene_start_frame = int(cmds.playbackOptions(query=True, minTime=True))
-    start_frame = int(sequence_info["first_frame"])
-    sequence_length = int(sequence_info["sequence_length"])
+def _build_flipbook_atlas(sequence_info):
+    # NumPy and Pillow are only needed for atlases, so cards still work without them
+    try:
+        import flipbook_atlas
+    except ImportError as exc:
+        cmds.error("Flipbook atlases need NumPy and Pillow in Maya's Python: {}".format(exc))
+        return None
 
-    expression = "{file_node}.frameExtension = ((frame - {scene_start}) % {length}) + {start};".format(
-        file_node=file_node,
-        scene_start=scene_start_frame,
-        start=start_frame,
-        length=sequence_length,
-    )
+    layout = flipbook_atlas.build_atlas(sequence_info["sequence"])
+    layout["uv"] = flipbook_atlas.uv_transform(layout)
+    return layout
+
+
+def _configure_atlas_texture(file_node, place2d_node, atlas_layout):
+    cmds.setAttr(file_node + ".fileTextureName", atlas_layout["pages"][0].replace("\\", "/"), type="string")
+    uv = atlas_layout["uv"]
+    cmds.setAttr(place2d_node + ".repeatUV", uv["repeat_u"], uv["repeat_v"])
+    cmds.setAttr(place2d_node + ".offsetU", uv["origin_u"])
+    cmds.setAttr(place2d_node + ".offsetV", uv["origin_v"])
 
-    return cmds.expression(
-        name=expr_name,
-        string=expression,
-        object=file_node,
-        alwaysEvaluate=True,
-        unitConversion="all",
+    page_count = len(atlas_layout["pages"])
+    if page_count > 1 and _has_attr(file_node, "useFrameExtension"):
+        cmds.setAttr(file_node + ".useFrameExtension", 1)
+        _configure_interactive_sequence_cache(file_node, {"first_frame": 1, "last_frame": page_count})
+
+
+def _card_key(sequence_info, atlas):
+    sequence = sequence_info["sequence"]
+    pattern_path = os.path.join(sequence["input_dir"], sequence_index.sequence_pattern(sequence))
+    return "{}|{}|{}".format(
+        os.path.normcase(os.path.normpath(pattern_path)),
+        sequence_index.format_ranges(sequence_info["frame_ranges"]),
+        "atlas" if atlas else "sequence",
     )
 
 
-def make_fx_card():
-    selected_path = _choose_png_sequence_file()
-    if not selected_path:
-        return
+def _find_card(card_key):
+    for node in cmds.ls("*." + CARD_KEY_ATTR, objectsOnly=True, long=True) or []:
+        if cmds.getAttr(node + "." + CARD_KEY_ATTR) == card_key:
+            return node
+    return None
 
-    sequence = _sequence_info(selected_path)
-    if not sequence:
-        return
 
-    base_name = sequence["base_name"]
+def _create_card_plane(base_name):
     plane_name = _make_unique_name(base_name + "_geo")
-    file_name = _make_unique_name(base_name + "_FILE")
-    place2d_name = _make_unique_name(base_name + "_place2d")
-
-    plane_transform, plane_shape = cmds.polyPlane(
+    plane_transform = cmds.polyPlane(
         width=1,
         height=1,
         subdivisionsX=1,
         subdivisionsY=1,
         name=plane_name,
-    )
+    )[0]
     cmds.setAttr(plane_transform + ".scaleX", 20)
     cmds.setAttr(plane_transform + ".scaleY", 20)
     cmds.setAttr(plane_transform + ".scaleZ", 20)
     cmds.setAttr(plane_transform + ".rotateX", 90)
     cmds.makeIdentity(plane_transform, apply=True, translate=False, rotate=True, scale=True)
+    return plane_transform
+
+
+def _create_card_shading(sequence, atlas_layout, proxy_level):
+    base_name = sequence["base_name"]
+    file_name = _make_unique_name(base_name + "_FILE")
+    place2d_name = _make_unique_name(base_name + "_place2d")
 
     material, viewport_material, shading_group = _create_redshift_material(base_name)
     file_node = cmds.shadingNode("file", asTexture=True, isColorManaged=True, name=file_name)
@@ -251,10 +321,15 @@ def make_fx_card():
 
     _connect_place2d_to_file(place2d, file_node)
 
-    cmds.setAttr(file_node + ".fileTextureName", sequence["path"], type="string")
-    if _has_attr(file_node, "useFrameExtension"):
-        cmds.setAttr(file_node + ".useFrameExtension", 1)
-    _configure_interactive_sequence_cache(file_node, sequence)
+    if atlas_layout:
+        _configure_atlas_texture(file_node, place2d, atlas_layout)
+    else:
+        cmds.setAttr(file_node + ".fileTextureName", sequence["path"], type="string")
+        if _has_attr(file_node, "useFrameExtension"):
+            cmds.setAttr(file_node + ".useFrameExtension", 1)
+        _configure_interactive_sequence_cache(file_node, sequence)
+        if proxy_level and proxySwitch.enable_proxy(file_node, proxy_level):
+            proxySwitch.install_render_callbacks()
 
     if _has_attr(file_node, "colorSpace"):
         try:
@@ -288,26 +363,158 @@ def make_fx_card():
     else:
         cmds.warning("Could not connect viewport alpha on {}.".format(viewport_material))
 
-    cmds.sets(plane_transform, edit=True, forceElement=shading_group)
-    expression = _create_loop_expression(file_node, sequence)
+    scene_start_frame = int(cmds.playbackOptions(query=True, minTime=True))
+    if atlas_layout:
+        drivers = fx_card_drivers.create_atlas_driver(file_node, place2d, atlas_layout, scene_start_frame)
+    else:
+        drivers = [fx_card_drivers.create_loop_driver(
+            file_node, sequence_index.iter_frames(sequence["frame_ranges"]), scene_start_frame
+        )]
+
+    return {
+        "material": material,
+        "shading_group": shading_group,
+        "file_node": file_node,
+        "drivers": drivers,
+    }
+
 
-    cmds.select(plane_transform, replace=True)
+def _create_card(sequence, atlas=False, proxy_level=None):
+    """
+    Return (card transform, shading dict or None). A sequence that already has
+    a card in the scene gets an instance of it, sharing its shape and material.
+    """
+    card_key = _card_key(sequence, atlas)
+    existing_card = _find_card(card_key)
+    if existing_card:
+        instance = cmds.instance(existing_card, name=_make_unique_name(sequence["base_name"] + "_geo"))[0]
+        # Instances start where the original is; new cards start at the origin
+        cmds.xform(instance, worldSpace=True, translation=(0, 0, 0))
+        return instance, None
+
+    atlas_layout = None
+    if atlas:
+        atlas_layout = _build_flipbook_atlas(sequence)
+        if not atlas_layout:
+            return None, None
+        if proxy_level:
+            cmds.warning("Proxies are not used for atlas cards; the atlas pages are already few reads.")
+
+    plane_transform = _create_card_plane(sequence["base_name"])
+    shading = _create_card_shading(sequence, atlas_layout, proxy_level)
+    cmds.sets(plane_transform, edit=True, forceElement=shading["shading_group"])
+    cmds.addAttr(plane_transform, longName=CARD_KEY_ATTR, dataType="string")
+    cmds.setAttr(plane_transform + "." + CARD_KEY_ATTR, card_key, type="string")
 
     if sequence["has_gaps"]:
-        cmds.warning(
-            "Sequence has missing frame numbers. The modulo loop uses the detected length, "
-            "so missing files may show as blank frames."
-        )
+        print("{} has missing frame numbers; the loop skips them.".format(sequence["base_name"]))
+    return plane_transform, shading
+
+
+def make_fx_card(selected_path=None, frame_range=None, proxy_level=None, atlas=False):
+    """
+    selected_path may be a PNG frame or a video. For a video, frame_range is
+    (start, end) in 1-based movie frames; the user is prompted when omitted.
+    proxy_level ("half" or "quarter") plays a downscaled copy in the viewport
+    and switches to full resolution for renders. atlas packs the frames into
+    flipbook atlas pages; proxies are ignored for atlas cards.
+    """
+    selected_path = selected_path or _choose_png_sequence_file()
+    if not selected_path:
+        return
+
+    scanned = None
+    if frame_cache.is_video_file(selected_path):
+        frame_range = frame_range or _prompt_video_frame_range(selected_path)
+        if not frame_range:
+            return
+        frame_count = frame_cache.video_frame_count(selected_path)
+        scanned = _extract_video_frames(selected_path, (max(1, frame_range[0]), min(frame_count, frame_range[1])))
+        selected_path = sequence_index.sequence_frame_path(scanned, sequence_index.first_frame(scanned["frame_ranges"]))
+
+    sequence = _sequence_info(selected_path, scanned)
+    if not sequence:
+        return
+
+    card, shading = _create_card(sequence, atlas, proxy_level)
+    if not card:
+        return
+    cmds.select(card, replace=True)
+
+    if not shading:
+        print("Instanced the existing FX card for {} as {}".format(sequence["base_name"], card))
+        return
 
     print(
-        "Created FX card: {}, {}, {}, {} frames, loop expression {}".format(
-            plane_transform,
-            material,
-            file_node,
+        "Created FX card: {}, {}, {}, {} frames, loop driver {}".format(
+            card,
+            shading["material"],
+            shading["file_node"],
             sequence["sequence_length"],
-            expression,
+            ", ".join(shading["drivers"]),
         )
     )
 
 
-make_fx_card()
+def _choose_sequence_folder():
+    folders = cmds.fileDialog2(caption="Choose a Folder of PNG Sequences", fileMode=3, dialogStyle=2)
+    if not folders:
+        return None
+    return folders[0]
+
+
+def _layout_cards(cards, spacing):
+    columns = int(math.ceil(math.sqrt(len(cards))))
+    for index, card in enumerate(cards):
+        row, column = divmod(index, columns)
+        cmds.xform(card, worldSpace=True, translation=(column * spacing, -row * spacing, 0))
+
+
+def make_fx_cards_from_folder(folder=None, recursive=False, cards_per_sequence=1, atlas=False,
+                              proxy_level=None, spacing=BATCH_CARD_SPACING):
+    """
+    Make cards for every PNG sequence in folder from one index scan, laid out
+    in a grid under one group. The first card of each sequence owns the
+    material network; the rest, and any later cards of the same sequence, are
+    instances of it.
+    """
+    folder = folder or _choose_sequence_folder()
+    if not folder:
+        return []
+
+    sequences = sequence_index.scan_sequences(folder, extensions=[".png"], recursive=recursive)
+    if not sequences:
+        cmds.warning("No PNG sequences found in {}.".format(folder))
+        return []
+
+    cards = []
+    created = 0
+    # Skip viewport redraws while hundreds of nodes are made
+    cmds.refresh(suspend=True)
+    try:
+        for sequence_spec in sequences:
+            first_path = sequence_index.sequence_frame_path(sequence_spec, sequence_index.first_frame(sequence_spec["frame_ranges"]))
+            sequence = _sequence_info(first_path, sequence_spec)
+            if not sequence:
+                continue
+            for _ in range(max(1, cards_per_sequence)):
+                card, shading = _create_card(sequence, atlas, proxy_level)
+                if card:
+                    cards.append(card)
+                    created += 1 if shading else 0
+    finally:
+        cmds.refresh(suspend=False)
+
+    if not cards:
+        return []
+    _layout_cards(cards, spacing)
+    group = cmds.group(cards, name=_make_unique_name(_safe_name(os.path.basename(os.path.normpath(folder))) + "_fxCards_GRP"))
+    cmds.select(group, replace=True)
+    print("Made {} FX card(s) from {} sequence(s) in {}: {} material network(s), {} instance(s)".format(
+        len(cards), len(sequences), folder, created, len(cards) - created
+    ))
+    return cards
+
+
+if __name__ == "__main__":
+    make_fx_card()
@@ -0,0 +1,104 @@
+# Benchmark FX card frame loops: one alwaysEvaluate expression per card
+# against the shared animCurve drivers, across card counts.
+# Reports playback fps for each approach. Run with mayapy, or import it from
+# Maya's script editor to include viewport redraws.
+#
+# mayapy benchmarks/bench_fx_card_loops.py --counts 10,50,100,200 --frames 120
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import maya.cmds as cmds  # type: ignore  # noqa: E402
+
+
+def _in_gui():
+    return not cmds.about(batch=True)
+
+
+def build_cards(card_count, mode, loop_lengths, scene_start):
+    """
+    Make card_count file nodes looping like FX cards. Card i plays a sequence
+    of loop_lengths[i % len(loop_lengths)] frames, as if a layout reused a few clips.
+    """
+    import fx_card_drivers
+
+    file_nodes = []
+    for index in range(card_count):
+        file_node = cmds.shadingNode("file", asTexture=True, name="benchCard{}_FILE".format(index))
+        cmds.setAttr(file_node + ".useFrameExtension", 1)
+        length = loop_lengths[index % len(loop_lengths)]
+        if mode == "expression":
+            fx_card_drivers.create_loop_expression(file_node, 1, length, scene_start, "benchCard{}_EXP".format(index))
+        else:
+            fx_card_drivers.create_loop_driver(file_node, range(1, length + 1), scene_start)
+        file_nodes.append(file_node)
+    return file_nodes
+
+
+def measure_fps(file_nodes, start_frame, end_frame):
+    """
+    Step through the range and pull every card's frame. In the GUI the
+    viewport is redrawn per frame as well.
+    """
+    redraw = _in_gui()
+    began = time.perf_counter()
+    for frame in range(start_frame, end_frame + 1):
+        cmds.currentTime(frame, edit=True, update=True)
+        if redraw:
+            cmds.refresh(force=True)
+        for file_node in file_nodes:
+            cmds.getAttr(file_node + ".frameExtension")
+    elapsed = time.perf_counter() - began
+    return (end_frame - start_frame + 1) / elapsed if elapsed > 0 else 0.0
+
+
+def run_benchmark(card_counts=(10, 50, 100, 200), frame_count=120, loop_lengths=(24, 32, 48, 64)):
+    """
+    Return [(cards, expression_fps, driver_fps)].
+    """
+    if hasattr(cmds, "evaluationManager"):
+        cmds.evaluationManager(mode="parallel")
+
+    rows = []
+    for card_count in card_counts:
+        fps = {}
+        for mode in ("expression", "driver"):
+            cmds.file(new=True, force=True)
+            cmds.playbackOptions(minTime=1, maxTime=frame_count)
+            file_nodes = build_cards(card_count, mode, loop_lengths, 1)
+            # First pass builds the evaluation graph; time the second
+            measure_fps(file_nodes, 1, min(frame_count, 10))
+            fps[mode] = measure_fps(file_nodes, 1, frame_count)
+        rows.append((card_count, fps["expression"], fps["driver"]))
+
+    print("{} frames, evaluation {}".format(
+        frame_count, cmds.evaluationManager(query=True, mode=True)[0] if hasattr(cmds, "evaluationManager") else "dg"
+    ))
+    print("{:>8}{:>16}{:>12}{:>10}".format("cards", "expression fps", "driver fps", "speedup"))
+    for card_count, expression_fps, driver_fps in rows:
+        print("{:>8}{:>16.1f}{:>12.1f}{:>9.1f}x".format(
+            card_count, expression_fps, driver_fps, driver_fps / expression_fps if expression_fps else 0.0
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FX card loop expressions with animCurve drivers.")
+    parser.add_argument("--counts", default="10,50,100,200", help="Comma separated card counts.")
+    parser.add_argument("--frames", type=int, default=120, help="Frames to play per run.")
+    args = parser.parse_args()
+
+    import maya.standalone  # type: ignore
+    maya.standalone.initialize()
+    try:
+        run_benchmark([int(value) for value in args.counts.split(",") if value.strip()], args.frames)
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    main()
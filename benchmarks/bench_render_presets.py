@@ -0,0 +1,271 @@
+# Sweep Redshift quality/speed presets on a few sample frames.
+# Renders every combination of unifiedAdaptiveErrorThreshold, resolution scale
+# and bucket size (the knobs renderSettingsStarter.py and renderSettingsHighLow.py
+# set) through Render with a -preRender script, times each frame, and scores it
+# against the highest quality render (lowest threshold, largest scale) with
+# PSNR and SSIM. Lower resolution renders are scaled up to the reference size
+# first, as they would be in delivery. Reports the Pareto-optimal presets:
+# the ones no other preset beats on both time and quality.
+#
+# The Render command can be swapped for render_stub.py to try the sweep
+# without Maya (JW_RENDER_COMMAND or --render-command).
+#
+# python benchmarks/bench_render_presets.py "S:/shots/sh010_v003.mb" --frames 1001,1050,1100 --render-args "-r redshift"
+
+import argparse
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_resume  # noqa: E402
+import render_scheduler  # noqa: E402
+import render_telemetry  # noqa: E402
+import sequence_index  # noqa: E402
+
+DEFAULT_THRESHOLDS = (0.01, 0.03, 0.1, 0.3, 1.0)
+DEFAULT_SCALES = (0.5, 0.75, 1.0)
+DEFAULT_BUCKETS = (64, 128, 256)
+
+SWEEP_DIR_NAME = ".render_sweep"
+SWEEP_IMAGE_NAME = "sweep"
+
+# SSIM over 7x7 windows of luminance in 0-1, with the usual stabilizing constants
+SSIM_WINDOW = 7
+SSIM_C1 = 0.01 ** 2
+SSIM_C2 = 0.03 ** 2
+LUMA_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+
+
+def preset_name(threshold, scale, bucket_size):
+    return f"t{threshold:g}_s{scale:g}_b{bucket_size}"
+
+
+def pre_render_mel(threshold, scale, bucket_size):
+    # PNG output so every preset can be read and compared the same way
+    return (
+        "setAttr redshiftOptions.imageFormat 2; "
+        f"setAttr redshiftOptions.unifiedAdaptiveErrorThreshold {threshold:g}; "
+        f"setAttr redshiftOptions.bucketSize {bucket_size}; "
+        f"setAttr defaultResolution.width (`getAttr defaultResolution.width` * {scale:g}); "
+        f"setAttr defaultResolution.height (`getAttr defaultResolution.height` * {scale:g});"
+    )
+
+
+def _find_frame(output_dir, frame):
+    for sequence_spec in sequence_index.scan_sequences(output_dir, extensions=["png"], use_cache=False):
+        path = sequence_index.sequence_frame_path(sequence_spec, frame)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No PNG for frame {frame} under {output_dir}")
+
+
+def render_preset(scene_file, frame_runs, preset, output_dir, render_command, extra_args=()):
+    """
+    Render the sample frames with one preset. Returns {frame: (image path,
+    seconds)}. Times come from the render log when it reports them, else the
+    run's wall time is split between its frames.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    log_path = os.path.join(output_dir, "render.log")
+    preset_args = ["-rd", output_dir, "-im", SWEEP_IMAGE_NAME, "-preRender", pre_render_mel(*preset)]
+
+    frames = {}
+    with open(log_path, "w", encoding="utf-8", errors="replace") as log_handle:
+        for run in frame_runs:
+            command = render_scheduler.build_render_command(render_command, scene_file, run, 1, preset_args + list(extra_args))
+            began = time.perf_counter()
+            result = subprocess.run(command, stdout=log_handle, stderr=subprocess.STDOUT)
+            wall_time = time.perf_counter() - began
+            if result.returncode != 0:
+                raise RuntimeError(f"Render exited {result.returncode} for {preset_name(*preset)}; see {log_path}")
+            for frame in range(run[0], run[1] + 1):
+                frames[frame] = wall_time / (run[1] - run[0] + 1)
+
+    logged = render_telemetry.parse_render_log_file(log_path)
+    return {
+        frame: (_find_frame(output_dir, frame), logged[frame]["seconds"] if frame in logged else seconds)
+        for frame, seconds in frames.items()
+    }
+
+
+def load_image(path, size=None):
+    """
+    Load an image as float RGB in 0-1, scaled up (or down) to size when given.
+    """
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        if size and image.size != size:
+            image = image.resize(size, Image.BICUBIC)
+        return np.asarray(image, dtype=np.float64) / 255.0
+
+
+def mse(image, reference):
+    return float(np.mean((image - reference) ** 2))
+
+
+def psnr_from_mse(error):
+    return float("inf") if error <= 0 else float(10 * np.log10(1.0 / error))
+
+
+def _box_mean(image, size):
+    # Every size x size window mean at once from a summed-area table
+    table = np.pad(image, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return sums / (size * size)
+
+
+def ssim(image, reference, window=SSIM_WINDOW):
+    """
+    Mean SSIM of two RGB images over their luminance, with a uniform window.
+    """
+    x = image @ LUMA_WEIGHTS
+    y = reference @ LUMA_WEIGHTS
+    window = max(1, min(window, *x.shape))
+    mean_x = _box_mean(x, window)
+    mean_y = _box_mean(y, window)
+    var_x = _box_mean(x * x, window) - mean_x ** 2
+    var_y = _box_mean(y * y, window) - mean_y ** 2
+    covariance = _box_mean(x * y, window) - mean_x * mean_y
+    ssim_map = ((2 * mean_x * mean_y + SSIM_C1) * (2 * covariance + SSIM_C2)) / (
+        (mean_x ** 2 + mean_y ** 2 + SSIM_C1) * (var_x + var_y + SSIM_C2)
+    )
+    return float(ssim_map.mean())
+
+
+def pareto_front(results, metric="ssim"):
+    """
+    Return the results no other result matches or beats on both seconds and
+    metric while beating it on one, fastest first.
+    """
+    front = []
+    for result in results:
+        dominated = any(
+            other["seconds"] <= result["seconds"] and other[metric] >= result[metric]
+            and (other["seconds"] < result["seconds"] or other[metric] > result[metric])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda result: result["seconds"])
+
+
+def run_sweep(scene_file, frame_ranges, thresholds=DEFAULT_THRESHOLDS, scales=DEFAULT_SCALES,
+              buckets=DEFAULT_BUCKETS, output_root=None, render_command=None, extra_args=(), metric="ssim"):
+    """
+    Render and score every preset. Returns (results, pareto front); each
+    result has threshold, scale, bucket_size, seconds (mean per frame), psnr
+    and ssim (against the reference, averaged over the sample frames).
+    """
+    output_root = output_root or os.path.join(
+        os.path.dirname(os.path.abspath(scene_file)), SWEEP_DIR_NAME,
+        os.path.splitext(os.path.basename(scene_file))[0],
+    )
+    render_command = render_command or render_scheduler.default_render_command()
+    frame_runs = render_resume.collapse_frames(sequence_index.iter_frames(frame_ranges))
+
+    # The reference goes first so every other preset can be scored as it lands
+    reference_preset = (min(thresholds), max(scales), sorted(buckets)[len(buckets) // 2])
+    presets = [reference_preset] + [
+        preset for preset in itertools.product(sorted(thresholds), sorted(scales), sorted(buckets))
+        if preset != reference_preset
+    ]
+
+    references = {}
+    results = []
+    for index, preset in enumerate(presets, 1):
+        name = preset_name(*preset)
+        rendered = render_preset(scene_file, frame_runs, preset, os.path.join(output_root, name), render_command, extra_args)
+        if not references:
+            references = {frame: load_image(path) for frame, (path, _) in rendered.items()}
+
+        errors, ssims, seconds = [], [], []
+        for frame, (path, frame_seconds) in rendered.items():
+            reference = references[frame]
+            image = load_image(path, (reference.shape[1], reference.shape[0]))
+            errors.append(mse(image, reference))
+            ssims.append(ssim(image, reference))
+            seconds.append(frame_seconds)
+
+        threshold, scale, bucket_size = preset
+        result = {
+            "preset": name,
+            "threshold": threshold,
+            "scale": scale,
+            "bucket_size": bucket_size,
+            "seconds": float(np.mean(seconds)),
+            "psnr": psnr_from_mse(float(np.mean(errors))),
+            "ssim": float(np.mean(ssims)),
+        }
+        results.append(result)
+        print(f"[{index}/{len(presets)}] {name}: {result['seconds']:.2f}s/frame, PSNR {result['psnr']:.2f} dB, SSIM {result['ssim']:.4f}")
+
+    front = pareto_front(results, metric)
+    with open(os.path.join(output_root, "sweep.json"), "w", encoding="utf-8") as handle:
+        json.dump(
+            {"scene": os.path.abspath(scene_file), "frames": sequence_index.format_ranges(frame_ranges),
+             "reference": preset_name(*reference_preset), "metric": metric, "results": results,
+             "pareto": [result["preset"] for result in front]},
+            handle, indent=2,
+        )
+    return results, front
+
+
+def print_results(results, front, metric="ssim"):
+    on_front = {result["preset"] for result in front}
+    print("{:>10}{:>7}{:>8}{:>12}{:>10}{:>9}  {}".format("threshold", "scale", "bucket", "s/frame", "PSNR dB", "SSIM", "pareto"))
+    for result in sorted(results, key=lambda result: result["seconds"]):
+        print("{:>10g}{:>7g}{:>8}{:>12.2f}{:>10.2f}{:>9.4f}  {}".format(
+            result["threshold"], result["scale"], result["bucket_size"], result["seconds"],
+            result["psnr"], result["ssim"], "*" if result["preset"] in on_front else "",
+        ))
+    print(f"\nPareto-optimal presets by time and {metric.upper()}, fastest first:")
+    for result in front:
+        print(
+            f"  unifiedAdaptiveErrorThreshold {result['threshold']:g}, resolution x{result['scale']:g}, "
+            f"bucketSize {result['bucket_size']}: {result['seconds']:.2f}s/frame, "
+            f"PSNR {result['psnr']:.2f} dB, SSIM {result['ssim']:.4f}"
+        )
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(",") if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the Pareto-optimal Redshift presets for a scene by render time and image error.")
+    parser.add_argument("scene", help="Maya scene to render.")
+    parser.add_argument("--frames", required=True, help="Sample frames, e.g. 1001,1050,1100.")
+    parser.add_argument("--thresholds", default=",".join(f"{value:g}" for value in DEFAULT_THRESHOLDS), help="Comma separated unifiedAdaptiveErrorThreshold values.")
+    parser.add_argument("--scales", default=",".join(f"{value:g}" for value in DEFAULT_SCALES), help="Comma separated resolution scales.")
+    parser.add_argument("--buckets", default=",".join(str(value) for value in DEFAULT_BUCKETS), help="Comma separated bucket sizes.")
+    parser.add_argument("--metric", choices=("ssim", "psnr"), default="ssim", help="Quality measure for the Pareto front.")
+    parser.add_argument("--output", default="", help=f"Folder for the sweep renders (default: {SWEEP_DIR_NAME} beside the scene).")
+    parser.add_argument("--render-command", default="", help="Render command to run instead of Render, e.g. a stub.")
+    parser.add_argument("--render-args", default="", help="Extra Render flags, e.g. \"-r redshift -cam Camera\".")
+    args = parser.parse_args()
+
+    results, front = run_sweep(
+        args.scene,
+        sequence_index.parse_ranges(args.frames),
+        _float_list(args.thresholds),
+        _float_list(args.scales),
+        [int(value) for value in _float_list(args.buckets)],
+        args.output or None,
+        shlex.split(args.render_command, posix=os.name != "nt") or None,
+        shlex.split(args.render_args, posix=os.name != "nt"),
+        args.metric,
+    )
+    print_results(results, front, args.metric)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Benchmark single-process vs segmented parallel H.264 encodes of one image sequence.
+# Reports wall time and output bitrate for each run.
+#
+# python benchmarks/bench_segmented_encode.py --input "H:/renders/shot/beauty" --fps 24
+# python benchmarks/bench_segmented_encode.py --frames 600 --size 1920x1080   (synthetic sequence)
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encode_engine  # noqa: E402
+import sequence_index  # noqa: E402
+
+
+def make_synthetic_sequence(output_dir, frame_count, size, fps):
+    os.makedirs(output_dir, exist_ok=True)
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+        "-frames:v", str(frame_count),
+        "-start_number", "1001",
+        os.path.join(output_dir, "bench.%04d.png"),
+    ]
+    subprocess.run(command, env=encode_engine.get_ffmpeg_env(), check=True)
+
+
+def quiet_call(func, *args, **kwargs):
+    # The engine prints full ffmpeg logs; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def bitrate_kbps(output_file, frame_count, fps):
+    return os.path.getsize(output_file) * 8 / (frame_count / fps) / 1000
+
+
+def run_benchmark(sequence_spec, fps, chunk_counts):
+    start_frame = sequence_index.first_frame(sequence_spec["frame_ranges"])
+    end_frame = sequence_index.last_frame(sequence_spec["frame_ranges"])
+    frame_count = end_frame - start_frame + 1
+    output_file = encode_engine.output_path_for(sequence_spec, "h264")
+    # The movie lands next to the frames; never overwrite or delete a real one
+    if os.path.exists(output_file):
+        raise FileExistsError(f"{output_file} already exists; move it aside before benchmarking this sequence")
+    created_files = [output_file]
+    cache_file = encode_engine.encode_cache_path_for(output_file)
+    if not os.path.exists(cache_file):
+        created_files.append(cache_file)
+
+    # Every run must encode; the encode cache would skip all but the first
+    rows = []
+    try:
+        began = time.perf_counter()
+        quiet_call(encode_engine.encode_sequence, sequence_spec, fps, start_frame, end_frame, ["h264"], force=True)
+        rows.append(("single", time.perf_counter() - began, bitrate_kbps(output_file, frame_count, fps)))
+
+        for chunk_count in chunk_counts:
+            began = time.perf_counter()
+            quiet_call(
+                encode_engine.encode_segmented, sequence_spec, fps, start_frame, end_frame, "h264", chunk_count, force=True
+            )
+            rows.append((f"{chunk_count} segments", time.perf_counter() - began, bitrate_kbps(output_file, frame_count, fps)))
+    finally:
+        for path in created_files:
+            if os.path.exists(path):
+                os.remove(path)
+    return frame_count, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-process and segmented H.264 encodes.")
+    parser.add_argument("--input", help="Folder holding one image sequence. Omit to generate a synthetic one.")
+    parser.add_argument("--fps", type=float, default=24)
+    parser.add_argument("--frames", type=int, default=480, help="Synthetic sequence length.")
+    parser.add_argument("--size", default="1920x1080", help="Synthetic sequence resolution.")
+    parser.add_argument("--chunks", default="2,4,8", help="Comma separated segment counts to try.")
+    args = parser.parse_args()
+
+    temp_dir = None
+    input_dir = args.input
+    if not input_dir:
+        temp_dir = tempfile.mkdtemp(prefix="bench_segmented_")
+        input_dir = temp_dir
+        print(f"Generating {args.frames} synthetic {args.size} frames in {input_dir}")
+        make_synthetic_sequence(input_dir, args.frames, args.size, args.fps)
+
+    try:
+        sequences = sequence_index.scan_sequences(input_dir, recursive=False, use_cache=False)
+        if not sequences:
+            raise FileNotFoundError(f"No image sequence found in {input_dir}")
+
+        chunk_counts = [int(value) for value in args.chunks.split(",") if value.strip()]
+        frame_count, rows = run_benchmark(sequences[0], args.fps, chunk_counts)
+
+        print(f"{sequences[0]['base_name']}: {frame_count} frames, {os.cpu_count()} cores")
+        print(f"{'mode':<14}{'wall (s)':>10}{'speedup':>10}{'kb/s':>12}")
+        single_time = rows[0][1]
+        for mode, wall_time, bitrate in rows:
+            print(f"{mode:<14}{wall_time:>10.2f}{single_time / wall_time:>9.2f}x{bitrate:>12.0f}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
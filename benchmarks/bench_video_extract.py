@@ -0,0 +1,90 @@
+# Benchmark video to PNG extraction for each compression preset and worker count.
+# Reports extraction fps and total bytes written per run.
+#
+# python benchmarks/bench_video_extract.py --input "H:/refs/fire_loop.mov"
+# python benchmarks/bench_video_extract.py --frames 480 --size 1920x1080   (synthetic clip)
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encode_engine  # noqa: E402
+import video_extract  # noqa: E402
+
+
+def make_synthetic_clip(output_file, frame_count, size, fps):
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+        "-frames:v", str(frame_count),
+        "-c:v", "libx264", "-g", "48", "-pix_fmt", "yuv420p",
+        output_file,
+    ]
+    subprocess.run(command, env=encode_engine.get_ffmpeg_env(), check=True)
+
+
+def folder_bytes(folder):
+    with os.scandir(folder) as entries:
+        return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+
+def run_benchmark(video_file, presets, worker_counts, scale, output_root):
+    rows = []
+    for preset in presets:
+        for worker_count in worker_counts:
+            output_dir = os.path.join(output_root, f"{preset}_{worker_count}")
+            began = time.perf_counter()
+            # The engine prints full ffmpeg logs; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                video_extract.extract_png_sequence(video_file, output_dir, "bench", preset, scale, worker_count)
+            wall_time = time.perf_counter() - began
+            frame_count = len(os.listdir(output_dir))
+            rows.append((preset, worker_count, frame_count, wall_time, folder_bytes(output_dir)))
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PNG compression presets and worker counts for video extraction.")
+    parser.add_argument("--input", help="Video file to extract. Omit to generate a synthetic clip.")
+    parser.add_argument("--frames", type=int, default=240, help="Synthetic clip length.")
+    parser.add_argument("--size", default="1920x1080", help="Synthetic clip resolution.")
+    parser.add_argument("--presets", default=",".join(video_extract.PNG_COMPRESSION_PRESETS), help="Comma separated presets to try.")
+    parser.add_argument("--workers", default="1,0", help="Comma separated worker counts to try (0 = size to the machine).")
+    parser.add_argument("--scale", default=video_extract.DEFAULT_SCALE, help="ffmpeg scale argument, or 'none' for full size.")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_extract_")
+    video_file = args.input
+    if not video_file:
+        video_file = os.path.join(temp_dir, "bench.mp4")
+        print(f"Generating {args.frames} synthetic {args.size} frames in {video_file}")
+        make_synthetic_clip(video_file, args.frames, args.size, 24)
+
+    try:
+        presets = [value.strip() for value in args.presets.split(",") if value.strip()]
+        worker_counts = [int(value) or None for value in args.workers.split(",") if value.strip()]
+        scale = None if args.scale.lower() == "none" else args.scale
+        rows = run_benchmark(video_file, presets, worker_counts, scale, temp_dir)
+
+        print(f"{os.path.basename(video_file)}: {os.cpu_count()} cores, scale {scale or 'full'}")
+        print(f"{'preset':<10}{'workers':>8}{'frames':>8}{'wall (s)':>10}{'fps':>8}{'MB':>10}")
+        for preset, worker_count, frame_count, wall_time, total_bytes in rows:
+            print(
+                f"{preset:<10}{worker_count or 'auto':>8}{frame_count:>8}{wall_time:>10.2f}"
+                f"{frame_count / wall_time:>8.1f}{total_bytes / 1e6:>10.1f}"
+            )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Check render_telemetry's log parser against a canned Redshift render log.
+# The fixture has a crashed first attempt, two render layer passes of one
+# frame, mixed duration formats, a frame with both a named and a generic time
+# line, and a frame that crashed before reporting a time.
+#
+# python benchmarks/check_render_log_parser.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_telemetry  # noqa: E402
+
+FIXTURE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "redshift_render.log")
+
+EXPECTED = {
+    # Attempt 2 replaces attempt 1; two layer passes add up, memory keeps the peak
+    1001: {"seconds": 90.0, "peak_memory_mb": 3000.0, "texture_cache_hits": 220,
+           "texture_cache_misses": 8, "texture_read_mb": 1280.0},
+    # HH:MM:SS time
+    1002: {"seconds": 65.0, "peak_memory_mb": None, "texture_cache_hits": 10,
+           "texture_cache_misses": 2, "texture_read_mb": None},
+    # The line naming the frame wins over the generic "Rendering time" line
+    1003: {"seconds": 61.25, "peak_memory_mb": None, "texture_cache_hits": None,
+           "texture_cache_misses": None, "texture_read_mb": None},
+    # 1004 crashed without a time and is left out
+}
+
+
+def main():
+    parsed = render_telemetry.parse_render_log_file(FIXTURE_LOG)
+    problems = []
+    for frame in sorted(set(EXPECTED) | set(parsed)):
+        if parsed.get(frame) != EXPECTED.get(frame):
+            problems.append(f"frame {frame}: expected {EXPECTED.get(frame)}, parsed {parsed.get(frame)}")
+
+    for duration, seconds in (("2.34s", 2.34), ("1m:12s", 72.0), ("1h 2m 3s", 3723.0), ("00:01:12", 72.0), ("soon", None)):
+        if render_telemetry.parse_duration(duration) != seconds:
+            problems.append(f"duration {duration!r}: expected {seconds}, parsed {render_telemetry.parse_duration(duration)}")
+
+    for scene_file, expected in (("sh010_v004.mb", ("sh010", 4)), ("shot_v003_lighting.mb", ("shot_lighting", 3)),
+                                 ("sh010.mb", ("sh010", 1))):
+        if render_telemetry.scene_version(scene_file) != expected:
+            problems.append(f"scene {scene_file}: expected {expected}, got {render_telemetry.scene_version(scene_file)}")
+
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problem(s)" if problems else "Render log parser OK")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
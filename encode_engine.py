@@ -0,0 +1,798 @@
+# Shared ffmpeg encode engine for image sequences.
+# Decodes a sequence once and fans it out to one output per preset through a
+# single filter graph, so MP4, GIF and ProRes dailies don't each reread the frames.
+
+import collections
+import contextvars
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import sequence_index
+
+FFMPEG_BIN_DIR = "C:/ffmpeg/ffmpeg-master-latest-win64-gpl/bin"
+
+# Fewer threads than this per ffmpeg job and x264 stops scaling usefully
+MIN_THREADS_PER_JOB = 4
+
+# Lines of ffmpeg log kept in memory to show when an encode fails
+LOG_TAIL_LINES = 200
+PROGRESS_PRINT_SECONDS = 5
+
+# Filter templates get {input}, {output} and a unique {tag} for inner labels
+PASSTHROUGH_FILTER = "{input}null{output}"
+
+# Segmented encodes cut chunks on multiples of this many frames and force a
+# keyframe at that interval, so the stitched movie has the same GOP layout
+SEGMENT_GOP_SIZE = 48
+
+# Incremental encodes keep this manifest of per-segment frame fingerprints
+SEGMENT_MANIFEST_NAME = "manifest.json"
+SEGMENT_MANIFEST_VERSION = 1
+INCREMENTAL_CHUNK_GOPS = 2
+
+# Bump to invalidate every recorded encode, e.g. after changing ffmpeg builds
+ENCODE_CACHE_VERSION = 1
+
+PRESETS = {}
+
+JOB_HOOKS = contextvars.ContextVar("encode_job_hooks", default={})
+
+
+def register_preset(name, extension, output_args, filter_template=PASSTHROUGH_FILTER, description="", segmentable=False):
+    """
+    segmentable presets can be encoded in chunks and joined with the concat
+    demuxer without re-encoding.
+    """
+    PRESETS[name] = {
+        "name": name,
+        "extension": extension,
+        "output_args": list(output_args),
+        "filter": filter_template,
+        "description": description,
+        "segmentable": segmentable,
+    }
+
+
+register_preset(
+    "h264",
+    ".mp4",
+    ["-c:v", "libx264", "-pix_fmt", "yuv420p"],
+    description="H.264 MP4 for review",
+    segmentable=True,
+)
+register_preset(
+    "gif",
+    ".gif",
+    [],
+    # Half resolution with a generated palette for better GIF quality
+    filter_template=(
+        "{input}scale=iw/2:ih/2,split[{tag}a][{tag}b];"
+        "[{tag}a]palettegen[{tag}p];[{tag}b][{tag}p]paletteuse{output}"
+    ),
+    description="Half resolution GIF with palette",
+)
+register_preset(
+    "prores",
+    ".mov",
+    ["-c:v", "prores_ks", "-profile:v", "4444", "-pix_fmt", "yuva444p10le"],
+    description="ProRes 4444 MOV with alpha",
+    segmentable=True,
+)
+
+
+def get_ffmpeg_env():
+    # Ensure ffmpeg is in PATH
+    env = os.environ.copy()
+    env["PATH"] += os.pathsep + FFMPEG_BIN_DIR
+    return env
+
+
+def output_path_for(sequence_spec, preset_name):
+    extension = PRESETS[preset_name]["extension"]
+    return os.path.join(sequence_spec["input_dir"], f"{sequence_spec['base_name']}{extension}").replace("\\", "/")
+
+
+def clamp_frame_range(sequence_spec, start_frame, end_frame):
+    """
+    Clamp the requested range to the frames on disk. Returns (start, end).
+    """
+    frame_ranges = sequence_spec["frame_ranges"]
+    if not frame_ranges:
+        raise FileNotFoundError(f"No images found for {sequence_spec['base_name']} in {sequence_spec['input_dir']}")
+
+    actual_start = sequence_index.first_frame(frame_ranges)
+    actual_end = sequence_index.last_frame(frame_ranges)
+
+    if start_frame < actual_start or end_frame > actual_end:
+        print(f"Warning: requested frame range {start_frame}-{end_frame} is outside detected sequence {actual_start}-{actual_end}.")
+        start_frame = max(start_frame, actual_start)
+        end_frame = min(end_frame, actual_end)
+
+    if start_frame > end_frame:
+        raise ValueError(f"Invalid frame range after clamping: {start_frame}-{end_frame}")
+
+    return start_frame, end_frame
+
+
+def build_output_args(outputs, frame_count=None, threads=None):
+    """
+    Build the filter graph and output arguments that fan input 0 out to every
+    (preset_name, output_file) in outputs. frame_count None encodes until the
+    input ends.
+    """
+    command = []
+    if threads:
+        command += ["-filter_complex_threads", str(threads)]
+
+    if len(outputs) > 1:
+        source_labels = [f"[src{index}]" for index in range(len(outputs))]
+        filter_parts = [f"[0:v]split={len(outputs)}{''.join(source_labels)}"]
+    else:
+        source_labels = ["[0:v]"]
+        filter_parts = []
+
+    for index, (preset_name, _) in enumerate(outputs):
+        filter_parts.append(
+            PRESETS[preset_name]["filter"].format(
+                input=source_labels[index],
+                output=f"[out{index}]",
+                tag=f"{preset_name}{index}",
+            )
+        )
+    command += ["-filter_complex", ";".join(filter_parts)]
+
+    for index, (preset_name, output_file) in enumerate(outputs):
+        command += ["-map", f"[out{index}]"]
+        if frame_count is not None:
+            command += ["-frames:v", str(frame_count)]
+        command += PRESETS[preset_name]["output_args"]
+        if threads:
+            command += ["-threads", str(threads)]
+        command.append(output_file)
+
+    return command
+
+
+def build_encode_command(input_path, fps, start_frame, frame_count, outputs, threads=None):
+    """
+    Build one ffmpeg command that decodes input_path once and writes every
+    (preset_name, output_file) in outputs.
+    """
+    command = [
+        "ffmpeg",
+        "-y",  # Automatically overwrite existing files
+        "-framerate", str(fps),
+        "-start_number", str(start_frame),  # Explicitly set start frame
+        "-i", input_path,
+    ]
+    return command + build_output_args(outputs, frame_count, threads)
+
+
+def set_job_hooks(process_observer=None, progress_callback=None):
+    """
+    Install hooks for every ffmpeg run in the current context, including runs
+    on worker threads started through submit_with_context. process_observer
+    receives each Popen (e.g. to cancel it); progress_callback replaces the
+    default progress printer.
+    """
+    JOB_HOOKS.set({"process_observer": process_observer, "progress_callback": progress_callback})
+
+
+def submit_with_context(executor, func, *args, **kwargs):
+    # Worker threads don't inherit context variables, so carry the job hooks over
+    context = contextvars.copy_context()
+    return executor.submit(context.run, func, *args, **kwargs)
+
+
+def _read_log_tail(stream, log_tail):
+    for line in stream:
+        log_tail.append(line.rstrip())
+
+
+def _feed_stdin(stdin_feeder, process, feed_errors):
+    try:
+        stdin_feeder(process.stdin.buffer, process)
+    except BrokenPipeError:
+        # ffmpeg exited early; its log explains why
+        pass
+    except Exception as exc:
+        feed_errors.append(exc)
+        process.kill()
+    finally:
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+
+def format_progress(progress):
+    label = f"{progress['label']}: " if progress["label"] else ""
+    if progress["total_frames"]:
+        text = f"{label}frame {progress['frame']}/{progress['total_frames']} ({progress['percent']:.0f}%)"
+    else:
+        text = f"{label}frame {progress['frame']}"
+    text += f", {progress['fps']:.1f} fps"
+    if progress["eta_seconds"] is not None and not progress["done"]:
+        text += f", ETA {int(progress['eta_seconds'] // 60)}:{int(progress['eta_seconds'] % 60):02d}"
+    return text
+
+
+def make_progress_printer(interval=PROGRESS_PRINT_SECONDS):
+    """
+    Return a progress callback that prints at most once per interval, plus
+    the final update.
+    """
+    last_printed = [0.0]
+
+    def _print_progress(progress):
+        now = time.monotonic()
+        if progress["done"] or now - last_printed[0] >= interval:
+            last_printed[0] = now
+            print(format_progress(progress))
+
+    return _print_progress
+
+
+def run_ffmpeg(command, label="", total_frames=None, progress_callback=None, stdin_feeder=None):
+    """
+    Run ffmpeg reading its -progress key/value stream as it goes. Only the last
+    LOG_TAIL_LINES lines of the log are kept and shown if the encode fails.
+    stdin_feeder(stream, process) runs on its own thread writing bytes to
+    ffmpeg's stdin and should stop once process.poll() is set; stdin is
+    closed when it returns.
+    """
+    hooks = JOB_HOOKS.get()
+    if progress_callback is None:
+        progress_callback = hooks.get("progress_callback") or make_progress_printer()
+
+    command = [command[0], "-hide_banner", "-progress", "pipe:1", "-nostats"] + command[1:]
+    print("Running command:", " ".join(command))
+
+    process = subprocess.Popen(
+        command,
+        env=get_ffmpeg_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.PIPE if stdin_feeder else None,
+        text=True,
+        errors="replace",
+    )
+    if hooks.get("process_observer"):
+        hooks["process_observer"](process)
+
+    log_tail = collections.deque(maxlen=LOG_TAIL_LINES)
+    log_thread = threading.Thread(target=_read_log_tail, args=(process.stderr, log_tail), daemon=True)
+    log_thread.start()
+
+    feed_errors = []
+    feed_thread = None
+    if stdin_feeder:
+        feed_thread = threading.Thread(target=_feed_stdin, args=(stdin_feeder, process, feed_errors), daemon=True)
+        feed_thread.start()
+
+    started = time.monotonic()
+    values = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if key != "progress":
+            values[key] = value
+            continue
+
+        # A progress= line closes each block of key/value pairs
+        frame = int(values.get("frame", 0) or 0)
+        elapsed = time.monotonic() - started
+        fps = frame / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if total_frames and fps > 0:
+            eta_seconds = max(0.0, (total_frames - frame) / fps)
+        progress_callback({
+            "label": label,
+            "frame": frame,
+            "total_frames": total_frames,
+            "percent": 100.0 * frame / total_frames if total_frames else None,
+            "fps": fps,
+            "eta_seconds": eta_seconds,
+            "done": value == "end",
+        })
+
+    returncode = process.wait()
+    log_thread.join()
+    if feed_thread:
+        feed_thread.join()
+    if feed_errors:
+        raise feed_errors[0]
+    if returncode != 0:
+        print(f"FFmpeg log{f' ({label})' if label else ''}, last {len(log_tail)} lines:")
+        print("\n".join(log_tail))
+        raise RuntimeError(f"FFmpeg failed with exit code {returncode}")
+
+
+def frame_stats(sequence_spec):
+    """
+    Return {filename: (size, mtime_ns)} for the sequence's folder from one
+    directory listing instead of a stat per frame.
+    """
+    stats = {}
+    with os.scandir(sequence_spec["input_dir"]) as entries:
+        for entry in entries:
+            if entry.is_file():
+                entry_stat = entry.stat()
+                stats[entry.name] = (entry_stat.st_size, entry_stat.st_mtime_ns)
+    return stats
+
+
+def _hash_file(path, digest):
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+
+
+def frames_fingerprint(sequence_spec, chunk, stats, hash_content=False):
+    """
+    Fingerprint the frames of one [start, end] chunk by name, size and mtime,
+    or by their bytes when hash_content is set.
+    """
+    digest = hashlib.sha1()
+    chunk_start, chunk_end = chunk
+    for frame in range(chunk_start, chunk_end + 1):
+        frame_path = sequence_index.sequence_frame_path(sequence_spec, frame)
+        filename = os.path.basename(frame_path)
+        frame_stat = stats.get(filename)
+        digest.update(f"{filename}|{frame_stat}\n".encode("utf-8"))
+        if hash_content and frame_stat:
+            _hash_file(frame_path, digest)
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest_path, manifest):
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
+def encode_cache_key(sequence_spec, fps, start_frame, end_frame, preset_name, stats):
+    """
+    Hash everything that decides an output's bytes: the frames in range with
+    their size and mtime, the frame rate and range, and the preset settings.
+    """
+    preset = PRESETS[preset_name]
+    settings = json.dumps(
+        [ENCODE_CACHE_VERSION, fps, start_frame, end_frame, preset["filter"], preset["output_args"]]
+    )
+    digest = hashlib.sha1(settings.encode("utf-8"))
+    digest.update(frames_fingerprint(sequence_spec, [start_frame, end_frame], stats).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def encode_cache_path_for(output_file):
+    directory, filename = os.path.split(output_file)
+    return os.path.join(directory, f".{filename}.encode.json")
+
+
+def output_is_current(output_file, cache_key):
+    """
+    True when output_file was written by an encode with the same cache key and
+    hasn't been touched since.
+    """
+    if not os.path.exists(output_file):
+        return False
+
+    record = _load_manifest(encode_cache_path_for(output_file))
+    output_stat = os.stat(output_file)
+    return (
+        record.get("key") == cache_key and
+        record.get("size") == output_stat.st_size and
+        record.get("mtime_ns") == output_stat.st_mtime_ns
+    )
+
+
+def record_output(output_file, cache_key):
+    output_stat = os.stat(output_file)
+    try:
+        _save_manifest(
+            encode_cache_path_for(output_file),
+            {"key": cache_key, "size": output_stat.st_size, "mtime_ns": output_stat.st_mtime_ns},
+        )
+    except OSError as exc:
+        print(f"Could not write encode cache for {output_file}: {exc}")
+
+
+def encode_sequence(sequence_spec, fps, start_frame, end_frame, preset_names, threads=None, force=False):
+    """
+    Encode one image sequence to every preset in a single ffmpeg pass.
+    Outputs whose encode cache key still matches are returned as-is unless
+    force is set.
+    Returns {preset_name: output_file}.
+    """
+    for preset_name in preset_names:
+        if preset_name not in PRESETS:
+            raise ValueError(f"Unknown encode preset {preset_name}. Choose from {', '.join(sorted(PRESETS))}")
+
+    base_name = sequence_spec["base_name"]
+    start_frame, end_frame = clamp_frame_range(sequence_spec, start_frame, end_frame)
+    frame_count = end_frame - start_frame + 1
+
+    # Ensure proper quoting of paths with spaces
+    input_path = os.path.join(sequence_spec["input_dir"], sequence_index.sequence_pattern(sequence_spec)).replace("\\", "/")
+    outputs = [(preset_name, output_path_for(sequence_spec, preset_name)) for preset_name in preset_names]
+
+    stats = frame_stats(sequence_spec)
+    cache_keys = {
+        preset_name: encode_cache_key(sequence_spec, fps, start_frame, end_frame, preset_name, stats)
+        for preset_name in preset_names
+    }
+    pending = []
+    for preset_name, output_file in outputs:
+        if not force and output_is_current(output_file, cache_keys[preset_name]):
+            print(f"Up to date, skipping encode: {output_file}")
+            continue
+        pending.append((preset_name, output_file))
+
+    if not pending:
+        return dict(outputs)
+
+    print(f"Sequence: {base_name}")
+    print(f"Input path: {input_path}")
+    for preset_name, output_file in pending:
+        print(f"Output file ({preset_name}): {output_file}")
+        if os.path.exists(output_file):
+            print(f"Output file {output_file} already exists. It will be overwritten.")
+    print(f"Requested frame range: {start_frame}-{end_frame} ({frame_count} frames)")
+
+    command = build_encode_command(input_path, fps, start_frame, frame_count, pending, threads)
+    run_ffmpeg(command, base_name, frame_count)
+
+    for preset_name, output_file in pending:
+        record_output(output_file, cache_keys[preset_name])
+
+    return dict(outputs)
+
+
+def segment_chunk_size(frame_count, chunk_count, gop_size=SEGMENT_GOP_SIZE):
+    gop_count = math.ceil(frame_count / gop_size)
+    gops_per_chunk = max(1, math.ceil(gop_count / max(1, chunk_count)))
+    return gops_per_chunk * gop_size
+
+
+def split_frame_range(start_frame, end_frame, chunk_count, gop_size=SEGMENT_GOP_SIZE, chunk_size=None):
+    """
+    Split start-end into at most chunk_count [start, end] chunks whose cut
+    points fall on multiples of gop_size from start_frame. An explicit
+    chunk_size overrides chunk_count.
+    """
+    if not chunk_size:
+        chunk_size = segment_chunk_size(end_frame - start_frame + 1, chunk_count, gop_size)
+
+    chunks = []
+    for chunk_start in range(start_frame, end_frame + 1, chunk_size):
+        chunks.append([chunk_start, min(chunk_start + chunk_size - 1, end_frame)])
+    return chunks
+
+
+def segment_dir_for(output_file):
+    directory, filename = os.path.split(output_file)
+    return os.path.join(directory, f".{filename}.segments").replace("\\", "/")
+
+
+def encode_segment(input_path, fps, chunk, preset_name, segment_file, threads=None, gop_size=SEGMENT_GOP_SIZE):
+    chunk_start, chunk_end = chunk
+    command = build_encode_command(
+        input_path,
+        fps,
+        chunk_start,
+        chunk_end - chunk_start + 1,
+        [(preset_name, segment_file)],
+        threads,
+    )
+    # Fixed GOP so every chunk boundary is a keyframe in the stitched result
+    command[-1:-1] = ["-g", str(gop_size)]
+    run_ffmpeg(command, os.path.basename(segment_file), chunk_end - chunk_start + 1)
+    return segment_file
+
+
+def concat_segments(segment_files, output_file):
+    """
+    Join encoded segments losslessly with the concat demuxer.
+    """
+    list_file = os.path.join(os.path.dirname(segment_files[0]), "concat.txt")
+    with open(list_file, "w", encoding="utf-8") as handle:
+        for segment_file in segment_files:
+            escaped = os.path.abspath(segment_file).replace("\\", "/").replace("'", "'\\''")
+            handle.write(f"file '{escaped}'\n")
+
+    command = [
+        "ffmpeg",
+        "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_file,
+        "-c", "copy",
+        output_file,
+    ]
+    run_ffmpeg(command, os.path.basename(output_file))
+    return output_file
+
+
+def encode_segmented(sequence_spec, fps, start_frame, end_frame, preset_name="h264", chunk_count=None, max_jobs=None,
+                     keep_segments=False, incremental=False, hash_content=False, force=False):
+    """
+    Encode one sequence as keyframe-aligned chunks in parallel, then stitch
+    them into the final movie with the concat demuxer.
+
+    incremental keeps the segments next to the output with a manifest of
+    per-segment frame fingerprints, and on later runs only re-encodes the
+    segments whose frames changed. force re-encodes every segment and starts
+    the manifest afresh.
+    Returns the output file.
+    """
+    preset = PRESETS.get(preset_name)
+    if not preset or not preset["segmentable"]:
+        raise ValueError(f"Preset {preset_name} can't be encoded in segments.")
+
+    start_frame, end_frame = clamp_frame_range(sequence_spec, start_frame, end_frame)
+    input_path = os.path.join(sequence_spec["input_dir"], sequence_index.sequence_pattern(sequence_spec)).replace("\\", "/")
+    output_file = output_path_for(sequence_spec, preset_name)
+    segment_dir = segment_dir_for(output_file)
+    manifest_path = os.path.join(segment_dir, SEGMENT_MANIFEST_NAME)
+
+    stats = frame_stats(sequence_spec)
+    cache_key = encode_cache_key(sequence_spec, fps, start_frame, end_frame, preset_name, stats)
+    if not force and not incremental and output_is_current(output_file, cache_key):
+        print(f"Up to date, skipping encode: {output_file}")
+        return output_file
+
+    os.makedirs(segment_dir, exist_ok=True)
+
+    # Anything that changes the encoded bytes invalidates every segment
+    settings = {
+        "version": SEGMENT_MANIFEST_VERSION,
+        "input_path": input_path,
+        "preset": preset_name,
+        "output_args": preset["output_args"],
+        "filter": preset["filter"],
+        "fps": fps,
+        "gop_size": SEGMENT_GOP_SIZE,
+        "start_frame": start_frame,
+        "hash_content": hash_content,
+    }
+    manifest = _load_manifest(manifest_path) if incremental and not force else {}
+    if manifest.get("settings") != settings:
+        manifest = {}
+
+    # Reuse the previous chunk layout so unchanged chunks keep their boundaries
+    frame_count = end_frame - start_frame + 1
+    chunk_size = manifest.get("chunk_size")
+    if not chunk_size:
+        if chunk_count:
+            chunk_size = segment_chunk_size(frame_count, chunk_count)
+        elif incremental:
+            # Small segments so a fix only rebuilds the GOPs around it
+            chunk_size = INCREMENTAL_CHUNK_GOPS * SEGMENT_GOP_SIZE
+        else:
+            chunk_size = segment_chunk_size(frame_count, plan_parallel_jobs(os.cpu_count() or 1, max_jobs)[0])
+    chunks = split_frame_range(start_frame, end_frame, None, chunk_size=chunk_size)
+
+    segment_files = [
+        os.path.join(segment_dir, f"{chunk_start}-{chunk_end}{preset['extension']}").replace("\\", "/")
+        for chunk_start, chunk_end in chunks
+    ]
+
+    fingerprints = {}
+    if incremental:
+        for chunk, segment_file in zip(chunks, segment_files):
+            fingerprints[os.path.basename(segment_file)] = frames_fingerprint(sequence_spec, chunk, stats, hash_content)
+
+    previous = manifest.get("segments", {})
+    pending = [
+        (chunk, segment_file)
+        for chunk, segment_file in zip(chunks, segment_files)
+        if force
+        or not incremental
+        or previous.get(os.path.basename(segment_file)) != fingerprints[os.path.basename(segment_file)]
+        or not os.path.exists(segment_file)
+    ]
+    worker_count, threads_per_job = plan_parallel_jobs(max(1, len(pending)), max_jobs)
+
+    print(f"Sequence: {sequence_spec['base_name']}")
+    print(
+        f"Encoding {len(pending)} of {len(chunks)} segment(s) for {start_frame}-{end_frame} "
+        f"with {worker_count} job(s) x {threads_per_job} thread(s)"
+    )
+
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        futures = [
+            submit_with_context(
+                executor,
+                encode_segment,
+                input_path,
+                fps,
+                chunk,
+                preset_name,
+                segment_file,
+                threads_per_job if worker_count > 1 else None
+            )
+            for chunk, segment_file in pending
+        ]
+        for future in futures:
+            future.result()
+
+    # Re-stitch if the movie was rewritten by something other than this manifest
+    output_current = os.path.exists(output_file) and os.stat(output_file).st_mtime_ns == manifest.get("output_mtime_ns")
+    if pending or not output_current:
+        concat_segments(segment_files, output_file)
+        record_output(output_file, cache_key)
+    else:
+        print(f"All segments up to date, keeping {output_file}")
+
+    if incremental:
+        # Drop segments left over from an older frame range
+        current_names = set(fingerprints) | {SEGMENT_MANIFEST_NAME, "concat.txt"}
+        for name in os.listdir(segment_dir):
+            if name not in current_names:
+                os.remove(os.path.join(segment_dir, name))
+        _save_manifest(
+            manifest_path,
+            {
+                "settings": settings,
+                "chunk_size": chunk_size,
+                "segments": fingerprints,
+                "output_mtime_ns": os.stat(output_file).st_mtime_ns,
+            },
+        )
+    elif not keep_segments:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    return output_file
+
+
+def find_sequence_specs(search_root, extension, frame_padding, dir_patterns=None, recursive=True):
+    return sequence_index.scan_sequences(
+        search_root,
+        extensions=[extension],
+        padding=frame_padding,
+        recursive=recursive,
+        dir_patterns=dir_patterns,
+    )
+
+
+def sort_sequence_specs(sequence_specs, primary_input_dir, primary_base_name):
+    normalized_primary_dir = os.path.normcase(os.path.normpath(primary_input_dir))
+    normalized_primary_base = os.path.normcase(primary_base_name)
+
+    def sort_key(sequence_spec):
+        is_primary = (
+            os.path.normcase(os.path.normpath(sequence_spec["input_dir"])) == normalized_primary_dir and
+            os.path.normcase(sequence_spec["base_name"]) == normalized_primary_base
+        )
+        return (
+            0 if is_primary else 1,
+            os.path.normcase(os.path.normpath(sequence_spec["input_dir"])),
+            os.path.normcase(sequence_spec["base_name"])
+        )
+
+    return sorted(sequence_specs, key=sort_key)
+
+
+def find_primary_sequence(settings):
+    """
+    Return the sequence the render settings point at directly, or None.
+    """
+    sequence_specs = find_sequence_specs(
+        settings["input_dir"],
+        settings["extension"],
+        settings["frame_padding"],
+        recursive=False,
+    )
+    return sequence_index.find_sequence(sequence_specs, settings["input_dir"], settings["base_name"])
+
+
+def plan_parallel_jobs(job_count, max_jobs=None, cpu_count=None):
+    """
+    Return (worker_count, threads_per_job) so that workers * threads stays
+    within the machine's cores.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    if not max_jobs:
+        max_jobs = max(1, cpu_count // MIN_THREADS_PER_JOB)
+
+    worker_count = max(1, min(job_count, max_jobs, cpu_count))
+    threads_per_job = max(1, cpu_count // worker_count)
+    return worker_count, threads_per_job
+
+
+def convert_sequences(sequence_specs, fps, start_frame, end_frame, preset_names, max_jobs=None, force=False):
+    """
+    Encode several sequences at once through a bounded worker pool.
+    Returns one result dict per sequence, in the order given, with either
+    outputs ({preset_name: output_file}) or error set.
+    """
+    worker_count, threads_per_job = plan_parallel_jobs(len(sequence_specs), max_jobs)
+    print(f"Encoding {len(sequence_specs)} sequence(s) with {worker_count} job(s) x {threads_per_job} thread(s)")
+
+    results = [
+        {"sequence_spec": sequence_spec, "outputs": None, "error": None}
+        for sequence_spec in sequence_specs
+    ]
+
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        futures = {
+            submit_with_context(
+                executor,
+                encode_sequence,
+                sequence_spec,
+                fps,
+                start_frame,
+                end_frame,
+                preset_names,
+                threads_per_job if worker_count > 1 else None,
+                force
+            ): result
+            for sequence_spec, result in zip(sequence_specs, results)
+        }
+        for future in as_completed(futures):
+            result = futures[future]
+            try:
+                result["outputs"] = future.result()
+                for output_file in result["outputs"].values():
+                    print(f"Successfully created {output_file}")
+            except Exception as exc:
+                result["error"] = exc
+                print(f"Failed to encode {result['sequence_spec']['base_name']}: {exc}")
+
+    return results
+
+
+def convert_sequences_segmented(sequence_specs, fps, start_frame, end_frame, preset_names, chunk_count=None,
+                                max_jobs=None, incremental=False, force=False):
+    """
+    Encode sequences one after another, each split into parallel segments.
+    Same result format as convert_sequences.
+    """
+    results = []
+    for sequence_spec in sequence_specs:
+        result = {"sequence_spec": sequence_spec, "outputs": None, "error": None}
+        try:
+            outputs = {}
+            for preset_name in preset_names:
+                outputs[preset_name] = encode_segmented(
+                    sequence_spec, fps, start_frame, end_frame, preset_name, chunk_count, max_jobs,
+                    incremental=incremental,
+                    force=force
+                )
+                print(f"Successfully created {outputs[preset_name]}")
+            result["outputs"] = outputs
+        except Exception as exc:
+            result["error"] = exc
+            print(f"Failed to encode {sequence_spec['base_name']}: {exc}")
+        results.append(result)
+
+    return results
+
+
+def open_in_explorer(output_file):
+    directory = os.path.abspath(os.path.dirname(output_file))
+    if not os.path.exists(directory):
+        print(f"Directory does not exist: {directory}")
+        return
+
+    print(f"Opening directory and selecting file: {output_file}")
+    try:
+        subprocess.run(["explorer", "/select,", os.path.normpath(output_file)], check=True)
+    except Exception as exc:
+        print(f"Error while opening directory in Explorer: {exc}")
@@ -0,0 +1,209 @@
+# Follow mode: encode a sequence while it is still rendering.
+# Watches the render folder and, as each next frame in order finishes writing,
+# pipes it into one long-running ffmpeg through image2pipe, so the movie is
+# finalised seconds after the last frame lands instead of after a full re-read.
+
+import os
+import time
+
+import encode_engine
+import sequence_index
+
+FOLLOW_POLL_SECONDS = 1.0
+
+# A frame counts as written once nothing has touched it for this long
+FRAME_SETTLE_SECONDS = 2.0
+
+# Give up and finalise the movie when no new frame arrives for this long
+STALL_TIMEOUT_SECONDS = 600
+
+# Decoder hints for image2pipe, which otherwise has to probe every frame
+PIPE_CODECS = {
+    ".png": "png",
+    ".jpg": "mjpeg",
+    ".jpeg": "mjpeg",
+    ".exr": "exr",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".tga": "targa",
+    ".bmp": "bmp",
+    ".dpx": "dpx",
+}
+
+# Trailers for formats where a truncated write is cheap to spot
+FRAME_TRAILERS = {
+    ".png": b"IEND\xaeB`\x82",
+    ".jpg": b"\xff\xd9",
+    ".jpeg": b"\xff\xd9",
+}
+
+
+def _find_followed_sequence(settings):
+    if not os.path.isdir(settings["input_dir"]):
+        return None
+    sequence_specs = sequence_index.scan_sequences(
+        settings["input_dir"],
+        extensions=[settings["extension"]],
+        padding=settings["frame_padding"],
+        recursive=False,
+        use_cache=False,
+    )
+    return sequence_index.find_sequence(sequence_specs, settings["input_dir"], settings["base_name"])
+
+
+def wait_for_sequence(settings, stall_timeout=STALL_TIMEOUT_SECONDS, poll_interval=FOLLOW_POLL_SECONDS):
+    """
+    Poll until the first frames of the render show up. Returns the sequence
+    spec, or None if nothing appeared within stall_timeout.
+    """
+    started = time.monotonic()
+    print(f"Waiting for {settings['base_name']} frames in {settings['input_dir']}")
+    while True:
+        sequence_spec = _find_followed_sequence(settings)
+        if sequence_spec:
+            return sequence_spec
+        if time.monotonic() - started > stall_timeout:
+            return None
+        time.sleep(poll_interval)
+
+
+def read_settled_frame(frame_path, extension):
+    """
+    Return the frame's bytes once it has finished writing, or None if it is
+    missing or still being written.
+    """
+    try:
+        frame_stat = os.stat(frame_path)
+    except OSError:
+        return None
+
+    if not frame_stat.st_size or time.time() - frame_stat.st_mtime < FRAME_SETTLE_SECONDS:
+        return None
+
+    try:
+        with open(frame_path, "rb") as handle:
+            data = handle.read()
+    except OSError:
+        return None
+
+    # The renderer may have reopened the file between the stat and the read
+    if len(data) != frame_stat.st_size:
+        return None
+    trailer = FRAME_TRAILERS.get(extension.lower())
+    if trailer and not data.endswith(trailer):
+        return None
+    return data
+
+
+def make_frame_feeder(sequence_spec, start_frame, end_frame, state, stall_timeout=STALL_TIMEOUT_SECONDS,
+                      poll_interval=FOLLOW_POLL_SECONDS):
+    """
+    Return a run_ffmpeg stdin feeder that streams frames start..end in order.
+    Frames that land ahead of a gap stay on disk until the gap is filled.
+    Progress is written to state: next_frame, frames_sent and stalled.
+    """
+    extension = sequence_spec["extension"]
+
+    def _feed(stream, process):
+        last_frame_time = time.monotonic()
+        waiting_on = None
+        frame = start_frame
+        while frame <= end_frame:
+            if process.poll() is not None:
+                return
+
+            frame_path = sequence_index.sequence_frame_path(sequence_spec, frame)
+            data = read_settled_frame(frame_path, extension)
+            if data is None:
+                if time.monotonic() - last_frame_time > stall_timeout:
+                    state["stalled"] = True
+                    print(f"No new frames for {stall_timeout:.0f}s, finishing the movie at frame {frame - 1}")
+                    return
+                if waiting_on != frame:
+                    waiting_on = frame
+                    print(f"Waiting for frame {frame}: {os.path.basename(frame_path)}")
+                time.sleep(poll_interval)
+                continue
+
+            stream.write(data)
+            stream.flush()
+            last_frame_time = time.monotonic()
+            state["frames_sent"] += 1
+            frame += 1
+            state["next_frame"] = frame
+
+    return _feed
+
+
+def build_follow_command(sequence_spec, fps, outputs, threads=None):
+    command = ["ffmpeg", "-y", "-f", "image2pipe", "-framerate", str(fps)]
+    codec = PIPE_CODECS.get(sequence_spec["extension"].lower())
+    if codec:
+        command += ["-c:v", codec]
+    command += ["-i", "pipe:0"]
+    return command + encode_engine.build_output_args(outputs, threads=threads)
+
+
+def follow_sequence(settings, preset_names=("h264",), stall_timeout=STALL_TIMEOUT_SECONDS,
+                    poll_interval=FOLLOW_POLL_SECONDS, threads=None):
+    """
+    Encode the sequence the render settings point at while it renders.
+
+    Frames are streamed from start_frame to end_frame as they finish writing.
+    If no new frame arrives within stall_timeout the movie is finalised with
+    what has rendered so far. Returns a dict with sequence_spec, outputs
+    ({preset_name: output_file}), frames and complete.
+    """
+    for preset_name in preset_names:
+        if preset_name not in encode_engine.PRESETS:
+            raise ValueError(f"Unknown encode preset {preset_name}. Choose from {', '.join(sorted(encode_engine.PRESETS))}")
+
+    sequence_spec = wait_for_sequence(settings, stall_timeout, poll_interval)
+    if not sequence_spec:
+        raise TimeoutError(f"No frames for {settings['base_name']} appeared in {settings['input_dir']} within {stall_timeout:.0f}s")
+
+    start_frame = settings["start_frame"]
+    end_frame = settings["end_frame"]
+    frame_count = end_frame - start_frame + 1
+    outputs = [
+        (preset_name, encode_engine.output_path_for(sequence_spec, preset_name))
+        for preset_name in preset_names
+    ]
+
+    print(f"Following {sequence_spec['base_name']} frames {start_frame}-{end_frame} ({frame_count} frames)")
+    for preset_name, output_file in outputs:
+        print(f"Output file ({preset_name}): {output_file}")
+
+    state = {"next_frame": start_frame, "frames_sent": 0, "stalled": False}
+    try:
+        encode_engine.run_ffmpeg(
+            build_follow_command(sequence_spec, settings["fps"], outputs, threads),
+            sequence_spec["base_name"],
+            frame_count,
+            stdin_feeder=make_frame_feeder(sequence_spec, start_frame, end_frame, state, stall_timeout, poll_interval),
+        )
+    except RuntimeError:
+        # ffmpeg fails on an empty pipe; report the stall instead
+        if state["stalled"] and not state["frames_sent"]:
+            raise TimeoutError(f"Frame {start_frame} of {sequence_spec['base_name']} never finished rendering") from None
+        raise
+
+    complete = state["frames_sent"] == frame_count
+    if complete:
+        # Record the finished movie so a later mk_mp4 run doesn't re-encode it
+        sequence_spec = _find_followed_sequence(settings) or sequence_spec
+        stats = encode_engine.frame_stats(sequence_spec)
+        for preset_name, output_file in outputs:
+            cache_key = encode_engine.encode_cache_key(
+                sequence_spec, settings["fps"], start_frame, end_frame, preset_name, stats
+            )
+            encode_engine.record_output(output_file, cache_key)
+    else:
+        print(f"Warning: movie stops at frame {state['next_frame'] - 1}; re-run without --follow once the render finishes.")
+
+    return {
+        "sequence_spec": sequence_spec,
+        "outputs": dict(outputs),
+        "frames": state["frames_sent"],
+        "complete": complete,
+    }
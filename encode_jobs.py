@@ -0,0 +1,255 @@
+# Background encode jobs for Maya.
+# Runs ffmpeg work on worker threads so the session stays responsive, and
+# delivers completion and error callbacks back on Maya's UI thread.
+#
+# import encode_jobs
+# encode_jobs.print_jobs()
+# encode_jobs.cancel_job(3)
+# encode_jobs.show_jobs_window()
+
+import itertools
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import encode_engine
+
+# ffmpeg jobs already use several threads each; keep a couple running and queue the rest
+MAX_CONCURRENT_JOBS = 2
+
+JOBS_WINDOW = "encodeJobsWindow"
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_ids = itertools.count(1)
+_executor = None
+
+
+def run_deferred(func, *args, **kwargs):
+    """
+    Run func on Maya's UI thread, or straight away outside Maya.
+    """
+    try:
+        import maya.utils  # type: ignore
+    except ImportError:
+        func(*args, **kwargs)
+        return
+    maya.utils.executeDeferred(lambda: func(*args, **kwargs))
+
+
+def show_message(message):
+    def _show():
+        print(message)
+        try:
+            import maya.cmds as cmds  # type: ignore
+            cmds.inViewMessage(statusMessage=message, pos="midCenterTop", fade=True, alpha=0.9)
+        except Exception:
+            pass
+
+    run_deferred(_show)
+
+
+def is_interactive_maya():
+    try:
+        import maya.cmds as cmds  # type: ignore
+        return not cmds.about(batch=True)
+    except Exception:
+        return False
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="encode_job")
+    return _executor
+
+
+def _attach_process(job, process):
+    with _jobs_lock:
+        job["processes"].append(process)
+        cancelled = job["cancel_event"].is_set()
+    if cancelled:
+        process.terminate()
+
+
+def _update_progress(job, progress):
+    job["progress"] = encode_engine.format_progress(progress)
+
+
+def _run_job(job, func, args, kwargs):
+    if job["cancel_event"].is_set():
+        return
+
+    job["status"] = "running"
+    job["started"] = time.time()
+    encode_engine.set_job_hooks(
+        process_observer=lambda process: _attach_process(job, process),
+        progress_callback=lambda progress: _update_progress(job, progress),
+    )
+
+    try:
+        result = func(*args, **kwargs)
+    except Exception as exc:
+        job["finished"] = time.time()
+        if job["cancel_event"].is_set():
+            job["status"] = "cancelled"
+            show_message(f"Cancelled {job['name']}")
+            return
+        job["status"] = "failed"
+        job["error"] = exc
+        traceback.print_exc()
+        if job["on_error"]:
+            run_deferred(job["on_error"], exc)
+        else:
+            show_message(f"{job['name']} failed: {exc}")
+        return
+
+    job["finished"] = time.time()
+    if job["cancel_event"].is_set():
+        job["status"] = "cancelled"
+        show_message(f"Cancelled {job['name']}")
+        return
+
+    job["status"] = "done"
+    job["result"] = result
+    if job["on_complete"]:
+        run_deferred(job["on_complete"], result)
+    else:
+        show_message(f"{job['name']} finished.")
+
+
+def submit_job(name, func, *args, on_complete=None, on_error=None, **kwargs):
+    """
+    Queue func(*args, **kwargs) on a background worker. on_complete(result) and
+    on_error(exception) run on Maya's UI thread. Returns the job id.
+
+    func must not call maya.cmds; gather scene data before submitting.
+    """
+    job_id = next(_job_ids)
+    job = {
+        "id": job_id,
+        "name": name,
+        "status": "queued",
+        "progress": "",
+        "error": None,
+        "result": None,
+        "submitted": time.time(),
+        "started": None,
+        "finished": None,
+        "on_complete": on_complete,
+        "on_error": on_error,
+        "cancel_event": threading.Event(),
+        "processes": [],
+        "future": None,
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+
+    job["future"] = _get_executor().submit(_run_job, job, func, args, kwargs)
+    print(f"Queued background job {job_id}: {name}")
+    return job_id
+
+
+def list_jobs():
+    """
+    Return a snapshot of every job as plain dicts, oldest first.
+    """
+    keys = ("id", "name", "status", "progress", "error", "submitted", "started", "finished")
+    with _jobs_lock:
+        return [{key: job[key] for key in keys} for job in sorted(_jobs.values(), key=lambda item: item["id"])]
+
+
+def cancel_job(job_id):
+    """
+    Cancel a queued job or stop a running job's ffmpeg processes.
+    Returns True if the job was still pending or running.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job or job["status"] not in ("queued", "running"):
+            return False
+        job["cancel_event"].set()
+        processes = list(job["processes"])
+
+    if job["future"] and job["future"].cancel():
+        job["status"] = "cancelled"
+        return True
+
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    return True
+
+
+def cancel_all():
+    for job in list_jobs():
+        cancel_job(job["id"])
+
+
+def clear_finished():
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job["status"] not in ("queued", "running")]:
+            del _jobs[job_id]
+
+
+def format_job(job):
+    text = f"[{job['id']}] {job['status']:<9} {job['name']}"
+    if job["status"] == "running" and job["progress"]:
+        text += f"  {job['progress']}"
+    elif job["status"] == "failed":
+        text += f"  {job['error']}"
+    elif job["finished"] and job["started"]:
+        text += f"  ({job['finished'] - job['started']:.0f}s)"
+    return text
+
+
+def print_jobs():
+    jobs = list_jobs()
+    if not jobs:
+        print("No encode jobs.")
+    for job in jobs:
+        print(format_job(job))
+
+
+def show_jobs_window():
+    import maya.cmds as cmds  # type: ignore
+
+    if cmds.window(JOBS_WINDOW, exists=True):
+        cmds.deleteUI(JOBS_WINDOW)
+
+    window = cmds.window(JOBS_WINDOW, title="Encode Jobs", widthHeight=(560, 260))
+    layout = cmds.formLayout()
+    job_list = cmds.textScrollList(allowMultiSelection=True)
+
+    def _refresh(*_):
+        cmds.textScrollList(job_list, edit=True, removeAll=True)
+        for job in list_jobs():
+            cmds.textScrollList(job_list, edit=True, append=format_job(job))
+
+    def _cancel_selected(*_):
+        for label in cmds.textScrollList(job_list, query=True, selectItem=True) or []:
+            cancel_job(int(label[1:label.index("]")]))
+        _refresh()
+
+    def _clear(*_):
+        clear_finished()
+        _refresh()
+
+    buttons = cmds.rowLayout(numberOfColumns=3, parent=layout)
+    cmds.button(label="Refresh", width=120, command=_refresh)
+    cmds.button(label="Cancel Selected", width=120, command=_cancel_selected)
+    cmds.button(label="Clear Finished", width=120, command=_clear)
+
+    cmds.formLayout(
+        layout,
+        edit=True,
+        attachForm=[
+            (job_list, "top", 4), (job_list, "left", 4), (job_list, "right", 4),
+            (buttons, "left", 4), (buttons, "bottom", 4),
+        ],
+        attachControl=[(job_list, "bottom", 4, buttons)],
+    )
+
+    _refresh()
+    cmds.showWindow(window)
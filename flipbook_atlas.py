@@ -0,0 +1,194 @@
+# Flipbook texture atlases for FX cards.
+# Packs an image sequence into one or a few atlas pages, tiling frames left to
+# right, top to bottom, so a card reads a handful of files per render instead
+# of one per frame. The card picks its frame with place2dTexture repeat/offset.
+# Pages live in a .atlas folder beside the sequence with a JSON layout, and are
+# only rebuilt when the frames or settings change.
+
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import encode_engine
+import sequence_index
+
+# Bump to invalidate existing atlases
+ATLAS_VERSION = 1
+ATLAS_DIR_NAME = ".atlas"
+
+# Largest page edge; 8K is the safe limit for Redshift and viewport textures
+ATLAS_MAX_SIZE = 8192
+
+# Edge pixels repeated around each tile so filtering never samples a neighbour
+ATLAS_GUTTER = 2
+
+ATLAS_PNG_COMPRESS_LEVEL = 6
+
+
+def atlas_dir_for(sequence_spec):
+    return os.path.join(sequence_spec["input_dir"], ATLAS_DIR_NAME)
+
+
+def atlas_name_for(sequence_spec):
+    frame_ranges = sequence_spec["frame_ranges"]
+    first_frame = sequence_index.first_frame(frame_ranges)
+    last_frame = sequence_index.last_frame(frame_ranges)
+    return f"{sequence_spec['base_name']}_{first_frame}-{last_frame}_atlas"
+
+
+def layout_path_for(sequence_spec):
+    return os.path.join(atlas_dir_for(sequence_spec), atlas_name_for(sequence_spec) + ".json")
+
+
+def page_path_for(sequence_spec, page):
+    return os.path.join(atlas_dir_for(sequence_spec), f"{atlas_name_for(sequence_spec)}.{page:04d}.png")
+
+
+def plan_layout(frame_count, tile_width, tile_height, gutter=ATLAS_GUTTER, max_size=ATLAS_MAX_SIZE):
+    """
+    Pick a near square grid that fits max_size. Every page shares the grid so
+    the UV math is the same on every page.
+    """
+    cell_width = tile_width + gutter * 2
+    cell_height = tile_height + gutter * 2
+    max_columns = max_size // cell_width
+    max_rows = max_size // cell_height
+    if not max_columns or not max_rows:
+        raise ValueError(f"{tile_width}x{tile_height} frames do not fit a {max_size} atlas; lower the tile scale")
+
+    frames_per_page = min(frame_count, max_columns * max_rows)
+    columns = min(max_columns, math.ceil(math.sqrt(frames_per_page * cell_height / cell_width)))
+    rows = math.ceil(frames_per_page / columns)
+    if rows > max_rows:
+        rows = max_rows
+        columns = math.ceil(frames_per_page / rows)
+
+    return {
+        "columns": columns,
+        "rows": rows,
+        "frames_per_page": columns * rows,
+        "page_count": math.ceil(frame_count / (columns * rows)),
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "gutter": gutter,
+        "atlas_width": columns * cell_width,
+        "atlas_height": rows * cell_height,
+    }
+
+
+def uv_transform(layout):
+    """
+    Return the place2dTexture values that show one tile: (repeat_u, repeat_v)
+    plus the offset of the first tile and the step per column and row.
+    V runs bottom to top while rows run top to bottom, so rows step V down.
+    """
+    atlas_width = layout["atlas_width"]
+    atlas_height = layout["atlas_height"]
+    gutter = layout["gutter"]
+    return {
+        "repeat_u": layout["tile_width"] / atlas_width,
+        "repeat_v": layout["tile_height"] / atlas_height,
+        "origin_u": gutter / atlas_width,
+        "origin_v": 1.0 - (gutter + layout["tile_height"]) / atlas_height,
+        "step_u": (layout["tile_width"] + gutter * 2) / atlas_width,
+        "step_v": (layout["tile_height"] + gutter * 2) / atlas_height,
+    }
+
+
+def tile_position(layout, index):
+    """
+    Return (page, offset_u, offset_v) for the index-th frame of the atlas.
+    Pages are numbered from 1 to match the page files.
+    """
+    page, tile = divmod(index, layout["frames_per_page"])
+    row, column = divmod(tile, layout["columns"])
+    uv = uv_transform(layout)
+    return page + 1, uv["origin_u"] + column * uv["step_u"], uv["origin_v"] - row * uv["step_v"]
+
+
+def _load_tile(path, size):
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        return np.asarray(image)
+
+
+def tile_frames(tiles, layout):
+    """
+    Lay a (count, height, width, 4) stack out as one page. Gutters are edge
+    padded and the grid is built with one reshape instead of a paste per frame.
+    """
+    gutter = layout["gutter"]
+    if gutter:
+        tiles = np.pad(tiles, ((0, 0), (gutter, gutter), (gutter, gutter), (0, 0)), mode="edge")
+    empty = layout["frames_per_page"] - len(tiles)
+    if empty:
+        tiles = np.concatenate([tiles, np.zeros((empty,) + tiles.shape[1:], dtype=tiles.dtype)])
+
+    rows, columns = layout["rows"], layout["columns"]
+    cell_height, cell_width = tiles.shape[1:3]
+    grid = tiles.reshape(rows, columns, cell_height, cell_width, 4).swapaxes(1, 2)
+    return grid.reshape(rows * cell_height, columns * cell_width, 4)
+
+
+def _load_layout(layout_path):
+    try:
+        with open(layout_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_atlas(sequence_spec, tile_scale=1.0, max_size=ATLAS_MAX_SIZE, gutter=ATLAS_GUTTER, force=False):
+    """
+    Pack every frame of sequence_spec into atlas pages. Returns the layout
+    dict with "pages" (paths, in order) and "frame_count". Frames in gaps are
+    skipped, so tile n is the n-th frame on disk.
+    """
+    frames = list(sequence_index.iter_frames(sequence_spec["frame_ranges"]))
+    if not frames:
+        raise ValueError(f"{sequence_spec['base_name']} has no frames to pack")
+
+    stats = encode_engine.frame_stats(sequence_spec)
+    settings = json.dumps([ATLAS_VERSION, tile_scale, max_size, gutter])
+    key = encode_engine.frames_fingerprint(sequence_spec, [frames[0], frames[-1]], stats) + settings
+    layout_path = layout_path_for(sequence_spec)
+    layout = _load_layout(layout_path)
+    if not force and layout.get("key") == key and all(os.path.exists(path) for path in layout.get("pages", [])):
+        print(f"Atlas for {sequence_spec['base_name']} is up to date: {len(layout['pages'])} page(s)")
+        return layout
+
+    frame_paths = [sequence_index.sequence_frame_path(sequence_spec, frame) for frame in frames]
+    with Image.open(frame_paths[0]) as first_image:
+        width, height = first_image.size
+    tile_size = (max(1, round(width * tile_scale)), max(1, round(height * tile_scale)))
+    fit = (max_size - gutter * 2) / max(tile_size)
+    if fit < 1:
+        tile_size = (max(1, int(tile_size[0] * fit)), max(1, int(tile_size[1] * fit)))
+
+    layout = plan_layout(len(frames), tile_size[0], tile_size[1], gutter, max_size)
+    layout.update({"key": key, "frame_count": len(frames), "frames": frames, "pages": []})
+    os.makedirs(atlas_dir_for(sequence_spec), exist_ok=True)
+    print(
+        f"Packing {len(frames)} frame(s) of {sequence_spec['base_name']} into {layout['page_count']} "
+        f"{layout['atlas_width']}x{layout['atlas_height']} page(s) of {layout['columns']}x{layout['rows']} tiles"
+    )
+
+    per_page = layout["frames_per_page"]
+    # PIL releases the GIL while decoding, so threads overlap the frame reads
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        for page in range(layout["page_count"]):
+            page_paths = frame_paths[page * per_page:(page + 1) * per_page]
+            tiles = np.stack(list(executor.map(_load_tile, page_paths, [tile_size] * len(page_paths))))
+            page_path = page_path_for(sequence_spec, page + 1)
+            Image.fromarray(tile_frames(tiles, layout), "RGBA").save(page_path, compress_level=ATLAS_PNG_COMPRESS_LEVEL)
+            layout["pages"].append(page_path)
+
+    with open(layout_path, "w", encoding="utf-8") as handle:
+        json.dump(layout, handle, indent=2)
+    return layout
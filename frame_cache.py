@@ -0,0 +1,214 @@
+# On-demand frame cache for video-backed textures and image planes.
+# Extracts only the frames a file node needs from a .mov/.mp4 into a shared
+# local cache, one folder per clip and extraction settings, and evicts the
+# least recently used frames once the cache grows past its disk budget.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import encode_engine
+import sequence_index
+import video_extract
+
+FRAME_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "jw_frame_cache")
+
+# Least recently used frames are removed past this size
+FRAME_CACHE_BUDGET_BYTES = 20 * 1024 ** 3
+
+# Extraction is on the critical path, so favour speed over size
+FRAME_CACHE_PNG_PRESET = "fast"
+
+FRAME_PADDING = 4
+VIDEO_INFO_NAME = "video.json"
+
+VIDEO_EXTENSIONS = (".mov", ".mp4", ".m4v", ".avi", ".mkv", ".webm")
+
+
+def is_video_file(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def cache_dir_for(video_file, scale=None, preset=FRAME_CACHE_PNG_PRESET):
+    """
+    Return the cache folder for one clip and extraction settings. The clip's
+    size and mtime are part of the key so a replaced movie gets fresh frames.
+    """
+    video_file = os.path.abspath(video_file)
+    video_stat = os.stat(video_file)
+    key = json.dumps([os.path.normcase(video_file), video_stat.st_size, video_stat.st_mtime_ns, scale, preset])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    base_name = os.path.splitext(os.path.basename(video_file))[0]
+    return os.path.join(FRAME_CACHE_DIR, f"{base_name}_{digest}")
+
+
+def frame_sequence_for(video_file, scale=None, preset=FRAME_CACHE_PNG_PRESET):
+    """
+    Return the sequence spec the cached frames of video_file are written as.
+    Frame numbers are 1-based, matching videoToPNGSequence.
+    """
+    base_name = os.path.splitext(os.path.basename(video_file))[0]
+    return {
+        "input_dir": cache_dir_for(video_file, scale, preset),
+        "prefix": f"{base_name}.",
+        "base_name": base_name,
+        "padding": FRAME_PADDING,
+        "extension": ".png",
+        "frame_ranges": [],
+    }
+
+
+def get_video_info(video_file, cache_dir):
+    """
+    Return {"duration", "fps", "frame_count"}, probing the clip only once.
+    """
+    info_path = os.path.join(cache_dir, VIDEO_INFO_NAME)
+    try:
+        with open(info_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        pass
+
+    duration, fps = video_extract.probe_video(video_file)
+    info = {"duration": duration, "fps": fps, "frame_count": max(1, round(duration * fps))}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(info_path, "w", encoding="utf-8") as handle:
+        json.dump(info, handle)
+    return info
+
+
+def video_frame_count(video_file, scale=None, preset=FRAME_CACHE_PNG_PRESET):
+    return get_video_info(video_file, cache_dir_for(video_file, scale, preset))["frame_count"]
+
+
+def _cached_frames(sequence_spec):
+    sequences = sequence_index.scan_sequences(
+        sequence_spec["input_dir"],
+        extensions=[sequence_spec["extension"]],
+        padding=sequence_spec["padding"],
+        recursive=False,
+        use_cache=False,
+    )
+    for sequence in sequences:
+        if sequence["prefix"] == sequence_spec["prefix"]:
+            return sequence["frame_ranges"]
+    return []
+
+
+def _extract_range(video_file, sequence_spec, fps, frame_range, scale, preset):
+    """
+    Extract one [start, end] range into a scratch folder, then move the frames
+    into the cache so a cancelled run never leaves half-written frames behind.
+    """
+    cache_dir = sequence_spec["input_dir"]
+    scratch_dir = tempfile.mkdtemp(prefix=".extract_", dir=cache_dir)
+    try:
+        output_pattern = os.path.join(scratch_dir, os.path.basename(sequence_index.sequence_pattern(sequence_spec)))
+        start_frame, end_frame = frame_range
+        # build_extract_command counts frames from 0; cache frames start at 1
+        command = video_extract.build_extract_command(
+            video_file, output_pattern.replace("\\", "/"), fps, [start_frame - 1, end_frame - 1], 1, preset, scale, False
+        )
+        encode_engine.run_ffmpeg(command, f"{sequence_spec['base_name']} {start_frame}-{end_frame}", end_frame - start_frame + 1)
+        with os.scandir(scratch_dir) as entries:
+            for entry in entries:
+                os.replace(entry.path, os.path.join(cache_dir, entry.name))
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def _touch(paths):
+    # mtime doubles as the last-used stamp for eviction
+    for path in paths:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+def extract_frames(video_file, start_frame, end_frame, scale=None, preset=FRAME_CACHE_PNG_PRESET,
+                   budget_bytes=FRAME_CACHE_BUDGET_BYTES):
+    """
+    Make sure frames start..end of video_file are in the cache, extracting only
+    the missing runs. Returns the sequence spec with frame_ranges filled in.
+    """
+    sequence_spec = frame_sequence_for(video_file, scale, preset)
+    info = get_video_info(video_file, sequence_spec["input_dir"])
+    start_frame = max(1, int(start_frame))
+    end_frame = min(info["frame_count"], int(end_frame))
+    if start_frame > end_frame:
+        raise ValueError(f"Frames {start_frame}-{end_frame} are outside {video_file} (1-{info['frame_count']})")
+
+    cached_ranges = _cached_frames(sequence_spec)
+    missing = sequence_index.missing_ranges(cached_ranges, start_frame, end_frame)
+    for frame_range in missing:
+        _extract_range(video_file, sequence_spec, info["fps"], frame_range, scale, preset)
+
+    requested = [sequence_index.sequence_frame_path(sequence_spec, frame) for frame in range(start_frame, end_frame + 1)]
+    _touch(requested)
+    if missing:
+        evict(budget_bytes, keep=requested)
+
+    sequence_spec["frame_ranges"] = _cached_frames(sequence_spec)
+    return sequence_spec
+
+
+def get_frame(video_file, frame, scale=None, preset=FRAME_CACHE_PNG_PRESET):
+    """
+    Return the cached PNG for one frame, extracting it if needed.
+    """
+    sequence_spec = extract_frames(video_file, frame, frame, scale, preset)
+    return sequence_index.sequence_frame_path(sequence_spec, max(1, int(frame)))
+
+
+def cache_usage():
+    """
+    Return [(last_used, size, path)] for every cached frame, oldest first.
+    """
+    files = []
+    if not os.path.isdir(FRAME_CACHE_DIR):
+        return files
+
+    with os.scandir(FRAME_CACHE_DIR) as clip_dirs:
+        for clip_dir in clip_dirs:
+            if not clip_dir.is_dir():
+                continue
+            with os.scandir(clip_dir.path) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name != VIDEO_INFO_NAME:
+                        entry_stat = entry.stat()
+                        files.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+    files.sort()
+    return files
+
+
+def evict(budget_bytes=FRAME_CACHE_BUDGET_BYTES, keep=()):
+    """
+    Delete least recently used frames until the cache fits budget_bytes.
+    Paths in keep are never deleted. Returns the bytes freed.
+    """
+    files = cache_usage()
+    total_bytes = sum(size for _, size, _ in files)
+    keep = {os.path.normcase(path) for path in keep}
+
+    freed = 0
+    for _, size, path in files:
+        if total_bytes - freed <= budget_bytes:
+            break
+        if os.path.normcase(path) in keep:
+            continue
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+
+    if freed:
+        print(f"Frame cache: evicted {freed / 1e6:.1f} MB to stay under {budget_bytes / 1e6:.0f} MB")
+    return freed
+
+
+def clear_cache():
+    shutil.rmtree(FRAME_CACHE_DIR, ignore_errors=True)
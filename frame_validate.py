@@ -0,0 +1,351 @@
+# Check rendered frames before encoding or delivery.
+# Every frame of a sequence is checked on a thread pool: its header parses,
+# its size matches the rest of the sequence, and its data runs to the end of
+# the file (PNG is fully inflated, EXR/TIFF chunk tables must fit the file,
+# JPEG must reach its end marker). Bad and missing frames are reported as
+# compact ranges ready to re-render.
+#
+# python frame_validate.py "R:/renders/shot010" --extensions exr
+
+import argparse
+import os
+import struct
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import sequence_index
+
+# Frame checks are mostly waiting on disk, so run more threads than cores
+WORKERS_PER_CPU = 4
+MAX_WORKERS = 32
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+EXR_TILED_FLAG = 0x200
+EXR_NON_IMAGE_FLAG = 0x800
+EXR_MULTIPART_FLAG = 0x1000
+# Scanlines per chunk for each compression
+EXR_LINES_PER_CHUNK = {0: 1, 1: 1, 2: 1, 3: 16, 4: 32, 5: 16, 6: 32, 7: 32, 8: 32, 9: 256}
+
+TIFF_TYPE_FORMATS = {3: "H", 4: "I"}
+TIFF_WIDTH, TIFF_HEIGHT = 256, 257
+TIFF_DATA_TAGS = ((273, 279), (324, 325))
+
+
+def _read_exactly(handle, size, what):
+    data = handle.read(size)
+    if len(data) != size:
+        raise ValueError(f"truncated in {what}")
+    return data
+
+
+def check_png(path):
+    """
+    Walk every chunk, checking CRCs, and inflate the image data to the end.
+    Returns (width, height).
+    """
+    with open(path, "rb") as handle:
+        if handle.read(8) != PNG_SIGNATURE:
+            raise ValueError("not a PNG")
+
+        width = height = None
+        expected_bytes = None
+        inflater = zlib.decompressobj()
+        inflated = 0
+        while True:
+            length, chunk_type = struct.unpack(">I4s", _read_exactly(handle, 8, "chunk header"))
+            data = _read_exactly(handle, length, chunk_type.decode("latin-1") + " chunk")
+            crc = struct.unpack(">I", _read_exactly(handle, 4, "chunk CRC"))[0]
+            if zlib.crc32(data, zlib.crc32(chunk_type)) != crc:
+                raise ValueError(f"bad CRC in {chunk_type.decode('latin-1')} chunk")
+
+            if chunk_type == b"IHDR":
+                width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", data)
+                if color_type not in PNG_CHANNELS:
+                    raise ValueError(f"unknown color type {color_type}")
+                if not interlace:
+                    row_bytes = (width * PNG_CHANNELS[color_type] * bit_depth + 7) // 8
+                    expected_bytes = height * (row_bytes + 1)
+            elif chunk_type == b"IDAT":
+                try:
+                    inflated += len(inflater.decompress(data))
+                except zlib.error as exc:
+                    raise ValueError(f"corrupt image data: {exc}") from exc
+            elif chunk_type == b"IEND":
+                break
+
+        if width is None:
+            raise ValueError("missing IHDR")
+        if not inflater.eof:
+            raise ValueError("image data ends early")
+        if expected_bytes is not None and inflated != expected_bytes:
+            raise ValueError(f"image data is {inflated} bytes, expected {expected_bytes}")
+    return width, height
+
+
+def _read_exr_string(handle, keep=True):
+    # Header strings are NUL terminated; keep=False just reads past one
+    text = b""
+    while True:
+        byte = _read_exactly(handle, 1, "header")
+        if byte == b"\0":
+            return text
+        if keep:
+            text += byte
+
+
+def _exr_attributes(handle):
+    attributes = {}
+    while True:
+        name = _read_exr_string(handle)
+        if not name:
+            return attributes
+        # The type name isn't needed; each attribute is read by its known name
+        _read_exr_string(handle, keep=False)
+        size = struct.unpack("<i", _read_exactly(handle, 4, "header"))[0]
+        attributes[name.decode("latin-1")] = _read_exactly(handle, size, "header")
+
+
+def check_exr(path):
+    """
+    Parse the header and check that every chunk in the offset table lies
+    inside the file, so truncated renders are caught without decoding pixels.
+    Returns (width, height).
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        if handle.read(4) != EXR_MAGIC:
+            raise ValueError("not an EXR")
+        flags = struct.unpack("<I", _read_exactly(handle, 4, "version"))[0]
+        attributes = _exr_attributes(handle)
+
+        if "dataWindow" not in attributes or "compression" not in attributes:
+            raise ValueError("header has no dataWindow or compression")
+        x_min, y_min, x_max, y_max = struct.unpack("<iiii", attributes["dataWindow"])
+        width, height = x_max - x_min + 1, y_max - y_min + 1
+        if flags & (EXR_MULTIPART_FLAG | EXR_NON_IMAGE_FLAG):
+            # Multi-part and deep files: the header is all that is checked
+            return width, height
+
+        if flags & EXR_TILED_FLAG:
+            tile_width, tile_height, level_mode = struct.unpack("<IIB", attributes["tiles"])
+            if level_mode & 0x0F:
+                return width, height
+            chunk_count = -(-width // tile_width) * -(-height // tile_height)
+            chunk_header_size = 20
+        else:
+            compression = attributes["compression"][0]
+            if compression not in EXR_LINES_PER_CHUNK:
+                raise ValueError(f"unknown compression {compression}")
+            chunk_count = -(-height // EXR_LINES_PER_CHUNK[compression])
+            chunk_header_size = 8
+
+        table_end = handle.tell() + chunk_count * 8
+        offsets = struct.unpack(f"<{chunk_count}Q", _read_exactly(handle, chunk_count * 8, "offset table"))
+        for offset in offsets:
+            if offset < table_end or offset + chunk_header_size > file_size:
+                raise ValueError("truncated: chunk offset past end of file")
+            handle.seek(offset + chunk_header_size - 4)
+            data_size = struct.unpack("<i", _read_exactly(handle, 4, "chunk header"))[0]
+            if data_size < 0 or offset + chunk_header_size + data_size > file_size:
+                raise ValueError("truncated: chunk data past end of file")
+    return width, height
+
+
+def check_jpeg(path):
+    """
+    Find the frame size in the SOF segment and require the end marker.
+    Returns (width, height).
+    """
+    with open(path, "rb") as handle:
+        if handle.read(2) != b"\xff\xd8":
+            raise ValueError("not a JPEG")
+        size = None
+        while size is None:
+            marker, length = struct.unpack(">2sH", _read_exactly(handle, 4, "segment header"))
+            if marker[0] != 0xFF:
+                raise ValueError("corrupt segment marker")
+            segment = _read_exactly(handle, length - 2, "segment")
+            # SOF0-SOF15, skipping DHT, JPG and DAC which share the range
+            if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", segment[1:5])
+                size = (width, height)
+        handle.seek(0, os.SEEK_END)
+        handle.seek(max(0, handle.tell() - 64))
+        if b"\xff\xd9" not in handle.read():
+            raise ValueError("truncated: no end of image marker")
+    return size
+
+
+def check_tiff(path):
+    """
+    Read the first IFD and check every strip or tile lies inside the file.
+    Returns (width, height).
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        byte_order = {b"II": "<", b"MM": ">"}.get(handle.read(2))
+        if not byte_order:
+            raise ValueError("not a TIFF")
+        magic, ifd_offset = struct.unpack(byte_order + "HI", _read_exactly(handle, 6, "header"))
+        if magic != 42:
+            raise ValueError("not a classic TIFF")
+        handle.seek(ifd_offset)
+        entry_count = struct.unpack(byte_order + "H", _read_exactly(handle, 2, "IFD"))[0]
+        entries = {}
+        for _ in range(entry_count):
+            tag, value_type, count, value = struct.unpack(byte_order + "HHI4s", _read_exactly(handle, 12, "IFD entry"))
+            entries[tag] = (value_type, count, value)
+
+        def values(tag):
+            value_type, count, value = entries[tag]
+            value_format = TIFF_TYPE_FORMATS.get(value_type)
+            if not value_format:
+                raise ValueError(f"unexpected type for tag {tag}")
+            data_size = struct.calcsize(value_format) * count
+            if data_size > 4:
+                handle.seek(struct.unpack(byte_order + "I", value)[0])
+                value = _read_exactly(handle, data_size, f"tag {tag}")
+            return struct.unpack(f"{byte_order}{count}{value_format}", value[:data_size])
+
+        if TIFF_WIDTH not in entries or TIFF_HEIGHT not in entries:
+            raise ValueError("no image size")
+        size = (values(TIFF_WIDTH)[0], values(TIFF_HEIGHT)[0])
+        for offsets_tag, counts_tag in TIFF_DATA_TAGS:
+            if offsets_tag in entries and counts_tag in entries:
+                for offset, count in zip(values(offsets_tag), values(counts_tag)):
+                    if offset + count > file_size:
+                        raise ValueError("truncated: image data past end of file")
+                return size
+        raise ValueError("no strip or tile table")
+
+
+def check_with_pil(path):
+    # Formats without a dedicated check are fully decoded when Pillow is around
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(path) as image:
+            image.load()
+            return image.size
+    except Exception as exc:
+        raise ValueError(str(exc)) from exc
+
+
+FRAME_CHECKS = {
+    ".png": check_png,
+    ".exr": check_exr,
+    ".jpg": check_jpeg,
+    ".jpeg": check_jpeg,
+    ".tif": check_tiff,
+    ".tiff": check_tiff,
+}
+
+
+def check_frame(path):
+    """
+    Return (size, problem): size is (width, height) or None when unknown, and
+    problem is None for a good frame.
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            return None, "empty file"
+        check = FRAME_CHECKS.get(os.path.splitext(path)[1].lower(), check_with_pil)
+        return check(path), None
+    except ValueError as exc:
+        return None, str(exc)
+    except (OSError, struct.error, KeyError) as exc:
+        return None, f"unreadable: {exc}"
+
+
+def validate_sequence(sequence_spec, start_frame=None, end_frame=None, max_workers=None):
+    """
+    Check every frame of the sequence between start_frame and end_frame (its
+    own range by default). Returns a report with "bad" {frame: problem},
+    "bad_ranges" and "missing_ranges".
+    """
+    frame_ranges = sequence_spec["frame_ranges"]
+    if start_frame is None:
+        start_frame = sequence_index.first_frame(frame_ranges)
+    if end_frame is None:
+        end_frame = sequence_index.last_frame(frame_ranges)
+    frames = [frame for frame in sequence_index.iter_frames(frame_ranges) if start_frame <= frame <= end_frame]
+
+    began = time.perf_counter()
+    max_workers = max_workers or min(MAX_WORKERS, (os.cpu_count() or 1) * WORKERS_PER_CPU)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            check_frame, [sequence_index.sequence_frame_path(sequence_spec, frame) for frame in frames]
+        ))
+
+    bad = {frame: problem for frame, (_, problem) in zip(frames, results) if problem}
+    sizes = Counter(size for size, problem in results if size and not problem)
+    if sizes:
+        expected_size = sizes.most_common(1)[0][0]
+        for frame, (size, problem) in zip(frames, results):
+            if size and not problem and size != expected_size:
+                bad[frame] = f"size {size[0]}x{size[1]}, expected {expected_size[0]}x{expected_size[1]}"
+
+    return {
+        "base_name": sequence_spec["base_name"],
+        "checked": len(frames),
+        "seconds": time.perf_counter() - began,
+        "bad": bad,
+        "bad_ranges": sequence_index.frames_to_ranges(list(bad)),
+        "missing_ranges": sequence_index.missing_ranges(frame_ranges, start_frame, end_frame),
+    }
+
+
+def print_report(report, max_problems=20):
+    summary = f"{report['base_name']}: {report['checked']} frame(s) checked in {report['seconds']:.1f}s"
+    if not report["bad"] and not report["missing_ranges"]:
+        print(summary + ", all good")
+        return
+
+    print(summary)
+    if report["missing_ranges"]:
+        print(f"  Missing: {sequence_index.format_ranges(report['missing_ranges'])}")
+    if report["bad"]:
+        print(f"  Bad ({len(report['bad'])}): {sequence_index.format_ranges(report['bad_ranges'])}")
+        for frame in sorted(report["bad"])[:max_problems]:
+            print(f"    {frame}: {report['bad'][frame]}")
+        if len(report["bad"]) > max_problems:
+            print(f"    ... {len(report['bad']) - max_problems} more")
+    rerender = sequence_index.normalize_ranges(report["missing_ranges"] + report["bad_ranges"])
+    print(f"  Re-render: {sequence_index.format_ranges(rerender)}")
+
+
+def validate_sequences(sequence_specs, start_frame=None, end_frame=None, max_workers=None):
+    reports = []
+    for sequence_spec in sequence_specs:
+        report = validate_sequence(sequence_spec, start_frame, end_frame, max_workers)
+        print_report(report)
+        reports.append(report)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check image sequence frames for truncation and corruption.")
+    parser.add_argument("folders", nargs="+", help="Folders holding image sequences.")
+    parser.add_argument("--extensions", default="", help="Comma separated extensions to check (default: all).")
+    parser.add_argument("--recursive", action="store_true", help="Also check sequences in subfolders.")
+    parser.add_argument("--workers", type=int, default=0, help="Check threads (0 = size to the machine).")
+    args = parser.parse_args()
+
+    extensions = [value.strip() for value in args.extensions.split(",") if value.strip()] or None
+    failed = False
+    for folder in args.folders:
+        sequence_specs = sequence_index.scan_sequences(folder, extensions=extensions, recursive=args.recursive)
+        for report in validate_sequences(sequence_specs, max_workers=args.workers or None):
+            failed = failed or bool(report["bad"] or report["missing_ranges"])
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Frame drivers for FX cards.
+# A card's looping frame (and atlas tile offsets) come from cycling stepped
+# animCurves instead of an alwaysEvaluate expression per card. Curves are
+# plain DG nodes, so they evaluate in parallel and cache, and cards with the
+# same loop share one curve per attribute.
+
+import hashlib
+import json
+
+import maya.cmds as cmds  # type: ignore
+
+import sequence_index
+
+DRIVER_PREFIX = "fxLoop"
+
+
+def _driver_name(kind, settings):
+    digest = hashlib.sha1(json.dumps(settings).encode("utf-8")).hexdigest()[:8]
+    return "{}_{}_{}".format(DRIVER_PREFIX, kind, digest)
+
+
+def cycle_curve(name, scene_start, values):
+    """
+    Return an animCurveTU that holds values[i] at frame scene_start + i and
+    cycles forever both ways. Reuses the curve when it already exists.
+    """
+    if cmds.objExists(name) and cmds.nodeType(name) == "animCurveTU":
+        return name
+
+    curve = cmds.createNode("animCurveTU", name=name, skipSelect=True)
+    # The closing key at scene_start + len(values) makes the cycle period one loop
+    for index, value in enumerate(list(values) + [values[0]]):
+        cmds.setKeyframe(curve, time=scene_start + index, value=value)
+    cmds.keyTangent(curve, outTangentType="step")
+    cmds.setInfinity(curve, preInfinite="cycle", postInfinite="cycle")
+    return curve
+
+
+def _connect_driver(curve, destination_attr):
+    cmds.connectAttr(curve + ".output", destination_attr, force=True)
+
+
+def create_loop_driver(file_node, frames, scene_start):
+    """
+    Drive file_node.frameExtension through the given frame numbers, one per
+    scene frame from scene_start, looping. Frames missing from the list (gaps
+    on disk) are skipped instead of showing blank.
+    """
+    frames = list(frames)
+    name = _driver_name("frame", [scene_start, sequence_index.format_ranges(sequence_index.frames_to_ranges(frames))])
+    curve = cycle_curve(name, scene_start, frames)
+    _connect_driver(curve, file_node + ".frameExtension")
+    return curve
+
+
+def create_atlas_driver(file_node, place2d_node, atlas_layout, scene_start):
+    """
+    Drive place2dTexture offsets (and the page frameExtension for multi-page
+    atlases) so the card steps one atlas tile per frame and loops.
+    """
+    uv = atlas_layout["uv"]
+    offsets_u, offsets_v, pages = [], [], []
+    for index in range(atlas_layout["frame_count"]):
+        page, tile = divmod(index, atlas_layout["frames_per_page"])
+        row, column = divmod(tile, atlas_layout["columns"])
+        offsets_u.append(uv["origin_u"] + column * uv["step_u"])
+        offsets_v.append(uv["origin_v"] - row * uv["step_v"])
+        pages.append(page + 1)
+
+    settings = [scene_start, atlas_layout["key"], atlas_layout["columns"], atlas_layout["rows"]]
+    curves = [
+        (cycle_curve(_driver_name("offsetU", settings), scene_start, offsets_u), place2d_node + ".offsetU"),
+        (cycle_curve(_driver_name("offsetV", settings), scene_start, offsets_v), place2d_node + ".offsetV"),
+    ]
+    if len(atlas_layout["pages"]) > 1:
+        curves.append((cycle_curve(_driver_name("page", settings), scene_start, pages), file_node + ".frameExtension"))
+
+    for curve, destination_attr in curves:
+        _connect_driver(curve, destination_attr)
+    return [curve for curve, _ in curves]
+
+
+def create_loop_expression(file_node, start_frame, sequence_length, scene_start, name):
+    """
+    The per-card alwaysEvaluate expression cards used before drivers. Kept for
+    benchmarks/bench_fx_card_loops.py to compare against.
+    """
+    expression = "{file_node}.frameExtension = ((frame - {scene_start}) % {length}) + {start};".format(
+        file_node=file_node,
+        scene_start=scene_start,
+        start=start_frame,
+        length=sequence_length,
+    )
+    return cmds.expression(
+        name=name,
+        string=expression,
+        object=file_node,
+        alwaysEvaluate=True,
+        unitConversion="all",
+    )
@@ -0,0 +1,246 @@
+# Byte-budget GIF encoding.
+# Builds the palette from a handful of sampled frames instead of every frame,
+# caches it locally per sequence so trials and later re-runs reuse it, and searches scale, frame rate and
+# dithering with short trial encodes so the final GIF lands under a hard size cap.
+
+import hashlib
+import json
+import os
+import tempfile
+
+import encode_engine
+import sequence_index
+
+# Sampled palettes, keyed by the sequence, sample frames and scale they came from
+PALETTE_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "jw_gif_palettes")
+
+# Bump to invalidate recorded budget encodes
+GIF_BUDGET_VERSION = 1
+
+PALETTE_SAMPLE_FRAMES = 16
+PALETTE_MAX_COLORS = 256
+
+# Trial encodes cover a few short windows spread across the range
+TRIAL_WINDOWS = 3
+TRIAL_WINDOW_FRAMES = 12
+
+# Estimates from trials are scaled up by this much before comparing to the budget
+ESTIMATE_MARGIN = 1.05
+
+# Give up stepping down after this many final encodes over budget
+MAX_FINAL_ATTEMPTS = 3
+
+# Search space, best quality first. Scales are relative to the render.
+GIF_SCALES = (0.5, 0.4, 0.33, 0.25, 0.2, 0.15)
+GIF_FRAME_RATES = (None, 15, 12, 10, 8)
+GIF_DITHERS = ("sierra2_4a", "bayer:bayer_scale=3", "none")
+
+BYTES_PER_MB = 1000 * 1000
+
+
+def _frames_in_range(sequence_spec, start_frame, end_frame):
+    return [
+        frame for frame in sequence_index.iter_frames(sequence_spec["frame_ranges"])
+        if start_frame <= frame <= end_frame
+    ]
+
+
+def sample_evenly(frames, count):
+    if len(frames) <= count:
+        return list(frames)
+    step = (len(frames) - 1) / (count - 1)
+    return sorted({frames[round(index * step)] for index in range(count)})
+
+
+def trial_frames(frames, windows=TRIAL_WINDOWS, window_frames=TRIAL_WINDOW_FRAMES):
+    """
+    Pick a few contiguous windows spread across the clip. Short clips are
+    trialled whole.
+    """
+    if len(frames) <= windows * window_frames:
+        return list(frames)
+    starts = sample_evenly(list(range(len(frames) - window_frames + 1)), windows)
+    picked = []
+    for start in starts:
+        picked.extend(frames[start:start + window_frames])
+    return picked
+
+
+def write_concat_list(sequence_spec, frames, fps, list_path):
+    """
+    Write an ffconcat list that plays the given frames at fps.
+    """
+    lines = ["ffconcat version 1.0"]
+    for frame in frames:
+        frame_path = sequence_index.sequence_frame_path(sequence_spec, frame).replace("\\", "/")
+        lines.append("file '{}'".format(frame_path.replace("'", "'\\''")))
+        lines.append(f"duration {1.0 / fps:.6f}")
+    with open(list_path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+
+
+def _scale_filter(scale):
+    # GIF dimensions must stay even for some players; lanczos keeps edges crisp
+    return f"scale=trunc(iw*{scale}/2)*2:trunc(ih*{scale}/2)*2:flags=lanczos"
+
+
+def get_sampled_palette(sequence_spec, frames, fps, scale, stats):
+    """
+    Return a cached palette PNG generated from PALETTE_SAMPLE_FRAMES evenly
+    spaced frames, reusing one already made for the same scale and frames.
+    """
+    sample = sample_evenly(frames, PALETTE_SAMPLE_FRAMES)
+    input_key = os.path.normcase(os.path.abspath(sequence_spec["input_dir"]))
+    digest = hashlib.sha1(json.dumps([GIF_BUDGET_VERSION, input_key, scale, PALETTE_MAX_COLORS, sample]).encode("utf-8"))
+    for frame in sample:
+        filename = os.path.basename(sequence_index.sequence_frame_path(sequence_spec, frame))
+        digest.update(f"{filename}|{stats.get(filename)}\n".encode("utf-8"))
+
+    palette_path = os.path.join(PALETTE_CACHE_DIR, f"{digest.hexdigest()[:16]}.png")
+    if os.path.exists(palette_path):
+        return palette_path
+
+    os.makedirs(PALETTE_CACHE_DIR, exist_ok=True)
+    # Per-process scratch names so two encodes of one sequence don't collide
+    list_path = palette_path[:-4] + f".{os.getpid()}.txt"
+    write_concat_list(sequence_spec, sample, fps, list_path)
+    temp_path = palette_path[:-4] + f".{os.getpid()}.tmp.png"
+    command = [
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-vf", f"{_scale_filter(scale)},palettegen=max_colors={PALETTE_MAX_COLORS}:stats_mode=full",
+        "-frames:v", "1", "-update", "1",
+        temp_path,
+    ]
+    try:
+        encode_engine.run_ffmpeg(command, f"{sequence_spec['base_name']} palette")
+        os.replace(temp_path, palette_path)
+    finally:
+        os.remove(list_path)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return palette_path
+
+
+def build_gif_command(input_args, palette_path, scale, gif_fps, dither, output_file):
+    filters = []
+    if gif_fps:
+        filters.append(f"fps={gif_fps}")
+    filters.append(_scale_filter(scale))
+    return ["ffmpeg", "-y"] + input_args + [
+        "-i", palette_path,
+        "-filter_complex", f"[0:v]{','.join(filters)}[x];[x][1:v]paletteuse=dither={dither}",
+        "-loop", "0",
+        output_file,
+    ]
+
+
+def candidate_settings(fps):
+    """
+    Every (scale, gif_fps, dither) combination, best looking first. Ordered by
+    the pixels per second they write so sizes fall roughly monotonically.
+    """
+    candidates = []
+    for scale in GIF_SCALES:
+        for gif_fps in GIF_FRAME_RATES:
+            if gif_fps and gif_fps >= fps:
+                continue
+            for dither_index, dither in enumerate(GIF_DITHERS):
+                weight = scale * scale * (gif_fps or fps)
+                candidates.append((-weight, dither_index, scale, gif_fps, dither))
+    candidates.sort()
+    return [{"scale": scale, "fps": gif_fps, "dither": dither} for _, _, scale, gif_fps, dither in candidates]
+
+
+def describe_settings(settings):
+    fps_text = f"{settings['fps']} fps" if settings["fps"] else "source fps"
+    return f"scale {settings['scale']}, {fps_text}, dither {settings['dither']}"
+
+
+def estimate_size(sequence_spec, frames, trial, fps, settings, stats, temp_dir):
+    """
+    Trial-encode the sampled windows and scale the size up to the full clip.
+    """
+    palette_path = get_sampled_palette(sequence_spec, frames, fps, settings["scale"], stats)
+    list_path = os.path.join(temp_dir, "trial.txt")
+    write_concat_list(sequence_spec, trial, fps, list_path)
+    trial_file = os.path.join(temp_dir, "trial.gif")
+    command = build_gif_command(
+        ["-f", "concat", "-safe", "0", "-i", list_path],
+        palette_path, settings["scale"], settings["fps"], settings["dither"], trial_file
+    )
+    encode_engine.run_ffmpeg(command, "GIF trial", progress_callback=lambda progress: None)
+    return os.path.getsize(trial_file) * len(frames) / len(trial) * ESTIMATE_MARGIN
+
+
+def search_settings(sequence_spec, frames, fps, max_bytes, stats, candidates):
+    """
+    Binary search the ranked candidates for the best one whose trial estimate
+    fits max_bytes. Returns (index, estimate) or (None, None).
+    """
+    best = (None, None)
+    low, high = 0, len(candidates) - 1
+    trial = trial_frames(frames)
+    with tempfile.TemporaryDirectory(prefix="gif_budget_") as temp_dir:
+        while low <= high:
+            middle = (low + high) // 2
+            estimate = estimate_size(sequence_spec, frames, trial, fps, candidates[middle], stats, temp_dir)
+            fits = estimate <= max_bytes
+            print(f"Trial {describe_settings(candidates[middle])}: ~{estimate / BYTES_PER_MB:.2f} MB {'fits' if fits else 'over'}")
+            if fits:
+                best = (middle, estimate)
+                high = middle - 1
+            else:
+                low = middle + 1
+    return best
+
+
+def budget_cache_key(sequence_spec, fps, start_frame, end_frame, max_bytes, stats):
+    settings = json.dumps([GIF_BUDGET_VERSION, fps, start_frame, end_frame, max_bytes, GIF_SCALES, GIF_FRAME_RATES, GIF_DITHERS])
+    digest = hashlib.sha1(settings.encode("utf-8"))
+    digest.update(encode_engine.frames_fingerprint(sequence_spec, [start_frame, end_frame], stats).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def encode_gif_to_budget(sequence_spec, fps, start_frame, end_frame, max_mb, force=False):
+    """
+    Encode a GIF no larger than max_mb megabytes, keeping as much resolution,
+    frame rate and dithering as the budget allows. Returns the output file.
+    """
+    start_frame, end_frame = encode_engine.clamp_frame_range(sequence_spec, start_frame, end_frame)
+    frames = _frames_in_range(sequence_spec, start_frame, end_frame)
+    max_bytes = int(max_mb * BYTES_PER_MB)
+    output_file = encode_engine.output_path_for(sequence_spec, "gif")
+
+    stats = encode_engine.frame_stats(sequence_spec)
+    cache_key = budget_cache_key(sequence_spec, fps, start_frame, end_frame, max_bytes, stats)
+    if not force and encode_engine.output_is_current(output_file, cache_key):
+        print(f"Up to date, skipping encode: {output_file}")
+        return output_file
+
+    candidates = candidate_settings(fps)
+    index, _ = search_settings(sequence_spec, frames, fps, max_bytes, stats, candidates)
+    if index is None:
+        raise ValueError(f"Even {describe_settings(candidates[-1])} is estimated over {max_mb} MB")
+
+    with tempfile.TemporaryDirectory(prefix="gif_budget_") as temp_dir:
+        # List the frames explicitly so the range stops at end_frame and gaps don't end the read
+        list_path = os.path.join(temp_dir, "frames.txt")
+        write_concat_list(sequence_spec, frames, fps, list_path)
+        for index in range(index, min(index + MAX_FINAL_ATTEMPTS, len(candidates))):
+            settings = candidates[index]
+            print(f"Encoding {sequence_spec['base_name']} GIF at {describe_settings(settings)}")
+            palette_path = get_sampled_palette(sequence_spec, frames, fps, settings["scale"], stats)
+            command = build_gif_command(
+                ["-f", "concat", "-safe", "0", "-i", list_path],
+                palette_path, settings["scale"], settings["fps"], settings["dither"], output_file
+            )
+            encode_engine.run_ffmpeg(command, sequence_spec["base_name"], len(frames))
+
+            output_size = os.path.getsize(output_file)
+            print(f"GIF is {output_size / BYTES_PER_MB:.2f} MB of {max_mb} MB budget")
+            if output_size <= max_bytes:
+                encode_engine.record_output(output_file, cache_key)
+                return output_file
+
+    raise ValueError(f"Could not fit {sequence_spec['base_name']} under {max_mb} MB; last attempt was {output_size / BYTES_PER_MB:.2f} MB")
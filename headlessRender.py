@@ -1,20 +1,62 @@
 import maya.cmds as cmds
+import os
 import subprocess
+import sys
+
+import encode_engine
+import render_paths
+import render_queue
+import render_resume
+import render_scheduler
+import sequence_index
 
 # Specify by frame
 by_frame = "1"
 
+# Render processes at once, each pinned to its own cores (0 = one per 8 cores)
+render_workers = 0
+
+# Only render frames missing or damaged on disk, e.g. after a crash
+resume_missing = False
+
+# Add the render as a job in this render_queue.py folder instead of starting it now
+render_queue_dir = ""
+
 # Grab the current open Maya scene filepath
 current_file = cmds.file(q=True, sceneName=True)
 
 if current_file:
+    if cmds.file(q=True, modified=True):
+        cmds.warning("The scene has unsaved changes; the render uses the saved file.")
+
     # Get the render frame range from render settings
     start_frame = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
     end_frame = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
-    
-    # Command to render and every nth frame
-    render_cmd = f'start cmd /k Render -s {start_frame} -e {end_frame} -b {by_frame} "{current_file}"'
 
-    # Run the subprocess
-    subprocess.Popen(render_cmd, shell=True)
+    frame_ranges = [[start_frame, end_frame]]
+    if resume_missing:
+        settings = render_paths.find_image_sequence_from_maya_settings()
+        sequence_specs = encode_engine.find_sequence_specs(
+            settings["search_root"], settings["extension"], settings["frame_padding"], settings["dir_patterns"]
+        )
+        frames, bad_paths = render_resume.frames_needing_render(sequence_specs, start_frame, end_frame, int(by_frame))
+        render_resume.remove_bad_frames(bad_paths)
+        frame_ranges = render_resume.collapse_frames(frames, int(by_frame))
+        print(f"Resuming: {len(frames)} frame(s) to render ({len(bad_paths)} damaged or filled)")
+
+    if frame_ranges and render_queue_dir:
+        job_path = render_queue.write_job(render_queue_dir, current_file, frame_ranges, int(by_frame), max_workers=render_workers or None)
+        print(f"Queued {job_path}")
+    elif frame_ranges:
+        # Run the chunked scheduler with mayapy, which sits next to maya.exe
+        mayapy = os.path.join(os.path.dirname(sys.executable), "mayapy")
+        scheduler = os.path.splitext(render_scheduler.__file__)[0] + ".py"
+        render_cmd = (
+            f'start cmd /k ""{mayapy}" "{scheduler}" "{current_file}" '
+            f'--frames {sequence_index.format_ranges(frame_ranges)} --by {by_frame} --workers {render_workers}"'
+        )
 
+        # Run the subprocess
+        subprocess.Popen(render_cmd, shell=True)
+    else:
+        print("Every frame is already rendered and intact.")
@@ -0,0 +1,35 @@
+# Make MP4, GIF and ProRes dailies from the rendered sequences in one decode pass
+# Open File explorer after conversion and select the primary MP4
+
+import argparse
+
+import mk_mp4
+
+DAILIES_PRESETS = ("h264", "gif", "prores")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert rendered image sequences to MP4, GIF and ProRes in one pass based on Maya render settings.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of sequences to encode at once (0 = size to the machine, 1 = one at a time)."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-encode even when the outputs are up to date with their frames and settings."
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Block until the encode finishes instead of running it as a background job."
+    )
+
+    args = parser.parse_args()
+
+    try:
+        mk_mp4.main(DAILIES_PRESETS, args.jobs, force=args.force, background=False if args.wait else None)
+    except Exception as e:
+        print(f"Error: {e}")
@@ -1,180 +1,67 @@
 # Convert an image sequence to a GIF at half the render resolution based on Maya render settings.
 # Open File Explorer after conversion and select the new GIF file.
 
-import os
 import argparse
-import subprocess
-import maya.cmds as cmds
-import glob
 
-def resolve_render_tokens(path_value):
-    """
-    Resolve supported Maya render tokens in a path-like string.
-    """
-    if not path_value:
-        return path_value
-
-    resolved_value = path_value
-
-    if "<scene>" in resolved_value:
-        scene_name = os.path.splitext(os.path.basename(cmds.file(q=True, sceneName=True)))[0]
-        resolved_value = resolved_value.replace("<scene>", scene_name)
-
-    if "<renderLayer>" in resolved_value:
-        render_layer = cmds.editRenderLayerGlobals(query=True, currentRenderLayer=True)
-        resolved_value = resolved_value.replace("<renderLayer>", render_layer)
-
-    return resolved_value
-
-def normalize_prefix(prefix):
-    if not prefix:
-        return prefix
-    prefix = prefix.replace("\\", "/").strip("/")
-    return prefix
-
-
-def detect_sequence_bounds(input_dir, base_name, frame_padding, extension):
-    pattern = os.path.join(input_dir, f"{base_name}.{'?' * frame_padding}{extension}")
-    candidates = glob.glob(pattern)
-    import re
-    frame_regex = re.compile(rf"^{re.escape(base_name)}\.(\d{{{frame_padding}}}){re.escape(extension)}$")
-
-    frame_numbers = []
-    for fn in candidates:
-        name = os.path.basename(fn)
-        match = frame_regex.match(name)
-        if match:
-            frame_numbers.append(int(match.group(1)))
-
-    return sorted(frame_numbers)
-
-def find_image_sequence_from_maya_settings():
-    """
-    Find the image sequence based on Maya's render settings.
-    """
-    # Get render settings from Maya
-    render_dir = os.path.normpath(cmds.workspace(q=True, rd=True) + cmds.workspace(fileRuleEntry="images"))
-    file_prefix = normalize_prefix(resolve_render_tokens(cmds.getAttr("defaultRenderGlobals.imageFilePrefix")))
-
-    frame_padding = int(cmds.getAttr("defaultRenderGlobals.extensionPadding"))
-    image_format = int(cmds.getAttr("defaultRenderGlobals.imageFormat"))
-
-    # Map Maya time units to FPS values
-    fps_mapping = {
-        "film": 24,
-        "pal": 25,
-        "ntsc": 30,
-        "show": 48,
-        "palf": 50,
-        "ntscf": 60
-    }
-    fps = fps_mapping.get(cmds.currentUnit(q=True, time=True), 24)  # Default to 24 FPS if not found
+import encode_engine
+import encode_jobs
+import gif_budget
+import render_paths
 
-    start_frame = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
-    end_frame = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
 
-    if image_format == 8:
-        extension = ".jpg"
-    elif image_format == 32:
-        extension = ".exr"
-    elif image_format == 0:
-        extension = ".iff"
-    else:
-        extension = ".png"  # Default fallback
-
-    prefix_dir = os.path.dirname(file_prefix)
-    base_name = os.path.basename(file_prefix)
-    input_dir = os.path.normpath(os.path.join(render_dir, prefix_dir))
-
-    frame_pattern = f"{base_name}.%0{frame_padding}d{extension}"
-    return input_dir, frame_pattern, extension, fps, start_frame, end_frame, base_name, frame_padding
-
-def convert_to_gif(input_dir, frame_pattern, fps, output_file, start_frame, end_frame, file_prefix, frame_padding, extension):
+def convert_to_gif(sequence_spec, fps, start_frame, end_frame, threads=None, force=False, max_mb=None):
     """
     Convert an image sequence into a GIF at half the original render resolution.
+    With max_mb the scale, frame rate and dithering are lowered as needed to
+    keep the file under that many megabytes.
     """
-    # Ensure the frame sequence exists and find actual range
-    frame_numbers = detect_sequence_bounds(input_dir, file_prefix, frame_padding, extension)
-    if not frame_numbers:
-        raise FileNotFoundError(f"No images found matching {file_prefix}.{frame_pattern} in {input_dir}")
-
-    actual_start = frame_numbers[0]
-    actual_end = frame_numbers[-1]
-
-    if start_frame < actual_start or end_frame > actual_end:
-        print(f"Warning: requested frame range {start_frame}-{end_frame} is outside detected sequence {actual_start}-{actual_end}.")
-        start_frame = max(start_frame, actual_start)
-        end_frame = min(end_frame, actual_end)
-
-    if start_frame > end_frame:
-        raise ValueError(f"Invalid frame range after clamping: {start_frame}-{end_frame}")
-
-    frame_count = end_frame - start_frame + 1
-
-    # Ensure proper quoting of paths with spaces
-    input_path = os.path.join(input_dir, frame_pattern).replace("\\", "/")
-    output_file = os.path.join(input_dir, f"{file_prefix}.gif").replace("\\", "/")
+    if max_mb:
+        return gif_budget.encode_gif_to_budget(sequence_spec, fps, start_frame, end_frame, max_mb, force)
 
-    # Debug: Print paths and start frame
-    print(f"Input path: {input_path}")
-    print(f"Output file: {output_file}")
-    print(f"Requested frame range: {start_frame}-{end_frame} ({frame_count} frames)")
+    outputs = encode_engine.encode_sequence(sequence_spec, fps, start_frame, end_frame, ["gif"], threads, force)
+    return outputs["gif"]
 
-    # Add overwrite flag if the file already exists
-    if os.path.exists(output_file):
-        print(f"Output file {output_file} already exists. It will be overwritten.")
-
-    # Construct the ffmpeg command:
-    # This command scales the input to half resolution and uses a two-filter chain (palettegen & paletteuse)
-    # for improved GIF quality.
-    command = [
-        "ffmpeg",
-        "-y",  # Automatically overwrite existing files
-        "-framerate", str(fps),
-        "-start_number", str(start_frame),
-        "-i", input_path,
-        "-frames:v", str(frame_count),
-        "-vf", "scale=iw/2:ih/2,split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse",
-        output_file
-    ]
-
-    # Ensure ffmpeg is in PATH by appending the custom ffmpeg directory.
-    env = os.environ.copy()
-    env["PATH"] += os.pathsep + "C:/ffmpeg/ffmpeg-master-latest-win64-gpl/bin"  # Update with your ffmpeg path
-
-    print("Running command:", " ".join(command))
-    try:
-        result = subprocess.run(command, shell=True, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg Output:\n", result.stdout)
-        print("FFmpeg Errors:\n", result.stderr)
-        if result.returncode != 0:
-            raise RuntimeError(f"FFmpeg failed with exit code {result.returncode}")
-
-        # Open the directory containing the file in Explorer and select the new GIF file
-        directory = os.path.abspath(os.path.dirname(output_file))
-        if not os.path.exists(directory):
-            print(f"Directory does not exist: {directory}")
-            return
-
-        print(f"Opening directory and selecting file: {output_file}")
-        try:
-            subprocess.run(["explorer", "/select,", os.path.normpath(output_file)], check=True)
-        except Exception as e:
-            print(f"Error while opening directory in Explorer: {e}")
-    except Exception as e:
-        print(f"Error while running FFmpeg: {e}")
-        raise
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convert an image sequence to a GIF at half resolution based on Maya render settings.")
 
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-encode even when the output is up to date with its frames and settings."
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=None,
+        help="Keep the GIF under this many megabytes, e.g. for upload limits. Uses a sampled palette and trial encodes."
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Block until the encode finishes instead of running it as a background job."
+    )
     args = parser.parse_args()
 
     try:
-        input_dir, frame_pattern, extension, fps, start_frame, end_frame, file_prefix, frame_padding = find_image_sequence_from_maya_settings()
-        output_file = os.path.join(input_dir, f"{file_prefix}.gif")
-
-        convert_to_gif(input_dir, frame_pattern, fps, output_file, start_frame, end_frame, file_prefix, frame_padding, extension)
-        print(f"Successfully created {output_file}")
+        settings = render_paths.find_image_sequence_from_maya_settings()
+        sequence_spec = encode_engine.find_primary_sequence(settings)
+        if not sequence_spec:
+            raise FileNotFoundError(f"No images found matching {settings['base_name']} in {settings['input_dir']}")
+
+        encode_args = (sequence_spec, settings["fps"], settings["start_frame"], settings["end_frame"])
+        if not args.wait and encode_jobs.is_interactive_maya():
+            encode_jobs.submit_job(
+                sequence_spec["base_name"],
+                convert_to_gif,
+                *encode_args,
+                force=args.force,
+                max_mb=args.max_mb,
+                on_complete=encode_engine.open_in_explorer
+            )
+        else:
+            output_file = convert_to_gif(*encode_args, force=args.force, max_mb=args.max_mb)
+            print(f"Successfully created {output_file}")
+            encode_engine.open_in_explorer(output_file)
     except Exception as e:
         print(f"Error: {e}")
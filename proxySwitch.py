@@ -0,0 +1,157 @@
+# Switch image sequence file nodes between proxy and full resolution.
+# Builds half/quarter proxies for the selected file nodes (or every sequence
+# file node), points them at the proxy for the viewport, and installs render
+# callbacks that flip them to full resolution while rendering.
+# Prints viewport playback fps before and after.
+
+import time
+
+import maya.cmds as cmds  # type: ignore
+
+import sequence_index
+import sequence_proxy
+
+FULL_RES_ATTR = "jwFullResTexture"
+PROXY_LEVEL_ATTR = "jwProxyLevel"
+DEFAULT_PROXY_LEVEL = "half"
+
+PRE_RENDER_MEL = 'python("import proxySwitch; proxySwitch.set_resolution(\\"full\\")")'
+POST_RENDER_MEL = 'python("import proxySwitch; proxySwitch.set_resolution()")'
+
+# (node, pre render attr, post render attr) for Maya and Redshift renders
+RENDER_CALLBACK_ATTRS = (
+    ("defaultRenderGlobals", "preMel", "postMel"),
+    ("redshiftOptions", "preRenderMel", "postRenderMel"),
+)
+
+
+def _has_attr(node, attr):
+    return cmds.attributeQuery(attr, node=node, exists=True)
+
+
+def managed_file_nodes():
+    return [node for node in cmds.ls(type="file") or [] if _has_attr(node, FULL_RES_ATTR)]
+
+
+def _sequence_file_nodes():
+    selected = cmds.ls(selection=True, type="file") or []
+    if selected:
+        return selected
+    return [
+        node for node in cmds.ls(type="file") or []
+        if _has_attr(node, "useFrameExtension") and cmds.getAttr(node + ".useFrameExtension")
+    ]
+
+
+def full_res_path(file_node):
+    if _has_attr(file_node, FULL_RES_ATTR):
+        return cmds.getAttr(file_node + "." + FULL_RES_ATTR)
+    return sequence_proxy.proxy_path_for(cmds.getAttr(file_node + ".fileTextureName"), "full")
+
+
+def enable_proxy(file_node, level=DEFAULT_PROXY_LEVEL, build=True):
+    """
+    Build (or refresh) the proxy pyramid for the file node's sequence and
+    point the node at the given level. The full resolution path is kept on
+    the node for render time.
+    """
+    full_path = full_res_path(file_node)
+    if build:
+        sequence = sequence_index.find_sequence_for_file(full_path)
+        if not sequence:
+            cmds.warning("{} does not point at a numbered sequence: {}".format(file_node, full_path))
+            return False
+        sequence_proxy.build_proxies(sequence, sequence_proxy.PROXY_LEVELS)
+
+    for attr in (FULL_RES_ATTR, PROXY_LEVEL_ATTR):
+        if not _has_attr(file_node, attr):
+            cmds.addAttr(file_node, longName=attr, dataType="string")
+    cmds.setAttr(file_node + "." + FULL_RES_ATTR, full_path, type="string")
+    cmds.setAttr(file_node + "." + PROXY_LEVEL_ATTR, level, type="string")
+    cmds.setAttr(file_node + ".fileTextureName", sequence_proxy.proxy_path_for(full_path, level).replace("\\", "/"), type="string")
+    return True
+
+
+def set_resolution(level=None, file_nodes=None):
+    """
+    Point managed file nodes at "full" or a proxy level. level None restores
+    each node's own proxy level.
+    """
+    for file_node in file_nodes or managed_file_nodes():
+        full_path = cmds.getAttr(file_node + "." + FULL_RES_ATTR)
+        node_level = level or cmds.getAttr(file_node + "." + PROXY_LEVEL_ATTR) or DEFAULT_PROXY_LEVEL
+        path = sequence_proxy.proxy_path_for(full_path, node_level).replace("\\", "/")
+        if cmds.getAttr(file_node + ".fileTextureName") != path:
+            cmds.setAttr(file_node + ".fileTextureName", path, type="string")
+
+
+def install_render_callbacks():
+    """
+    Append the full resolution switch to the pre/post render MEL of Maya and
+    Redshift so batch and interactive renders never use proxies.
+    """
+    for node, pre_attr, post_attr in RENDER_CALLBACK_ATTRS:
+        if not cmds.objExists(node):
+            continue
+        for attr, command in ((pre_attr, PRE_RENDER_MEL), (post_attr, POST_RENDER_MEL)):
+            if not _has_attr(node, attr):
+                continue
+            current = cmds.getAttr("{}.{}".format(node, attr)) or ""
+            if command in current:
+                continue
+            value = "{};{}".format(current.rstrip(";"), command) if current.strip() else command
+            cmds.setAttr("{}.{}".format(node, attr), value, type="string")
+
+
+def measure_playback_fps(start_frame=None, end_frame=None):
+    """
+    Step the viewport through the playback range, forcing a redraw per frame,
+    and return the frames drawn per second.
+    """
+    if start_frame is None:
+        start_frame = int(cmds.playbackOptions(query=True, minTime=True))
+    if end_frame is None:
+        end_frame = int(cmds.playbackOptions(query=True, maxTime=True))
+
+    original_time = cmds.currentTime(query=True)
+    began = time.perf_counter()
+    for frame in range(start_frame, end_frame + 1):
+        cmds.currentTime(frame, edit=True, update=True)
+        cmds.refresh(currentView=True, force=True)
+    elapsed = time.perf_counter() - began
+    cmds.currentTime(original_time, edit=True)
+    return (end_frame - start_frame + 1) / elapsed if elapsed > 0 else 0.0
+
+
+def compare_playback(level=DEFAULT_PROXY_LEVEL, file_nodes=None):
+    """
+    Measure playback at full resolution and at the proxy level. Returns (full_fps, proxy_fps).
+    """
+    set_resolution("full", file_nodes)
+    full_fps = measure_playback_fps()
+    set_resolution(level, file_nodes)
+    proxy_fps = measure_playback_fps()
+    print("Playback: full res {:.1f} fps, {} proxy {:.1f} fps ({:.1f}x)".format(
+        full_fps, level, proxy_fps, proxy_fps / full_fps if full_fps else 0.0
+    ))
+    return full_fps, proxy_fps
+
+
+def main(level=DEFAULT_PROXY_LEVEL, measure=True):
+    file_nodes = _sequence_file_nodes()
+    if not file_nodes:
+        cmds.warning("Select file nodes, or use file nodes with frame extensions in the scene.")
+        return
+
+    enabled = [file_node for file_node in file_nodes if enable_proxy(file_node, level)]
+    if not enabled:
+        return
+    install_render_callbacks()
+    print("Using {} proxies on {} file node(s); renders switch to full resolution.".format(level, len(enabled)))
+
+    if measure:
+        compare_playback(level, enabled)
+
+
+if __name__ == "__main__":
+    main()
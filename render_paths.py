@@ -0,0 +1,320 @@
+# Shared Maya render path helpers: token resolution, image extensions and a
+# compiled imageFilePrefix pattern used to narrow sequence searches.
+
+import os
+import re
+
+import maya.cmds as cmds  # type: ignore
+
+
+# defaultRenderGlobals.imageFormat codes for Maya's built-in writers
+IMAGE_FORMAT_EXTENSIONS = {
+    0: ".gif",
+    1: ".pic",
+    2: ".rla",
+    3: ".tif",
+    4: ".tif",
+    5: ".rgb",
+    6: ".als",
+    7: ".iff",
+    8: ".jpg",
+    9: ".eps",
+    10: ".iff",
+    11: ".cin",
+    12: ".yuv",
+    13: ".rgb",
+    19: ".tga",
+    20: ".bmp",
+    23: ".avi",
+    31: ".psd",
+    32: ".png",
+    35: ".dds",
+    36: ".psd",
+    40: ".exr",
+}
+
+# redshiftOptions.imageFormat codes
+REDSHIFT_IMAGE_FORMAT_EXTENSIONS = {
+    0: ".iff",
+    1: ".exr",
+    2: ".png",
+    3: ".tga",
+    4: ".jpg",
+    5: ".tif",
+}
+
+# imageFormat value Maya uses when imfPluginKey names the writer
+CUSTOM_IMAGE_FORMAT = 51
+
+DEFAULT_EXTENSION = ".png"
+
+TOKEN_PATTERN = re.compile(r"(<[^<>/]+>)")
+
+# Any token we can't pin to known values matches one path component
+WILDCARD_PATTERN = r"[^/]*"
+
+
+def normalize_prefix(prefix):
+    if not prefix:
+        return ""
+    return prefix.replace("\\", "/").strip("/")
+
+
+def get_image_file_prefix():
+    # An empty prefix makes Maya name images after the scene
+    return normalize_prefix(cmds.getAttr("defaultRenderGlobals.imageFilePrefix")) or "<Scene>"
+
+
+def get_render_dir():
+    return os.path.normpath(os.path.join(cmds.workspace(q=True, rd=True), cmds.workspace(fileRuleEntry="images")))
+
+
+def get_image_extension(image_format=None):
+    """
+    Return the dotted extension the current renderer writes, e.g. ".exr".
+    """
+    try:
+        renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+    except Exception:
+        renderer = ""
+
+    if image_format is None:
+        if renderer == "redshift" and cmds.objExists("redshiftOptions"):
+            redshift_format = int(cmds.getAttr("redshiftOptions.imageFormat"))
+            return REDSHIFT_IMAGE_FORMAT_EXTENSIONS.get(redshift_format, DEFAULT_EXTENSION)
+        image_format = int(cmds.getAttr("defaultRenderGlobals.imageFormat"))
+
+    if image_format == CUSTOM_IMAGE_FORMAT:
+        plugin_key = cmds.getAttr("defaultRenderGlobals.imfPluginKey") or ""
+        if plugin_key:
+            return "." + plugin_key.lstrip(".").lower()
+
+    return IMAGE_FORMAT_EXTENSIONS.get(image_format, DEFAULT_EXTENSION)
+
+
+def _scene_name():
+    return os.path.splitext(os.path.basename(cmds.file(q=True, sceneName=True)))[0]
+
+
+def _current_layer():
+    try:
+        current_layer = cmds.editRenderLayerGlobals(q=True, currentRenderLayer=True)
+    except Exception:
+        current_layer = None
+    return current_layer.split("|")[-1] if current_layer else "defaultRenderLayer"
+
+
+def _layer_name_variants(layer):
+    # Render Setup writes rs_<name> layers as <name> and the default layer as
+    # masterLayer. The raw node name is kept as a fallback for legacy layers.
+    if layer.startswith("rs_"):
+        return [layer[3:], layer]
+    if layer == "defaultRenderLayer":
+        return ["masterLayer", layer]
+    return [layer]
+
+
+def _renderable_layers():
+    layers = []
+    for layer in cmds.ls(type="renderLayer") or []:
+        if ":" in layer:
+            continue
+        try:
+            if not cmds.getAttr(layer + ".renderable"):
+                continue
+        except Exception:
+            continue
+        layers.append(layer)
+    return layers
+
+
+def _renderable_cameras():
+    cameras = []
+    for camera_shape in cmds.ls(type="camera") or []:
+        try:
+            if not cmds.getAttr(camera_shape + ".renderable"):
+                continue
+        except Exception:
+            continue
+        transforms = cmds.listRelatives(camera_shape, parent=True) or []
+        for name in transforms + [camera_shape]:
+            cameras.append(name.split("|")[-1].replace(":", "_"))
+    return cameras
+
+
+def _render_version():
+    try:
+        return cmds.getAttr("defaultRenderGlobals.renderVersion") or ""
+    except Exception:
+        return ""
+
+
+def get_token_values():
+    """
+    Return {token: values} for the tokens we can resolve from the scene, keyed
+    by lowercase token. The first value is the one used when resolving a path.
+    """
+    current_layer = _current_layer()
+    layer_values = _layer_name_variants(current_layer)
+    for layer in _renderable_layers():
+        for variant in _layer_name_variants(layer):
+            if variant not in layer_values:
+                layer_values.append(variant)
+
+    token_values = {
+        "<scene>": [_scene_name()],
+        "<renderlayer>": layer_values,
+        "<layer>": layer_values,
+    }
+
+    cameras = _renderable_cameras()
+    if cameras:
+        token_values["<camera>"] = cameras
+
+    version = _render_version()
+    if version:
+        token_values["<version>"] = [version]
+
+    return token_values
+
+
+def resolve_render_tokens(path_value, token_values=None):
+    """
+    Resolve supported Maya render tokens in a path-like string. Tokens without
+    a known value are left in place.
+    """
+    if not path_value:
+        return ""
+
+    if token_values is None:
+        token_values = get_token_values()
+
+    def _replace(match):
+        values = token_values.get(match.group(1).lower())
+        return values[0] if values else match.group(1)
+
+    return TOKEN_PATTERN.sub(_replace, path_value)
+
+
+def _compile_component(component, token_values):
+    """
+    Return (literal, pattern) for one path component. literal is None when the
+    component contains a token with more than one possible value.
+    """
+    literal_parts = []
+    pattern_parts = []
+    is_literal = True
+
+    for part in TOKEN_PATTERN.split(component):
+        if not part:
+            continue
+
+        values = token_values.get(part.lower()) if TOKEN_PATTERN.fullmatch(part) else [part]
+        if not values:
+            is_literal = False
+            pattern_parts.append(WILDCARD_PATTERN)
+            continue
+
+        if len(values) == 1:
+            literal_parts.append(values[0])
+            pattern_parts.append(re.escape(values[0]))
+            continue
+
+        is_literal = False
+        pattern_parts.append("(?:{})".format("|".join(re.escape(value) for value in values)))
+
+    literal = "".join(literal_parts) if is_literal else None
+    return literal, "".join(pattern_parts)
+
+
+def compile_prefix_pattern(raw_prefix, token_values=None):
+    """
+    Compile the whole imageFilePrefix into anchored per-component patterns.
+
+    Returns a dict with:
+        stable_dir: leading directories that resolve to a single literal path
+        dir_patterns: compiled patterns for each remaining directory component
+        base_pattern: compiled pattern for the file base name
+    """
+    if token_values is None:
+        token_values = get_token_values()
+
+    components = [component for component in normalize_prefix(raw_prefix).split("/") if component]
+    base_component = components.pop() if components else ""
+
+    stable_parts = []
+    dir_patterns = []
+    for component in components:
+        literal, pattern = _compile_component(component, token_values)
+        if literal is not None and not dir_patterns:
+            stable_parts.append(literal)
+            continue
+        dir_patterns.append(re.compile("^{}$".format(pattern), re.IGNORECASE))
+
+    _, base_pattern = _compile_component(base_component, token_values)
+
+    return {
+        "stable_dir": "/".join(stable_parts),
+        "dir_patterns": dir_patterns,
+        "base_pattern": re.compile("^{}$".format(base_pattern or WILDCARD_PATTERN), re.IGNORECASE),
+    }
+
+
+def get_sequence_search_root(render_dir, prefix_pattern):
+    if prefix_pattern["stable_dir"]:
+        return os.path.normpath(os.path.join(render_dir, prefix_pattern["stable_dir"]))
+    return os.path.normpath(render_dir)
+
+
+# Map Maya time units to FPS values
+FPS_MAPPING = {
+    "game": 15,
+    "film": 24,
+    "pal": 25,
+    "29.97fps": 29.97,
+    "29.97": 29.97,
+    "ntsc": 30,
+    "show": 48,
+    "palf": 50,
+    "59.94fps": 59.94,
+    "ntscf": 60,
+}
+
+
+def get_scene_fps():
+    time_unit = cmds.currentUnit(q=True, time=True)
+    if time_unit in FPS_MAPPING:
+        return FPS_MAPPING[time_unit]
+
+    # Newer units come back as e.g. "23.976fps"
+    match = re.match(r"^(\d+(?:\.\d+)?)fps$", time_unit)
+    if match:
+        return float(match.group(1))
+    return 24
+
+
+def find_image_sequence_from_maya_settings():
+    """
+    Find the image sequence based on Maya's render settings.
+    """
+    render_dir = get_render_dir()
+    raw_file_prefix = get_image_file_prefix()
+    token_values = get_token_values()
+    file_prefix = normalize_prefix(resolve_render_tokens(raw_file_prefix, token_values))
+    prefix_pattern = compile_prefix_pattern(raw_file_prefix, token_values)
+
+    prefix_dir = os.path.dirname(file_prefix)
+
+    return {
+        "render_dir": render_dir,
+        "input_dir": os.path.normpath(os.path.join(render_dir, prefix_dir)),
+        "base_name": os.path.basename(file_prefix),
+        "extension": get_image_extension(),
+        "fps": get_scene_fps(),
+        "start_frame": int(cmds.getAttr("defaultRenderGlobals.startFrame")),
+        "end_frame": int(cmds.getAttr("defaultRenderGlobals.endFrame")),
+        "frame_padding": int(cmds.getAttr("defaultRenderGlobals.extensionPadding")),
+        "search_root": get_sequence_search_root(render_dir, prefix_pattern),
+        "dir_patterns": prefix_pattern["dir_patterns"],
+        "base_pattern": prefix_pattern["base_pattern"],
+    }
@@ -0,0 +1,463 @@
+# Local render queue for a night of shots on one box.
+# Watches a folder of JSON job files and renders them through render_scheduler.
+# Each job names a scene, its frames, render layers, a priority and how many
+# Render processes it may use at once. The box's workers go to the highest
+# priority jobs first, and a new higher priority job pre-empts chunks from
+# lower ones; they are re-queued and carry on later.
+#
+# Queue state and timings are kept under <queue>/.queue, and every job has an
+# event log and a resumable scheduler state file in .queue/jobs, so a restarted queue
+# picks up where it stopped. Deleting a job file cancels the job, and editing
+# one that isn't rendering queues it again from scratch.
+#
+# Job file (<queue>/sh010.json):
+#   {"scene": "S:/shots/sh010_v003.mb", "start": 1001, "end": 1100,
+#    "layers": ["beauty", "fx"], "priority": 80, "max_workers": 2}
+#
+# mayapy render_queue.py run "R:/queue" --workers 4
+# mayapy render_queue.py submit "R:/queue" "S:/shots/sh010_v003.mb" --start 1001 --end 1100 --priority 80
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import threading
+import time
+
+import render_scheduler
+import render_telemetry
+import sequence_index
+
+QUEUE_VERSION = 1
+QUEUE_DIR_NAME = ".queue"
+JOBS_DIR_NAME = "jobs"
+DEFAULT_PRIORITY = 50
+POLL_SECONDS = 2.0
+
+# Jobs in these states no longer want workers
+FINISHED_STATUSES = ("done", "failed", "invalid", "cancelled")
+
+
+def queue_state_dir(queue_dir):
+    return os.path.join(queue_dir, QUEUE_DIR_NAME)
+
+
+def queue_state_path(queue_dir):
+    return os.path.join(queue_state_dir(queue_dir), "queue.json")
+
+
+def job_state_dir(queue_dir):
+    # Separate from queue.json so a job file of that name can't overwrite it
+    return os.path.join(queue_state_dir(queue_dir), JOBS_DIR_NAME)
+
+
+def job_state_path(queue_dir, name):
+    return os.path.join(job_state_dir(queue_dir), name + ".json")
+
+
+def job_log_path(queue_dir, name):
+    return os.path.join(job_state_dir(queue_dir), name + ".log")
+
+
+def _split_list(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return [str(item) for item in value or ()]
+
+
+def parse_job(job_path):
+    """
+    Read a job file into a job dict with every field filled in. Raises
+    ValueError when the job can't be rendered as written.
+    """
+    try:
+        with open(job_path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"not valid JSON: {exc}") from exc
+    if not isinstance(data, dict) or not data.get("scene"):
+        raise ValueError("no scene given")
+
+    if data.get("frames"):
+        frame_ranges = sequence_index.parse_ranges(str(data["frames"]))
+    elif "start" in data and "end" in data:
+        frame_ranges = [[int(data["start"]), int(data["end"])]]
+    else:
+        raise ValueError("give start and end, or frames")
+    if not frame_ranges or any(start > end for start, end in frame_ranges):
+        raise ValueError(f"bad frame range {frame_ranges}")
+
+    extra_args = shlex.split(data.get("render_args", ""), posix=os.name != "nt")
+    layers = _split_list(data.get("layers"))
+    if layers:
+        extra_args += ["-rl", ",".join(layers)]
+
+    return {
+        "scene": data["scene"],
+        "frame_ranges": frame_ranges,
+        "by_frame": max(1, int(data.get("by", 1))),
+        "layers": layers,
+        "priority": int(data.get("priority", DEFAULT_PRIORITY)),
+        "max_workers": max(1, int(data["max_workers"])) if data.get("max_workers") else None,
+        "chunk_size": int(data.get("chunk_size", 0)) or None,
+        "attempts": int(data.get("attempts", render_scheduler.MAX_ATTEMPTS)),
+        "extra_args": extra_args,
+    }
+
+
+def write_job(queue_dir, scene_file, frame_ranges, by_frame=1, layers=(), priority=DEFAULT_PRIORITY,
+              max_workers=None, render_args="", name=None):
+    """
+    Add a job file to the queue and return its path. The file is written
+    aside and renamed in so the queue never reads half a job.
+    """
+    name = name or os.path.splitext(os.path.basename(scene_file))[0]
+    job = {
+        "scene": os.path.abspath(scene_file),
+        "frames": sequence_index.format_ranges(frame_ranges),
+        "by": by_frame,
+        "layers": list(layers),
+        "priority": priority,
+        "render_args": render_args,
+    }
+    if max_workers:
+        job["max_workers"] = max_workers
+
+    os.makedirs(queue_dir, exist_ok=True)
+    job_path = os.path.join(queue_dir, name + ".json")
+    temp_path = job_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(job, handle, indent=2)
+    os.replace(temp_path, job_path)
+    return job_path
+
+
+def load_queue(queue_dir):
+    """
+    Load the queue state. Jobs that were rendering when the queue stopped go
+    back to queued; their scheduler state files resume the unfinished chunks.
+    """
+    try:
+        with open(queue_state_path(queue_dir), "r", encoding="utf-8") as handle:
+            queue = json.load(handle)
+    except (OSError, ValueError):
+        return {"version": QUEUE_VERSION, "jobs": {}}
+    if queue.get("version") != QUEUE_VERSION:
+        return {"version": QUEUE_VERSION, "jobs": {}}
+    for record in queue["jobs"].values():
+        if record["status"] == "running":
+            record["status"] = "queued"
+    return queue
+
+
+def save_queue(queue_dir, queue):
+    queue["updated"] = time.time()
+    state_path = queue_state_path(queue_dir)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = state_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(queue, handle, indent=2)
+    os.replace(temp_path, state_path)
+
+
+def log_event(queue_dir, name, message):
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{name}] {message}")
+    os.makedirs(job_state_dir(queue_dir), exist_ok=True)
+    with open(job_log_path(queue_dir, name), "a", encoding="utf-8") as handle:
+        handle.write(f"{stamp} {message}\n")
+
+
+def _file_hash(path):
+    with open(path, "rb") as handle:
+        return hashlib.sha1(handle.read()).hexdigest()
+
+
+def scan_jobs(queue_dir, queue, busy=()):
+    """
+    Bring queue records in line with the job files on disk: new files are
+    queued, edited finished jobs are queued again and removed files cancel
+    their job. Jobs in busy (rendering now) are only cancelled, never reset.
+    """
+    job_files = {}
+    for entry in os.scandir(queue_dir):
+        if entry.is_file() and entry.name.endswith(".json") and not entry.name.startswith("."):
+            job_files[os.path.splitext(entry.name)[0]] = entry.path
+
+    for name, job_path in job_files.items():
+        if name in busy:
+            continue
+        try:
+            file_hash = _file_hash(job_path)
+        except OSError:
+            continue
+        record = queue["jobs"].get(name)
+        if record and record["hash"] == file_hash:
+            continue
+
+        state_path = job_state_path(queue_dir, name)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        record = {
+            "file": job_path,
+            "hash": file_hash,
+            "status": "queued",
+            "submitted": os.path.getmtime(job_path),
+            "state": state_path,
+        }
+        try:
+            job = parse_job(job_path)
+        except (OSError, ValueError) as exc:
+            record.update({"status": "invalid", "error": str(exc)})
+            log_event(queue_dir, name, f"Invalid job file: {exc}")
+        else:
+            record.update({"priority": job["priority"], "scene": job["scene"]})
+            log_event(queue_dir, name, f"Queued {job['scene']} at priority {job['priority']}")
+        queue["jobs"][name] = record
+
+    for name, record in queue["jobs"].items():
+        if name not in job_files and record["status"] not in FINISHED_STATUSES:
+            record["status"] = "cancelled"
+            log_event(queue_dir, name, "Job file removed; cancelled")
+
+
+def allocate_workers(queue, jobs, total_workers):
+    """
+    Share total_workers between the waiting jobs: highest priority first,
+    then oldest, each getting up to its own max_workers and no more than it
+    has chunks left. Returns {name: workers} for the jobs that get any.
+    """
+    waiting = [
+        name for name, record in queue["jobs"].items()
+        if record["status"] in ("queued", "running") and name in jobs
+    ]
+    waiting.sort(key=lambda name: (-queue["jobs"][name]["priority"], queue["jobs"][name]["submitted"]))
+
+    allocation = {}
+    remaining = total_workers
+    for name in waiting:
+        if remaining <= 0:
+            break
+        record = queue["jobs"][name]
+        wanted = jobs[name]["max_workers"] or total_workers
+        if record.get("chunks_left") is not None:
+            wanted = min(wanted, record["chunks_left"])
+        workers = min(wanted, remaining)
+        if workers > 0:
+            allocation[name] = workers
+            remaining -= workers
+    return allocation
+
+
+def _prepare_job_state(record, job, render_command=None):
+    """
+    Write the job's scheduler state file unless it has one from an earlier
+    run, and return how many chunks are still to render.
+    """
+    if not os.path.exists(record["state"]):
+        frame_count = sequence_index.frame_count(job["frame_ranges"]) // job["by_frame"]
+        workers = job["max_workers"] or render_scheduler.default_worker_count()
+        chunk_size = job["chunk_size"] or render_scheduler.default_chunk_size(frame_count, workers)
+        render_scheduler.save_job_state(
+            record["state"],
+            render_scheduler.new_job_state(
+                job["scene"], job["frame_ranges"], chunk_size, job["by_frame"], job["extra_args"], render_command
+            ),
+        )
+    state = render_scheduler.load_job_state(record["state"])
+    return sum(1 for chunk in state["chunks"] if chunk["status"] == "pending")
+
+
+def _finish_job(queue_dir, name, record, state):
+    counts = render_scheduler.summarize(state)
+    record["render_seconds"] = round(sum(chunk.get("seconds", 0) for chunk in state["chunks"]), 2)
+    record["chunks_left"] = counts.get("pending", 0)
+    if record["status"] == "cancelled":
+        log_event(queue_dir, name, "Stopped after cancel")
+        return
+    if counts.get("pending"):
+        record["status"] = "queued"
+        log_event(queue_dir, name, f"Paused with {counts['pending']} chunk(s) left")
+        return
+
+    record["finished"] = time.time()
+    record["seconds"] = round(record["finished"] - record["started"], 2)
+    failed = render_scheduler.failed_ranges(state)
+    if failed:
+        record.update({"status": "failed", "failed_frames": sequence_index.format_ranges(failed)})
+        log_event(queue_dir, name, f"Failed frames {record['failed_frames']} after {record['seconds']:.0f}s")
+    else:
+        record["status"] = "done"
+        log_event(
+            queue_dir, name,
+            f"Done in {record['seconds']:.0f}s wall, {record['render_seconds']:.0f}s of Render time"
+        )
+
+
+def run_queue(queue_dir, max_workers=None, render_command=None, once=False, poll_interval=POLL_SECONDS,
+              chunk_poll_interval=render_scheduler.POLL_SECONDS):
+    """
+    Render the queue's jobs until stopped (Ctrl+C), or with once until no job
+    is left waiting. Returns the queue state.
+
+    Each rendering job runs in its own thread through run_render_job, which
+    polls its current share of workers; a smaller share pre-empts its newest
+    chunks and no share stops it, leaving it resumable. Renders from several
+    jobs share the box, so they run without core pinning.
+    """
+    max_workers = max_workers or render_scheduler.default_worker_count()
+    queue = load_queue(queue_dir)
+    lock = threading.Lock()
+    # Render threads poll this without the lock, so each new allocation is
+    # swapped in whole rather than edited in place
+    allocation_ref = [{}]
+    threads = {}
+    jobs = {}
+    stopping = threading.Event()
+
+    def _allowed_workers(name):
+        if stopping.is_set():
+            return None
+        return allocation_ref[0].get(name) or None
+
+    def _on_chunk_done(name, chunk):
+        render_telemetry.chunk_recorder(queue["jobs"][name]["scene"])(chunk)
+        if chunk["status"] in ("done", "failed"):
+            with lock:
+                record = queue["jobs"][name]
+                record["chunks_left"] = max(0, record.get("chunks_left", 1) - 1)
+
+    def _render(name, job_max_workers, attempts):
+        state = render_scheduler.run_render_job(
+            queue["jobs"][name]["state"],
+            job_max_workers,
+            affinity=False,
+            max_attempts=attempts,
+            allowed_workers=lambda: _allowed_workers(name),
+            on_chunk_done=lambda chunk: _on_chunk_done(name, chunk),
+            poll_interval=chunk_poll_interval,
+        )
+        with lock:
+            _finish_job(queue_dir, name, queue["jobs"][name], state)
+
+    print(f"Watching {queue_dir} with {max_workers} worker(s)")
+    try:
+        while True:
+            for name, thread in list(threads.items()):
+                if not thread.is_alive():
+                    thread.join()
+                    del threads[name]
+
+            with lock:
+                scan_jobs(queue_dir, queue, busy=threads)
+                # Rendering jobs keep the job they started with; waiting ones re-read theirs
+                jobs = {name: job for name, job in jobs.items() if name in threads}
+                for name, record in queue["jobs"].items():
+                    if record["status"] == "queued" and name not in threads:
+                        try:
+                            jobs[name] = parse_job(record["file"])
+                            if record.get("chunks_left") is None:
+                                record["chunks_left"] = _prepare_job_state(record, jobs[name], render_command)
+                        except (OSError, ValueError) as exc:
+                            record.update({"status": "invalid", "error": str(exc)})
+                            log_event(queue_dir, name, f"Invalid job file: {exc}")
+
+                new_allocation = allocate_workers(queue, jobs, max_workers)
+                for name in threads:
+                    workers = new_allocation.get(name, 0)
+                    if workers < min(allocation_ref[0].get(name, 0), queue["jobs"][name].get("chunks_left", 0)):
+                        log_event(queue_dir, name, f"Pre-empting down to {workers} worker(s) for higher priority jobs")
+                allocation_ref[0] = new_allocation
+
+                for name, workers in new_allocation.items():
+                    if name in threads:
+                        continue
+                    record = queue["jobs"][name]
+                    job = jobs[name]
+                    record["chunks_left"] = _prepare_job_state(record, job, render_command)
+                    record["status"] = "running"
+                    record.setdefault("started", time.time())
+                    log_event(queue_dir, name, f"Rendering with {workers} worker(s), {record['chunks_left']} chunk(s) to go")
+                    thread = threading.Thread(
+                        target=_render,
+                        args=(name, job["max_workers"] or max_workers, job["attempts"]),
+                        name=f"render_queue_{name}",
+                        daemon=True,
+                    )
+                    threads[name] = thread
+                    thread.start()
+                save_queue(queue_dir, queue)
+
+                waiting = [record for record in queue["jobs"].values() if record["status"] in ("queued", "running")]
+            if once and not waiting and not threads:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("Stopping the queue; unfinished jobs resume on the next run")
+    finally:
+        stopping.set()
+        for thread in threads.values():
+            thread.join()
+        with lock:
+            save_queue(queue_dir, queue)
+    return queue
+
+
+def print_queue(queue):
+    records = sorted(queue["jobs"].items(), key=lambda item: (-item[1].get("priority", 0), item[1]["submitted"]))
+    for name, record in records:
+        timing = f"{record['seconds']:.0f}s" if record.get("seconds") is not None else ""
+        detail = record.get("failed_frames") or record.get("error") or ""
+        print(f"{name:<32} {record['status']:<10} {record.get('priority', ''):>4} {timing:>8} {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render queued scenes from a folder of JSON job files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Watch the queue folder and render its jobs.")
+    run_parser.add_argument("queue", help="Folder of job files.")
+    run_parser.add_argument("--workers", type=int, default=0, help="Render processes at once across all jobs (0 = size to the machine).")
+    run_parser.add_argument("--once", action="store_true", help="Exit when no job is left waiting instead of watching.")
+    run_parser.add_argument("--render-command", default="", help="Render command to run instead of Render, e.g. a stub.")
+
+    submit_parser = commands.add_parser("submit", help="Add a job file to the queue.")
+    submit_parser.add_argument("queue", help="Folder of job files.")
+    submit_parser.add_argument("scene", help="Maya scene to render.")
+    submit_parser.add_argument("--start", type=int, help="First frame.")
+    submit_parser.add_argument("--end", type=int, help="Last frame.")
+    submit_parser.add_argument("--frames", default="", help="Frame ranges instead of start/end, e.g. 1001-1040,1090.")
+    submit_parser.add_argument("--by", type=int, default=1, help="Render every nth frame.")
+    submit_parser.add_argument("--layers", default="", help="Comma separated render layers (default: the scene's).")
+    submit_parser.add_argument("--priority", type=int, default=DEFAULT_PRIORITY, help="Higher renders first.")
+    submit_parser.add_argument("--max-workers", type=int, default=0, help="Most Render processes this job may use (0 = any).")
+    submit_parser.add_argument("--render-args", default="", help="Extra Render flags.")
+    submit_parser.add_argument("--name", default="", help="Job name (default: the scene name).")
+
+    status_parser = commands.add_parser("status", help="List the queue's jobs.")
+    status_parser.add_argument("queue", help="Folder of job files.")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_queue(
+            args.queue,
+            args.workers or None,
+            shlex.split(args.render_command, posix=os.name != "nt") or None,
+            args.once,
+        )
+    elif args.command == "submit":
+        if not args.frames and (args.start is None or args.end is None):
+            submit_parser.error("give --start and --end, or --frames")
+        frame_ranges = sequence_index.parse_ranges(args.frames) if args.frames else [[args.start, args.end]]
+        job_path = write_job(
+            args.queue, args.scene, frame_ranges, args.by, _split_list(args.layers), args.priority,
+            args.max_workers or None, args.render_args, args.name or None,
+        )
+        print(f"Queued {job_path}")
+    else:
+        print_queue(load_queue(args.queue))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Resume a render by rendering only the frames that are missing or damaged.
+# Every expected frame (start to end by the by-frame step) is checked in each
+# output sequence with frame_validate; frames sequence_repair filled with a link
+# to an earlier frame count as missing too. The frames to redo are collapsed
+# into as few contiguous -s/-e runs as possible before going to the scheduler.
+#
+# mayapy render_resume.py "S:/shots/sh010_v003.mb" --start 1001 --end 1240 --images "R:/renders/sh010" --extensions exr
+
+import argparse
+import os
+import shlex
+
+import frame_validate
+import render_scheduler
+import sequence_index
+import sequence_repair
+
+
+def expected_frames(start_frame, end_frame, by_frame=1):
+    return list(range(start_frame, end_frame + 1, max(1, by_frame)))
+
+
+def collapse_frames(frames, by_frame=1):
+    """
+    Collapse frames into [start, end] runs where each frame follows the last
+    by by_frame, so every run is one Render -s start -e end -b by_frame call.
+    """
+    runs = []
+    for frame in sorted(set(frames)):
+        if runs and frame == runs[-1][1] + by_frame:
+            runs[-1][1] = frame
+        else:
+            runs.append([frame, frame])
+    return runs
+
+
+def frames_needing_render(sequence_specs, start_frame, end_frame, by_frame=1, max_workers=None):
+    """
+    Return (frames to render, bad {path: problem}). A frame is redone when any
+    output sequence (layers, AOVs) lacks it, has a damaged copy or only has a
+    gap filled by sequence_repair. With no outputs on disk yet, every frame is
+    needed.
+    """
+    expected = expected_frames(start_frame, end_frame, by_frame)
+    if not sequence_specs:
+        return expected, {}
+
+    needed = set()
+    bad_paths = {}
+    expected_set = set(expected)
+    for sequence_spec in sequence_specs:
+        report = frame_validate.validate_sequence(sequence_spec, start_frame, end_frame, max_workers)
+        for frame, problem in report["bad"].items():
+            if frame in expected_set:
+                needed.add(frame)
+                bad_paths[sequence_index.sequence_frame_path(sequence_spec, frame)] = problem
+        for frame in sequence_index.iter_frames(report["missing_ranges"]):
+            if frame in expected_set:
+                needed.add(frame)
+        for frame, source_frame in sequence_repair.load_filled_frames(sequence_spec).items():
+            if frame in expected_set:
+                needed.add(frame)
+                bad_paths[sequence_index.sequence_frame_path(sequence_spec, frame)] = f"gap filled from frame {source_frame}"
+    return sorted(needed), bad_paths
+
+
+def remove_bad_frames(bad_paths):
+    # Damaged and filled frames go before the re-render so a frame hardlinked
+    # by sequence_repair is replaced rather than written through
+    for path, problem in bad_paths.items():
+        print(f"Removing frame {path}: {problem}")
+        try:
+            os.remove(path)
+        except OSError as exc:
+            print(f"Could not remove {path}: {exc}")
+
+
+def resume_render(scene_file, sequence_specs, start_frame, end_frame, by_frame=1, max_workers=None,
+                  extra_args=(), render_command=None, dry_run=False):
+    """
+    Render only the missing, damaged or gap-filled frames of start..end.
+    Returns the scheduler's final job state, or the runs that would render
+    for dry_run.
+    """
+    frames, bad_paths = frames_needing_render(sequence_specs, start_frame, end_frame, by_frame, max_workers)
+    total = len(expected_frames(start_frame, end_frame, by_frame))
+    runs = collapse_frames(frames, by_frame)
+    if not runs:
+        print(f"All {total} frame(s) of {os.path.basename(scene_file)} are rendered and intact")
+        return None if not dry_run else []
+
+    print(
+        f"{len(frames)} of {total} frame(s) need rendering ({len(bad_paths)} damaged or filled) "
+        f"in {len(runs)} run(s): {sequence_index.format_ranges(runs)}{f' by {by_frame}' if by_frame > 1 else ''}"
+    )
+    if dry_run:
+        return runs
+
+    remove_bad_frames(bad_paths)
+    return render_scheduler.render_frames(
+        scene_file, runs, max_workers, by_frame=by_frame, extra_args=extra_args, render_command=render_command
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render only the missing, damaged or gap-filled frames of a scene.")
+    parser.add_argument("scene", help="Maya scene to render.")
+    parser.add_argument("--start", type=int, required=True, help="First expected frame.")
+    parser.add_argument("--end", type=int, required=True, help="Last expected frame.")
+    parser.add_argument("--by", type=int, default=1, help="Expected every nth frame.")
+    parser.add_argument("--images", required=True, help="Folder the render writes its sequences to.")
+    parser.add_argument("--extensions", default="", help="Comma separated image extensions to check (default: all).")
+    parser.add_argument("--workers", type=int, default=0, help="Render processes at once (0 = size to the machine).")
+    parser.add_argument("--render-command", default="", help="Render command to run instead of Render, e.g. a stub.")
+    parser.add_argument("--render-args", default="", help="Extra Render flags.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the frames that would render.")
+    args = parser.parse_args()
+
+    extensions = [value.strip() for value in args.extensions.split(",") if value.strip()] or None
+    sequence_specs = sequence_index.scan_sequences(args.images, extensions=extensions, use_cache=False)
+    resume_render(
+        args.scene,
+        sequence_specs,
+        args.start,
+        args.end,
+        args.by,
+        args.workers or None,
+        shlex.split(args.render_args, posix=os.name != "nt"),
+        shlex.split(args.render_command, posix=os.name != "nt") or None,
+        args.dry_run,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+# Local multi-process render scheduler.
+# Splits a frame range into chunks and keeps several Render processes running
+# at once, each pinned to its own set of cores. Chunk status, exit codes and
+# retries are kept in a JSON job state file beside the scene so an interrupted
+# job can be picked up again, and every attempt is logged to its own file.
+#
+# The Render command can be swapped for a stub (JW_RENDER_COMMAND or
+# --render-command), e.g. "python render_stub.py", to test scheduling alone.
+#
+# mayapy render_scheduler.py "S:/shots/sh010_v003.mb" --start 1001 --end 1100 --workers 4
+
+import argparse
+import json
+import math
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+
+import encode_engine
+import render_telemetry
+import sequence_index
+
+STATE_VERSION = 1
+RENDER_STATE_DIR_NAME = ".render_state"
+
+# Each Render gets this many cores by default; 32 cores run 4 renders
+DEFAULT_CORES_PER_RENDER = 8
+
+# Aim for a few chunks per worker so a slow chunk doesn't hold up the end
+CHUNKS_PER_WORKER = 3
+# Every Render pays for a scene load, so chunks never get shorter than this
+MIN_CHUNK_FRAMES = 5
+
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 1.0
+
+
+def default_render_command():
+    """
+    Return the Render command as a list: JW_RENDER_COMMAND when set, else
+    Render from MAYA_LOCATION, else Render on the PATH.
+    """
+    override = os.environ.get("JW_RENDER_COMMAND")
+    if override:
+        return shlex.split(override, posix=os.name != "nt")
+    maya_location = os.environ.get("MAYA_LOCATION")
+    if maya_location:
+        return [os.path.join(maya_location, "bin", "Render")]
+    return ["Render"]
+
+
+def state_path_for(scene_file):
+    scene_dir, scene_name = os.path.split(os.path.abspath(scene_file))
+    return os.path.join(scene_dir, RENDER_STATE_DIR_NAME, os.path.splitext(scene_name)[0] + ".json")
+
+
+def default_worker_count(cpu_count=None):
+    return max(1, (cpu_count or os.cpu_count() or 1) // DEFAULT_CORES_PER_RENDER)
+
+
+def default_chunk_size(frame_count, workers):
+    return max(MIN_CHUNK_FRAMES, math.ceil(frame_count / (workers * CHUNKS_PER_WORKER)))
+
+
+def plan_chunks(frame_ranges, chunk_size, by_frame=1):
+    """
+    Cut frame ranges into [start, end] chunks of up to chunk_size rendered
+    frames. With by_frame > 1 chunks stay on the by_frame grid of each range.
+    """
+    span = max(1, chunk_size) * by_frame
+    chunks = []
+    for start_frame, end_frame in frame_ranges:
+        for chunk_start in range(start_frame, end_frame + 1, span):
+            chunks.append([chunk_start, min(chunk_start + span - 1, end_frame)])
+    return chunks
+
+
+def core_sets(workers, cpu_count=None):
+    """
+    Split the machine's cores into one contiguous set per worker slot.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    per_worker = max(1, cpu_count // workers)
+    return [
+        [core % cpu_count for core in range(slot * per_worker, slot * per_worker + per_worker)]
+        for slot in range(workers)
+    ]
+
+
+def build_render_command(render_command, scene_file, chunk, by_frame=1, extra_args=()):
+    return list(render_command) + [
+        "-s", str(chunk[0]),
+        "-e", str(chunk[1]),
+        "-b", str(by_frame),
+    ] + list(extra_args) + [scene_file]
+
+
+def _affinity_launch(command, cores):
+    """
+    Return (command, popen kwargs) that start command pinned to cores. The
+    affinity is set before Render starts so the mayabatch it spawns inherits it.
+    """
+    if os.name == "nt":
+        mask = sum(1 << core for core in cores)
+        return ["cmd", "/c", "start", "", "/b", "/wait", "/affinity", format(mask, "X")] + command, {}
+    if hasattr(os, "sched_setaffinity"):
+        return command, {"preexec_fn": lambda: _set_own_affinity(cores)}
+    return command, {}
+
+
+def _set_own_affinity(cores):
+    # A core set the machine doesn't have shouldn't stop the render
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError:
+        pass
+
+
+def stop_process(process):
+    """
+    Stop a Render and everything it started.
+    """
+    if process.poll() is not None:
+        return
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            process.terminate()
+
+
+def new_job_state(scene_file, frame_ranges, chunk_size, by_frame=1, extra_args=(), render_command=None):
+    return {
+        "version": STATE_VERSION,
+        "scene": os.path.abspath(scene_file),
+        "render_command": list(render_command or default_render_command()),
+        "by_frame": by_frame,
+        "extra_args": list(extra_args),
+        "created": time.time(),
+        "chunks": [
+            {"start": start, "end": end, "status": "pending", "attempts": 0, "exit_codes": []}
+            for start, end in plan_chunks(frame_ranges, chunk_size, by_frame)
+        ],
+    }
+
+
+def load_job_state(state_path):
+    """
+    Load a job state file. Chunks left running by a scheduler that died are
+    put back in the queue.
+    """
+    with open(state_path, "r", encoding="utf-8") as handle:
+        state = json.load(handle)
+    if state.get("version") != STATE_VERSION:
+        raise ValueError(f"{state_path} was written by another scheduler version")
+    for chunk in state["chunks"]:
+        if chunk["status"] == "running":
+            chunk["status"] = "pending"
+    return state
+
+
+def save_job_state(state_path, state):
+    state["updated"] = time.time()
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = state_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(temp_path, state_path)
+
+
+def chunk_log_path(state_path, chunk):
+    log_dir = os.path.splitext(state_path)[0] + "_logs"
+    return os.path.join(log_dir, f"chunk_{chunk['start']}-{chunk['end']}.log")
+
+
+def _start_chunk(state, state_path, chunk, cores):
+    command = build_render_command(
+        state["render_command"], state["scene"], [chunk["start"], chunk["end"]], state["by_frame"], state["extra_args"]
+    )
+    popen_kwargs = {}
+    if cores:
+        command, popen_kwargs = _affinity_launch(command, cores)
+    if os.name != "nt":
+        popen_kwargs["start_new_session"] = True
+
+    log_path = chunk_log_path(state_path, chunk)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    log_handle = open(log_path, "a", encoding="utf-8", errors="replace")
+    log_handle.write(f"=== attempt {chunk['attempts'] + 1}: {subprocess.list2cmdline(command)}\n")
+    log_handle.flush()
+    process = subprocess.Popen(command, stdout=log_handle, stderr=subprocess.STDOUT, **popen_kwargs)
+
+    hooks = encode_engine.JOB_HOOKS.get()
+    if hooks.get("process_observer"):
+        hooks["process_observer"](process)
+
+    chunk.update({"status": "running", "log": log_path, "started": time.time(), "cores": cores or None})
+    chunk["attempts"] += 1
+    return process, log_handle
+
+
+def summarize(state):
+    counts = {}
+    for chunk in state["chunks"]:
+        counts[chunk["status"]] = counts.get(chunk["status"], 0) + 1
+    return counts
+
+
+def failed_ranges(state):
+    return sequence_index.normalize_ranges(
+        [[chunk["start"], chunk["end"]] for chunk in state["chunks"] if chunk["status"] == "failed"]
+    )
+
+
+def run_render_job(state_path, max_workers=None, affinity=True, max_attempts=MAX_ATTEMPTS,
+                   allowed_workers=None, on_chunk_done=None, poll_interval=POLL_SECONDS):
+    """
+    Run the pending chunks of a job state file until every chunk is done or
+    out of attempts. Returns the final state.
+
+    allowed_workers() is polled and may lower the worker count while the job
+    runs; the newest chunks are stopped and re-queued without using up an
+    attempt. It returning None stops the job, leaving it resumable.
+    on_chunk_done(chunk) runs after each chunk exits.
+    """
+    state = load_job_state(state_path)
+    max_workers = max_workers or default_worker_count()
+    slot_cores = core_sets(max_workers) if affinity else [None] * max_workers
+    free_slots = list(range(max_workers))
+    running = []
+    stopped = False
+
+    def _pending():
+        return [chunk for chunk in state["chunks"] if chunk["status"] == "pending"]
+
+    print(f"Rendering {state['scene']}: {len(state['chunks'])} chunk(s), up to {max_workers} at once")
+    try:
+        while True:
+            limit = max_workers if allowed_workers is None else allowed_workers()
+            if limit is None:
+                stopped = True
+                break
+
+            # Pre-empt the newest chunks when the allowance drops
+            while len(running) > max(0, limit):
+                process, log_handle, chunk, slot = running.pop()
+                stop_process(process)
+                process.wait()
+                log_handle.close()
+                chunk.update({"status": "pending", "attempts": chunk["attempts"] - 1})
+                free_slots.append(slot)
+                print(f"Pre-empted chunk {chunk['start']}-{chunk['end']}")
+
+            pending = _pending()
+            while pending and free_slots and len(running) < limit:
+                chunk = pending.pop(0)
+                slot = free_slots.pop(0)
+                process, log_handle = _start_chunk(state, state_path, chunk, slot_cores[slot])
+                running.append((process, log_handle, chunk, slot))
+                print(f"Started chunk {chunk['start']}-{chunk['end']} (attempt {chunk['attempts']}, pid {process.pid})")
+            save_job_state(state_path, state)
+
+            if not running and not _pending():
+                break
+
+            time.sleep(poll_interval)
+            for entry in list(running):
+                process, log_handle, chunk, slot = entry
+                returncode = process.poll()
+                if returncode is None:
+                    continue
+                running.remove(entry)
+                log_handle.close()
+                free_slots.append(slot)
+                chunk["finished"] = time.time()
+                chunk["seconds"] = round(chunk["finished"] - chunk["started"], 2)
+                chunk["exit_codes"].append(returncode)
+                if returncode == 0:
+                    chunk["status"] = "done"
+                elif chunk["attempts"] < max_attempts:
+                    chunk["status"] = "pending"
+                else:
+                    chunk["status"] = "failed"
+                counts = summarize(state)
+                print(
+                    f"Chunk {chunk['start']}-{chunk['end']} exited {returncode} after {chunk['seconds']:.0f}s: "
+                    f"{chunk['status']} ({counts.get('done', 0)}/{len(state['chunks'])} done)"
+                )
+                if on_chunk_done:
+                    on_chunk_done(chunk)
+    finally:
+        for process, log_handle, chunk, _ in running:
+            stop_process(process)
+            process.wait()
+            log_handle.close()
+            chunk.update({"status": "pending", "attempts": chunk["attempts"] - 1})
+        save_job_state(state_path, state)
+
+    failed = failed_ranges(state)
+    if stopped:
+        print(f"Stopped {state['scene']} with {len(_pending())} chunk(s) left; run again to resume")
+    elif failed:
+        print(f"Finished {state['scene']} with failed frames: {sequence_index.format_ranges(failed)}")
+    else:
+        print(f"Finished {state['scene']}: all {len(state['chunks'])} chunk(s) rendered")
+    return state
+
+
+def render_frames(scene_file, frame_ranges, max_workers=None, chunk_size=None, by_frame=1, extra_args=(),
+                  render_command=None, state_path=None, resume=False, affinity=True, max_attempts=MAX_ATTEMPTS,
+                  telemetry=True):
+    """
+    Render frame_ranges of scene_file across parallel Render processes. With
+    resume an existing job state file for the scene is continued instead of
+    starting over. With telemetry each chunk's per-frame stats are recorded
+    by render_telemetry as it finishes.
+    """
+    state_path = state_path or state_path_for(scene_file)
+    max_workers = max_workers or default_worker_count()
+    if not (resume and os.path.exists(state_path)):
+        frame_count = sequence_index.frame_count(frame_ranges) // max(1, by_frame)
+        chunk_size = chunk_size or default_chunk_size(frame_count, max_workers)
+        save_job_state(state_path, new_job_state(scene_file, frame_ranges, chunk_size, by_frame, extra_args, render_command))
+    on_chunk_done = render_telemetry.chunk_recorder(scene_file) if telemetry else None
+    return run_render_job(state_path, max_workers, affinity, max_attempts, on_chunk_done=on_chunk_done)
+
+
+def parse_render_args(argv=None, description="Render a scene as parallel frame chunks."):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("scene", help="Maya scene to render.")
+    parser.add_argument("--start", type=int, help="First frame.")
+    parser.add_argument("--end", type=int, help="Last frame.")
+    parser.add_argument("--frames", default="", help="Frame ranges to render instead of start/end, e.g. 1001-1040,1090.")
+    parser.add_argument("--by", type=int, default=1, help="Render every nth frame.")
+    parser.add_argument("--workers", type=int, default=0, help=f"Render processes at once (0 = one per {DEFAULT_CORES_PER_RENDER} cores).")
+    parser.add_argument("--chunk-size", type=int, default=0, help="Frames per Render call (0 = size to the range).")
+    parser.add_argument("--attempts", type=int, default=MAX_ATTEMPTS, help="Tries per chunk before it is marked failed.")
+    parser.add_argument("--no-affinity", action="store_true", help="Let the OS place renders on any core.")
+    parser.add_argument("--resume", action="store_true", help="Continue this scene's job state file if there is one.")
+    parser.add_argument("--render-command", default="", help="Render command to run instead of Render, e.g. a stub.")
+    parser.add_argument("--render-args", default="", help="Extra Render flags, e.g. \"-r redshift -rd R:/renders\".")
+    args = parser.parse_args(argv)
+    if not args.frames and (args.start is None or args.end is None):
+        parser.error("give --start and --end, or --frames")
+    return args
+
+
+def main():
+    args = parse_render_args()
+    state = render_frames(
+        args.scene,
+        sequence_index.parse_ranges(args.frames) if args.frames else [[args.start, args.end]],
+        max_workers=args.workers or None,
+        chunk_size=args.chunk_size or None,
+        by_frame=args.by,
+        extra_args=shlex.split(args.render_args, posix=os.name != "nt"),
+        render_command=shlex.split(args.render_command, posix=os.name != "nt") or None,
+        resume=args.resume,
+        affinity=not args.no_affinity,
+        max_attempts=args.attempts,
+    )
+    sys.exit(1 if failed_ranges(state) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Stand-in for Maya's Render command, for testing the render scheduler without Maya.
+# Takes the same -s/-e/-b/-rd/-im flags, "renders" each frame by sleeping and
+# writing a tiny PNG, and prints a render log.
+#
+# JW_RENDER_STUB_SECONDS   seconds per frame (default 0.2)
+# JW_RENDER_STUB_FAIL      comma separated frames that crash the first time they render
+#
+# JW_RENDER_STUB_SIZE      image width and height in pixels (default 8)
+#
+# Each frame also prints Redshift style time, memory and texture cache lines
+# for render_telemetry to parse. A -preRender setting the Redshift threshold,
+# bucket size or a resolution scale (as the preset sweep does) changes the
+# image grain, size and render time the way a real render would.
+#
+# JW_RENDER_COMMAND="python render_stub.py" mayapy render_scheduler.py scene.mb --start 1 --end 40
+
+import argparse
+import math
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+STUB_FRAME_SIZE = 8
+STUB_THRESHOLD = 0.1
+STUB_BUCKET_SIZE = 128
+
+
+def write_png(path, frame, size=STUB_FRAME_SIZE, grain=0.0):
+    # Colour per frame, so frames differ, over a gradient, plus seeded grain
+    shade = frame % 256
+    rng = random.Random(frame)
+    rows = []
+    for y in range(size):
+        row = bytearray(b"\0")
+        for x in range(size):
+            offset = (x + y) * 64 // size + (int(rng.gauss(0, grain * 255)) if grain else 0)
+            row += bytes(min(255, max(0, value + offset)) for value in (shade, 255 - shade, 128))
+        rows.append(bytes(row))
+    pixels = zlib.compress(b"".join(rows))
+
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    with open(path, "wb") as handle:
+        handle.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b""))
+
+
+def _fails_now(scene_file, frame):
+    fail_frames = {int(value) for value in os.environ.get("JW_RENDER_STUB_FAIL", "").split(",") if value.strip()}
+    if frame not in fail_frames:
+        return False
+    # crc32 rather than hash(), which is salted per process and every attempt is a new stub
+    scene_key = zlib.crc32(os.path.abspath(scene_file).encode("utf-8"))
+    marker = os.path.join(tempfile.gettempdir(), f"render_stub_{scene_key:08x}_{frame}")
+    if os.path.exists(marker):
+        return False
+    open(marker, "w").close()
+    return True
+
+
+def _pre_render_settings(mel):
+    """
+    Return (threshold, bucket size, resolution scale) set by a -preRender script.
+    """
+    threshold = re.search(r"unifiedAdaptiveErrorThreshold\s+([\d.]+)", mel)
+    bucket_size = re.search(r"bucketSize\s+(\d+)", mel)
+    scale = re.search(r"defaultResolution\.width`\s*\*\s*([\d.]+)", mel)
+    return (
+        float(threshold.group(1)) if threshold else STUB_THRESHOLD,
+        int(bucket_size.group(1)) if bucket_size else STUB_BUCKET_SIZE,
+        float(scale.group(1)) if scale else 1.0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Maya Render for scheduler tests.")
+    parser.add_argument("-s", type=int, required=True)
+    parser.add_argument("-e", type=int, required=True)
+    parser.add_argument("-b", type=int, default=1)
+    parser.add_argument("-rd", default="")
+    parser.add_argument("-im", default="")
+    parser.add_argument("-r", default="")
+    parser.add_argument("-preRender", default="")
+    parser.add_argument("scene")
+    args, _ = parser.parse_known_args()
+
+    threshold, bucket_size, scale = _pre_render_settings(args.preRender)
+    size = max(1, round(int(os.environ.get("JW_RENDER_STUB_SIZE", STUB_FRAME_SIZE)) * scale))
+    # Lower thresholds and more pixels take longer; buckets far from 128 a little longer
+    seconds = float(os.environ.get("JW_RENDER_STUB_SECONDS", "0.2")) * scale * scale
+    seconds *= math.sqrt(STUB_THRESHOLD / max(threshold, 0.001)) * (1 + abs(math.log2(bucket_size / STUB_BUCKET_SIZE)) * 0.1)
+    image_name = args.im or os.path.splitext(os.path.basename(args.scene))[0]
+    render_dir = args.rd or os.path.join(os.path.dirname(os.path.abspath(args.scene)), "images")
+    os.makedirs(render_dir, exist_ok=True)
+
+    print(f"Starting stub render of {args.scene} frames {args.s}-{args.e} by {args.b}", flush=True)
+    for frame in range(args.s, args.e + 1, args.b):
+        started = time.perf_counter()
+        print(f"Rendering frame {frame}", flush=True)
+        time.sleep(seconds)
+        if _fails_now(args.scene, frame):
+            print(f"Fatal error: stub crash on frame {frame}", flush=True)
+            sys.exit(3)
+        output_path = os.path.join(render_dir, f"{image_name}.{frame:04d}.png")
+        write_png(output_path, frame, size, threshold * 0.1 if args.preRender else 0.0)
+        print(f"Saved file {output_path}", flush=True)
+        print(f"Rendering time: {time.perf_counter() - started:.2f}s (1 GPU(s) used)", flush=True)
+        print(f"Peak CPU memory: {1024 + frame % 64} MB", flush=True)
+        print(f"Texture cache: {900 + frame} hits, {frame % 7} misses", flush=True)
+        print(f"Textures read: {frame % 7 * 1.5:.1f} MB", flush=True)
+        print(f"Frame {frame} done in {time.perf_counter() - started:.2f}s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
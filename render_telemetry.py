@@ -0,0 +1,391 @@
+# Per-frame render telemetry.
+# Render logs (Maya/Redshift, or the scheduler's chunk logs) are parsed for each
+# frame's render time, peak memory and texture cache stats, and stored in a
+# local SQLite database keyed by shot and scene version (the vNNN token
+# versionUp.py bumps). A report compares two versions of a shot and flags the
+# frames that got slower.
+#
+# The log lines are matched by LOG_PATTERNS; adjust them there if a renderer
+# version words its stats differently, and check the result with
+# benchmarks/check_render_log_parser.py against its canned log.
+#
+# python render_telemetry.py record "S:/shots/sh010_v004.mb" render.log
+# python render_telemetry.py report sh010 --old 3 --new 4 --threshold 15
+
+import argparse
+import os
+import platform
+import re
+import sqlite3
+import tempfile
+import time
+
+TELEMETRY_DB = os.environ.get("JW_RENDER_TELEMETRY_DB") or os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "jw_render_telemetry.sqlite"
+)
+
+# Same version token versionUp.py increments
+VERSION_PATTERN = re.compile(r"v(\d+)", re.IGNORECASE)
+SEPARATOR_RUN_PATTERN = re.compile(r"[_\-. ]{2,}")
+
+DEFAULT_SLOWDOWN_PERCENT = 10.0
+
+LOG_PATTERNS = {
+    # A new frame starts; stats until the next one belong to it
+    "frame_start": re.compile(r"Rendering frame (\d+)"),
+    # The scheduler starts each attempt afresh in the same log
+    "attempt_start": re.compile(r"^=== attempt \d+"),
+    # Time lines naming their frame
+    "frame_time": re.compile(r"(?:Frame (\d+) done in|total time for frame (\d+):)\s*([\dhms:. ]+)"),
+    # Time lines for the current frame, e.g. Redshift's "Rendering time: 1m:12s (1 GPU(s) used)"
+    "render_time": re.compile(r"Rendering time:\s*([\dhms:. ]+)"),
+    "peak_memory": re.compile(r"[Pp]eak (?:\w+ )?memory\D*?([\d.]+)\s*([KMG]B)"),
+    "texture_cache": re.compile(r"[Tt]exture cache\D*?(\d+) hits\D*?(\d+) misses"),
+    "texture_read": re.compile(r"[Tt]extures? (?:read|loaded)\D*?([\d.]+)\s*([KMG]B)"),
+}
+
+MEGABYTES = {"KB": 1 / 1024, "MB": 1, "GB": 1024}
+
+
+def scene_version(scene_file):
+    """
+    Return (shot, version) for a scene: sh010_v004.mb gives ("sh010", 4) and
+    sh010_v004_lighting.mb gives ("sh010_lighting", 4). A scene without a
+    version token is version 1, as versionUp.py treats it.
+    """
+    name = os.path.splitext(os.path.basename(scene_file))[0]
+    match = VERSION_PATTERN.search(name)
+    if not match:
+        return name, 1
+    # Taking the token out leaves a separator on each side; keep the first
+    shot = SEPARATOR_RUN_PATTERN.sub(lambda run: run.group(0)[0], name[:match.start()] + name[match.end():])
+    return shot.strip("_-. ") or name, int(match.group(1))
+
+
+def parse_duration(text):
+    """
+    Parse render log durations such as 2.34s, 1m:12s, 1h 2m 3s or 00:01:12
+    into seconds. Returns None when the text isn't a duration.
+    """
+    text = text.strip()
+    units = re.findall(r"([\d.]+)\s*([hms])", text)
+    if units:
+        return sum(float(value) * {"h": 3600, "m": 60, "s": 1}[unit] for value, unit in units)
+    parts = text.split(":")
+    try:
+        values = [float(part) for part in parts]
+    except ValueError:
+        return None
+    seconds = 0.0
+    for value in values:
+        seconds = seconds * 60 + value
+    return seconds
+
+
+def _new_frame_stats():
+    return {"seconds": None, "peak_memory_mb": None, "texture_cache_hits": None,
+            "texture_cache_misses": None, "texture_read_mb": None}
+
+
+def _add(stats, key, value):
+    stats[key] = value if stats[key] is None else stats[key] + value
+
+
+def parse_render_log(lines):
+    """
+    Parse render log lines into {frame: stats}. A frame rendered more than
+    once in one attempt (one pass per render layer) adds up its time and
+    texture stats and keeps its highest memory; a later attempt replaces an
+    earlier one. Frames without a render time are left out.
+    """
+    frames = {}
+    attempt = {}
+    current = None
+    # Time of the current frame pass: a line naming the frame beats a generic one
+    pass_times = {}
+
+    def _stats(frame):
+        return attempt.setdefault(frame, _new_frame_stats())
+
+    def _close_pass():
+        seconds = pass_times.get("frame", pass_times.get("generic"))
+        if current is not None and seconds is not None:
+            _add(_stats(current), "seconds", seconds)
+        pass_times.clear()
+
+    for line in lines:
+        if LOG_PATTERNS["attempt_start"].match(line):
+            _close_pass()
+            frames.update(attempt)
+            attempt = {}
+            current = None
+            continue
+
+        match = LOG_PATTERNS["frame_start"].search(line)
+        if match:
+            _close_pass()
+            current = int(match.group(1))
+            continue
+
+        match = LOG_PATTERNS["frame_time"].search(line)
+        if match:
+            frame = int(match.group(1) or match.group(2))
+            seconds = parse_duration(match.group(3))
+            if seconds is None:
+                continue
+            if frame == current:
+                pass_times["frame"] = seconds
+            else:
+                _add(_stats(frame), "seconds", seconds)
+            continue
+        if current is None:
+            continue
+
+        match = LOG_PATTERNS["render_time"].search(line)
+        if match:
+            seconds = parse_duration(match.group(1))
+            if seconds is not None:
+                pass_times["generic"] = seconds
+            continue
+
+        match = LOG_PATTERNS["peak_memory"].search(line)
+        if match:
+            stats = _stats(current)
+            memory = float(match.group(1)) * MEGABYTES[match.group(2)]
+            stats["peak_memory_mb"] = max(stats["peak_memory_mb"] or 0.0, memory)
+            continue
+
+        match = LOG_PATTERNS["texture_cache"].search(line)
+        if match:
+            _add(_stats(current), "texture_cache_hits", int(match.group(1)))
+            _add(_stats(current), "texture_cache_misses", int(match.group(2)))
+            continue
+
+        match = LOG_PATTERNS["texture_read"].search(line)
+        if match:
+            _add(_stats(current), "texture_read_mb", float(match.group(1)) * MEGABYTES[match.group(2)])
+
+    _close_pass()
+    frames.update(attempt)
+    return {frame: stats for frame, stats in frames.items() if stats["seconds"] is not None}
+
+
+def parse_render_log_file(log_path):
+    with open(log_path, "r", encoding="utf-8", errors="replace") as handle:
+        return parse_render_log(handle)
+
+
+def connect(db_path=None):
+    db_path = db_path or TELEMETRY_DB
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS frames (
+            shot TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            frame INTEGER NOT NULL,
+            scene TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            peak_memory_mb REAL,
+            texture_cache_hits INTEGER,
+            texture_cache_misses INTEGER,
+            texture_read_mb REAL,
+            host TEXT,
+            recorded REAL NOT NULL,
+            PRIMARY KEY (shot, version, frame)
+        )
+        """
+    )
+    return connection
+
+
+def record_frames(scene_file, frame_stats, db_path=None):
+    """
+    Store parsed frame stats for scene_file, replacing any earlier numbers
+    for the same frames of the same version. Returns the number of frames.
+    """
+    if not frame_stats:
+        return 0
+    shot, version = scene_version(scene_file)
+    host = platform.node()
+    now = time.time()
+    rows = [
+        (shot, version, frame, os.path.abspath(scene_file), stats["seconds"], stats["peak_memory_mb"],
+         stats["texture_cache_hits"], stats["texture_cache_misses"], stats["texture_read_mb"], host, now)
+        for frame, stats in frame_stats.items()
+    ]
+    connection = connect(db_path)
+    try:
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def record_log(scene_file, log_path, frame_range=None, db_path=None):
+    """
+    Parse a render log and store its frames. With frame_range only frames
+    inside [start, end] are kept.
+    """
+    frame_stats = parse_render_log_file(log_path)
+    if frame_range:
+        frame_stats = {frame: stats for frame, stats in frame_stats.items() if frame_range[0] <= frame <= frame_range[1]}
+    return record_frames(scene_file, frame_stats, db_path)
+
+
+def chunk_recorder(scene_file, db_path=None):
+    """
+    Return an on_chunk_done callback for render_scheduler.run_render_job
+    that records each chunk's log as it exits. Telemetry problems are printed,
+    never raised into the render.
+    """
+    def _record(chunk):
+        if not chunk.get("log"):
+            return
+        try:
+            record_log(scene_file, chunk["log"], (chunk["start"], chunk["end"]), db_path)
+        except (OSError, sqlite3.Error) as exc:
+            print(f"Could not record render telemetry for {chunk['start']}-{chunk['end']}: {exc}")
+
+    return _record
+
+
+def shot_versions(shot, db_path=None):
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT version, COUNT(*), SUM(seconds), MAX(peak_memory_mb) FROM frames WHERE shot = ? "
+            "GROUP BY version ORDER BY version",
+            (shot,),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [
+        {"version": version, "frames": count, "seconds": total, "peak_memory_mb": memory}
+        for version, count, total, memory in rows
+    ]
+
+
+def compare_versions(shot, old_version, new_version, threshold_percent=DEFAULT_SLOWDOWN_PERCENT, db_path=None):
+    """
+    Compare the frames two versions of a shot both rendered. Returns a report
+    with per-frame rows, the frames more than threshold_percent slower, and
+    the total time of the shared frames for each version.
+    """
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            """
+            SELECT old.frame, old.seconds, new.seconds, old.peak_memory_mb, new.peak_memory_mb,
+                   old.texture_cache_misses, new.texture_cache_misses
+            FROM frames AS old JOIN frames AS new ON old.shot = new.shot AND old.frame = new.frame
+            WHERE old.shot = ? AND old.version = ? AND new.version = ?
+            ORDER BY old.frame
+            """,
+            (shot, old_version, new_version),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    frames = []
+    for frame, old_seconds, new_seconds, old_memory, new_memory, old_misses, new_misses in rows:
+        change = (new_seconds - old_seconds) / old_seconds * 100 if old_seconds else 0.0
+        frames.append({
+            "frame": frame,
+            "old_seconds": old_seconds,
+            "new_seconds": new_seconds,
+            "change_percent": change,
+            "old_memory_mb": old_memory,
+            "new_memory_mb": new_memory,
+            "old_texture_misses": old_misses,
+            "new_texture_misses": new_misses,
+        })
+    return {
+        "shot": shot,
+        "old_version": old_version,
+        "new_version": new_version,
+        "threshold_percent": threshold_percent,
+        "frames": frames,
+        "slower": [row for row in frames if row["change_percent"] > threshold_percent],
+        "old_seconds": sum(row["old_seconds"] for row in frames),
+        "new_seconds": sum(row["new_seconds"] for row in frames),
+    }
+
+
+def _format_memory(value):
+    return f"{value:.0f}MB" if value is not None else "-"
+
+
+def print_comparison(report):
+    shot, old_version, new_version = report["shot"], report["old_version"], report["new_version"]
+    if not report["frames"]:
+        print(f"{shot}: v{old_version} and v{new_version} have no frames in common")
+        return
+    total_change = (report["new_seconds"] - report["old_seconds"]) / report["old_seconds"] * 100 if report["old_seconds"] else 0.0
+    print(
+        f"{shot} v{old_version} -> v{new_version}: {len(report['frames'])} frame(s), "
+        f"{report['old_seconds']:.1f}s -> {report['new_seconds']:.1f}s ({total_change:+.1f}%)"
+    )
+    if not report["slower"]:
+        print(f"No frame is more than {report['threshold_percent']:g}% slower")
+        return
+    print(f"{len(report['slower'])} frame(s) more than {report['threshold_percent']:g}% slower:")
+    for row in report["slower"]:
+        print(
+            f"  {row['frame']:>6}  {row['old_seconds']:8.2f}s -> {row['new_seconds']:8.2f}s  {row['change_percent']:+6.1f}%  "
+            f"mem {_format_memory(row['old_memory_mb'])} -> {_format_memory(row['new_memory_mb'])}"
+        )
+
+
+def _shot_name(value):
+    # Accept a scene path as well as a bare shot name
+    if os.path.splitext(value)[1].lower() in (".ma", ".mb"):
+        return scene_version(value)[0]
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record per-frame render stats and compare scene versions.")
+    parser.add_argument("--db", default="", help=f"Telemetry database (default: {TELEMETRY_DB}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Parse render logs into the database.")
+    record_parser.add_argument("scene", help="Scene the logs rendered; its name gives the shot and version.")
+    record_parser.add_argument("logs", nargs="+", help="Render log files.")
+
+    report_parser = commands.add_parser("report", help="Compare two versions of a shot.")
+    report_parser.add_argument("shot", help="Shot name or a scene file of the shot.")
+    report_parser.add_argument("--old", type=int, help="Older version (default: second newest recorded).")
+    report_parser.add_argument("--new", type=int, help="Newer version (default: newest recorded).")
+    report_parser.add_argument("--threshold", type=float, default=DEFAULT_SLOWDOWN_PERCENT, help="Flag frames slower by more than this percent.")
+
+    versions_parser = commands.add_parser("versions", help="List a shot's recorded versions.")
+    versions_parser.add_argument("shot", help="Shot name or a scene file of the shot.")
+    args = parser.parse_args()
+    db_path = args.db or None
+
+    if args.command == "record":
+        for log_path in args.logs:
+            count = record_log(args.scene, log_path, db_path=db_path)
+            print(f"Recorded {count} frame(s) from {log_path}")
+    elif args.command == "report":
+        shot = _shot_name(args.shot)
+        versions = [row["version"] for row in shot_versions(shot, db_path)]
+        new_version = args.new if args.new is not None else (versions[-1] if versions else None)
+        older = [version for version in versions if new_version is not None and version < new_version]
+        old_version = args.old if args.old is not None else (older[-1] if older else None)
+        if old_version is None or new_version is None:
+            parser.error(f"{shot} needs two recorded versions to compare (has {versions})")
+        report = compare_versions(shot, old_version, new_version, args.threshold, db_path)
+        print_comparison(report)
+        raise SystemExit(1 if report["slower"] else 0)
+    else:
+        shot = _shot_name(args.shot)
+        for row in shot_versions(shot, db_path):
+            print(f"v{row['version']:<4} {row['frames']:>5} frame(s) {row['seconds']:10.1f}s  peak {_format_memory(row['peak_memory_mb'])}")
+
+
+if __name__ == "__main__":
+    main()
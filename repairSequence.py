@@ -0,0 +1,33 @@
+# Repair the render sequence(s) found from Maya's render settings before encoding:
+# hardlink byte-identical frames together and fill missing frames with hardlinks
+# to the previous frame. Prints the frames filled and the disk space reclaimed.
+
+import encode_engine
+import render_paths
+import sequence_repair
+
+
+def main(fill=True, dedupe=True, dry_run=False):
+    settings = render_paths.find_image_sequence_from_maya_settings()
+    sequence_specs = encode_engine.find_sequence_specs(
+        settings["search_root"],
+        settings["extension"],
+        settings["frame_padding"],
+        settings["dir_patterns"]
+    )
+    if not sequence_specs:
+        raise FileNotFoundError(
+            f"No image sequences found under {settings['search_root']} with extension {settings['extension']}"
+        )
+
+    reports = []
+    for sequence_spec in sequence_specs:
+        reports.append(sequence_repair.repair_sequence(sequence_spec, fill, dedupe, dry_run=dry_run))
+
+    total = sum(report["bytes_reclaimed"] for report in reports)
+    print(f"Repaired {len(reports)} sequence(s): {total / 1e6:.1f} MB reclaimed")
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+# Shared frame-sequence index for render folders.
+# Walks a folder once with os.scandir and groups numbered files into sequences
+# keyed by (dir, prefix, padding, ext). Frames are stored as run-length ranges.
+# Results are cached per search root and only directories whose mtime changed
+# are listed again on the next scan.
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+
+# Per-root index caches live locally so scans of shared drives aren't
+# written back to the render folders.
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "jw_sequence_index")
+CACHE_VERSION = 2
+MTIME_SETTLE_SECONDS = 2
+
+FRAME_FILE_PATTERN = re.compile(r"^(?P<prefix>.*?)(?P<frame>\d+)(?P<ext>\.[^.\d][^.]*)$")
+
+
+def normalize_extension(extension):
+    if not extension:
+        return ""
+    return "." + extension.lstrip(".").lower()
+
+
+def _add_frame(ranges, frame):
+    """
+    Append a frame to a range list. Returns False if the frame landed out of
+    order and the list needs normalize_ranges afterwards.
+    """
+    if ranges:
+        last_range = ranges[-1]
+        if frame == last_range[1] + 1:
+            last_range[1] = frame
+            return True
+        if frame > last_range[1] + 1:
+            ranges.append([frame, frame])
+            return True
+        ranges.append([frame, frame])
+        return False
+
+    ranges.append([frame, frame])
+    return True
+
+
+def normalize_ranges(ranges):
+    """
+    Sort and merge overlapping or touching [start, end] ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def frames_to_ranges(frames):
+    ranges = []
+    in_order = True
+    for frame in frames:
+        in_order = _add_frame(ranges, int(frame)) and in_order
+    if not in_order:
+        ranges = normalize_ranges(ranges)
+    return ranges
+
+
+def iter_frames(ranges):
+    for start, end in ranges:
+        for frame in range(start, end + 1):
+            yield frame
+
+
+def frame_count(ranges):
+    return sum(end - start + 1 for start, end in ranges)
+
+
+def first_frame(ranges):
+    return ranges[0][0] if ranges else None
+
+
+def last_frame(ranges):
+    return ranges[-1][1] if ranges else None
+
+
+def has_gaps(ranges):
+    return len(ranges) > 1
+
+
+def missing_ranges(ranges, start_frame=None, end_frame=None):
+    """
+    Return the gaps in a range list, optionally widened to start/end frame.
+    """
+    if start_frame is None:
+        start_frame = first_frame(ranges)
+    if end_frame is None:
+        end_frame = last_frame(ranges)
+    if start_frame is None or end_frame is None:
+        return []
+
+    missing = []
+    cursor = start_frame
+    for start, end in ranges:
+        if end < cursor:
+            continue
+        if start > end_frame:
+            break
+        if start > cursor:
+            missing.append([cursor, min(start - 1, end_frame)])
+        cursor = max(cursor, end + 1)
+
+    if cursor <= end_frame:
+        missing.append([cursor, end_frame])
+    return missing
+
+
+def format_ranges(ranges):
+    """
+    Format ranges as a compact string, e.g. 1001-1040,1042,1050-1060.
+    """
+    parts = []
+    for start, end in ranges:
+        parts.append(str(start) if start == end else "{}-{}".format(start, end))
+    return ",".join(parts)
+
+
+def parse_ranges(text):
+    """
+    Parse a format_ranges string like 1001-1040,1042 back into ranges.
+    """
+    ranges = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        ranges.append([int(start), int(end or start)])
+    return normalize_ranges(ranges)
+
+
+def sequence_pattern(sequence):
+    """
+    Return the printf-style file pattern ffmpeg expects, e.g. beauty.%04d.exr.
+    """
+    return "{}%0{}d{}".format(sequence["prefix"], sequence["padding"], sequence["extension"])
+
+
+def sequence_frame_path(sequence, frame):
+    filename = "{}{}{}".format(sequence["prefix"], str(frame).zfill(sequence["padding"]), sequence["extension"])
+    return os.path.join(sequence["input_dir"], filename)
+
+
+def _base_name_from_prefix(prefix):
+    return prefix.rstrip("._-") or prefix
+
+
+def _scan_directory(dir_path):
+    """
+    List one directory. Returns (subdir names, sequence records) or (None, None)
+    if the directory could not be read. Records are unfiltered
+    [prefix, padding, extension, frame_ranges] lists so they can be cached.
+    """
+    try:
+        entries = os.scandir(dir_path)
+    except OSError as exc:
+        print(f"Could not scan {dir_path}: {exc}")
+        return None, None
+
+    subdir_names = []
+    grouped_frames = {}
+    with entries:
+        for entry in entries:
+            # is_dir uses the cached dirent type, so this costs no extra stat
+            if entry.is_dir():
+                # Dot folders hold sidecars (proxies, segments, palettes), not renders
+                if not entry.name.startswith("."):
+                    subdir_names.append(entry.name)
+                continue
+
+            match = FRAME_FILE_PATTERN.match(entry.name)
+            if not match:
+                continue
+
+            frame_text = match.group("frame")
+            sequence_key = (match.group("prefix"), len(frame_text), match.group("ext"))
+            grouped = grouped_frames.get(sequence_key)
+            if grouped is None:
+                grouped = grouped_frames[sequence_key] = [[], True]
+
+            if not _add_frame(grouped[0], int(frame_text)):
+                grouped[1] = False
+
+    records = []
+    for (prefix, padding, extension), (frame_ranges, in_order) in grouped_frames.items():
+        if not in_order:
+            frame_ranges = normalize_ranges(frame_ranges)
+        records.append([prefix, padding, extension, frame_ranges])
+
+    subdir_names.sort()
+    return subdir_names, records
+
+
+def _record_matches(record, extensions, padding):
+    if padding and record[1] != padding:
+        return False
+    if extensions and record[2].lower() not in extensions:
+        return False
+    return True
+
+
+def _sequence_from_record(input_dir, record):
+    prefix, padding, extension, frame_ranges = record
+    return {
+        "input_dir": input_dir,
+        "prefix": prefix,
+        "base_name": _base_name_from_prefix(prefix),
+        "padding": padding,
+        "extension": extension,
+        "frame_ranges": frame_ranges,
+    }
+
+
+def cache_path_for_root(search_root):
+    root_key = os.path.normcase(os.path.abspath(search_root))
+    digest = hashlib.sha1(root_key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("dirs", {})
+
+
+def _save_cache(cache_path, search_root, cached_dirs):
+    data = {
+        "version": CACHE_VERSION,
+        "search_root": search_root,
+        "dirs": cached_dirs,
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(cache_path), suffix=".tmp", delete=False
+        ) as handle:
+            json.dump(data, handle, separators=(",", ":"))
+        os.replace(handle.name, cache_path)
+    except OSError as exc:
+        print(f"Could not write sequence index cache {cache_path}: {exc}")
+
+
+def clear_cache(search_root):
+    cache_path = cache_path_for_root(search_root)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+
+
+def _directory_entry(dir_path, cached_entry, use_cache):
+    """
+    Return (entry, rescanned) for one directory, reusing the cached entry when
+    the directory mtime has not changed.
+    """
+    mtime_ns = None
+    if use_cache:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None, False
+        if cached_entry and cached_entry["mtime_ns"] == mtime_ns:
+            return cached_entry, False
+
+    subdir_names, records = _scan_directory(dir_path)
+    if subdir_names is None:
+        return None, False
+
+    # A directory touched within the mtime resolution may change again without
+    # its mtime moving, so don't trust it on the next run.
+    if mtime_ns is not None and time.time_ns() - mtime_ns < MTIME_SETTLE_SECONDS * 1e9:
+        mtime_ns = None
+
+    return {"mtime_ns": mtime_ns, "subdirs": subdir_names, "sequences": records}, True
+
+
+def scan_sequences(search_root, extensions=None, padding=None, recursive=True, use_cache=True, dir_patterns=None):
+    """
+    Index every numbered file sequence under search_root in a single scandir pass.
+
+    extensions: optional iterable of extensions (with or without the dot) to keep.
+    padding: optional exact frame padding to keep.
+    use_cache: reuse the on-disk index for directories whose mtime is unchanged.
+    dir_patterns: optional compiled patterns, one per directory level below
+        search_root. Only subdirectories matching the pattern for their depth
+        are descended into; below the last pattern everything is walked.
+    """
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    extensions = {normalize_extension(extension) for extension in extensions} if extensions else None
+
+    search_root = os.path.abspath(search_root)
+    cache_path = cache_path_for_root(search_root) if use_cache else None
+    cached_dirs = _load_cache(cache_path) if cache_path else {}
+
+    visited_dirs = {}
+    cache_changed = False
+    sequences = []
+    pending_dirs = [(search_root, 0)]
+    while pending_dirs:
+        dir_path, depth = pending_dirs.pop()
+        entry, rescanned = _directory_entry(dir_path, cached_dirs.get(dir_path), use_cache)
+        if entry is None:
+            continue
+
+        cache_changed = cache_changed or rescanned
+        visited_dirs[dir_path] = entry
+        # Files above the last patterned level can't belong to the prefix
+        collect = not dir_patterns or depth >= len(dir_patterns)
+        for record in entry["sequences"] if collect else ():
+            if _record_matches(record, extensions, padding):
+                sequences.append(_sequence_from_record(dir_path, record))
+
+        if recursive:
+            subdir_names = entry["subdirs"]
+            if dir_patterns and depth < len(dir_patterns):
+                subdir_names = [name for name in subdir_names if dir_patterns[depth].match(name)]
+            pending_dirs.extend((os.path.join(dir_path, name), depth + 1) for name in reversed(subdir_names))
+
+    if cache_path:
+        if recursive and not dir_patterns:
+            # Drop directories that no longer exist under the root
+            cache_changed = cache_changed or visited_dirs.keys() != cached_dirs.keys()
+        else:
+            # Partial walks keep the entries for directories they skipped
+            cached_dirs.update(visited_dirs)
+            visited_dirs = cached_dirs
+        if cache_changed:
+            _save_cache(cache_path, search_root, visited_dirs)
+
+    sequences.sort(key=lambda item: (os.path.normcase(item["input_dir"]), os.path.normcase(item["prefix"])))
+    return sequences
+
+
+def find_sequence(sequences, input_dir, base_name):
+    normalized_dir = os.path.normcase(os.path.normpath(input_dir))
+    normalized_base = os.path.normcase(base_name)
+    for sequence in sequences:
+        if os.path.normcase(sequence["input_dir"]) != normalized_dir:
+            continue
+        if os.path.normcase(sequence["base_name"]) == normalized_base:
+            return sequence
+    return None
+
+
+def find_sequence_for_file(path):
+    """
+    Return the sequence the given frame file belongs to, or None if the name
+    has no trailing frame digits.
+    """
+    folder, filename = os.path.split(os.path.normpath(path))
+    match = FRAME_FILE_PATTERN.match(filename)
+    if not match:
+        return None
+
+    sequences = scan_sequences(
+        folder or os.curdir,
+        extensions=[match.group("ext")],
+        padding=len(match.group("frame")),
+        recursive=False,
+    )
+    prefix = os.path.normcase(match.group("prefix"))
+    for sequence in sequences:
+        if os.path.normcase(sequence["prefix"]) == prefix:
+            return sequence
+    return None
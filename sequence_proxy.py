@@ -0,0 +1,160 @@
+# Proxy resolution pyramid for heavy image sequences.
+# Writes half and quarter resolution copies of a sequence into sibling
+# .proxy_<level> folders with the same file names, so a file node can be
+# switched between proxy and full resolution by swapping its folder.
+# Frames are split into chunks across parallel ffmpeg processes, each decoding
+# its chunk once and writing every level.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import encode_engine
+import sequence_index
+import video_extract
+
+# Level name to downscale factor
+PROXY_LEVELS = {
+    "half": 2,
+    "quarter": 4,
+}
+PROXY_DIR_PREFIX = ".proxy_"
+
+# Proxies are rebuilt often and only feed the viewport
+PROXY_PNG_PRESET = "fast"
+
+# Smaller chunks keep every worker busy when only a few frames are stale
+MIN_FRAMES_PER_CHUNK = 16
+
+
+def proxy_dir_for(input_dir, level):
+    return os.path.join(input_dir, PROXY_DIR_PREFIX + level)
+
+
+def proxy_path_for(path, level):
+    """
+    Return the proxy for a full resolution frame or pattern path. level
+    "full" returns the full resolution path for either.
+    """
+    folder, filename = os.path.split(path)
+    if os.path.basename(folder).startswith(PROXY_DIR_PREFIX):
+        folder = os.path.dirname(folder)
+    if level == "full":
+        return os.path.join(folder, filename)
+    return os.path.join(proxy_dir_for(folder, level), filename)
+
+
+def stale_frames(sequence_spec, levels):
+    """
+    Return the frames whose proxy is missing or older than the source in any level.
+    """
+    source_stats = encode_engine.frame_stats(sequence_spec)
+    level_stats = {}
+    for level in levels:
+        proxy_dir = proxy_dir_for(sequence_spec["input_dir"], level)
+        level_stats[level] = encode_engine.frame_stats(dict(sequence_spec, input_dir=proxy_dir)) if os.path.isdir(proxy_dir) else {}
+
+    frames = []
+    for frame in sequence_index.iter_frames(sequence_spec["frame_ranges"]):
+        filename = os.path.basename(sequence_index.sequence_frame_path(sequence_spec, frame))
+        source_mtime = source_stats.get(filename, (0, 0))[1]
+        for level in levels:
+            proxy_stat = level_stats[level].get(filename)
+            if not proxy_stat or proxy_stat[1] < source_mtime:
+                frames.append(frame)
+                break
+    return frames
+
+
+def split_chunks(frame_ranges, chunk_count):
+    """
+    Cut contiguous frame ranges into about chunk_count [start, end] pieces.
+    """
+    total = sequence_index.frame_count(frame_ranges)
+    chunk_size = max(MIN_FRAMES_PER_CHUNK, -(-total // max(1, chunk_count)))
+    chunks = []
+    for start_frame, end_frame in frame_ranges:
+        for chunk_start in range(start_frame, end_frame + 1, chunk_size):
+            chunks.append([chunk_start, min(chunk_start + chunk_size - 1, end_frame)])
+    return chunks
+
+
+def build_proxy_command(sequence_spec, chunk, levels, threads=None):
+    chunk_start, chunk_end = chunk
+    pattern = sequence_index.sequence_pattern(sequence_spec)
+    command = [
+        "ffmpeg", "-y",
+        "-start_number", str(chunk_start),
+        "-i", os.path.join(sequence_spec["input_dir"], pattern).replace("\\", "/"),
+    ]
+    if threads:
+        command += ["-filter_complex_threads", str(threads)]
+
+    if len(levels) > 1:
+        source_labels = "".join(f"[src{index}]" for index in range(len(levels)))
+        filter_parts = [f"[0:v]split={len(levels)}{source_labels}"]
+    else:
+        filter_parts = []
+    for index, level in enumerate(levels):
+        source = f"[src{index}]" if len(levels) > 1 else "[0:v]"
+        factor = PROXY_LEVELS[level]
+        filter_parts.append(f"{source}scale=trunc(iw/{factor}/2)*2:trunc(ih/{factor}/2)*2:flags=area[out{index}]")
+    command += ["-filter_complex", ";".join(filter_parts)]
+
+    for index, level in enumerate(levels):
+        command += ["-map", f"[out{index}]", "-frames:v", str(chunk_end - chunk_start + 1)]
+        if sequence_spec["extension"].lower() == ".png":
+            command += video_extract.PNG_COMPRESSION_PRESETS[PROXY_PNG_PRESET]
+        if threads:
+            command += ["-threads", str(threads)]
+        command += [
+            "-start_number", str(chunk_start),
+            os.path.join(proxy_dir_for(sequence_spec["input_dir"], level), pattern).replace("\\", "/"),
+        ]
+    return command
+
+
+def build_proxies(sequence_spec, levels=("half", "quarter"), max_jobs=None, force=False):
+    """
+    Bring every proxy level of a sequence up to date, rebuilding only frames
+    whose source is newer than the proxy unless force is set.
+    Returns {level: proxy sequence spec}.
+    """
+    levels = list(levels)
+    for level in levels:
+        if level not in PROXY_LEVELS:
+            raise ValueError(f"Unknown proxy level {level}. Choose from {', '.join(PROXY_LEVELS)}")
+        os.makedirs(proxy_dir_for(sequence_spec["input_dir"], level), exist_ok=True)
+
+    if force:
+        frame_ranges = sequence_spec["frame_ranges"]
+    else:
+        frame_ranges = sequence_index.frames_to_ranges(stale_frames(sequence_spec, levels))
+
+    if frame_ranges:
+        cpu_count = os.cpu_count() or 1
+        chunks = split_chunks(frame_ranges, max_jobs or cpu_count)
+        worker_count, threads_per_job = encode_engine.plan_parallel_jobs(len(chunks), max_jobs or cpu_count)
+        print(
+            f"Building {', '.join(levels)} proxies for {sequence_index.frame_count(frame_ranges)} frame(s) of "
+            f"{sequence_spec['base_name']} with {worker_count} job(s)"
+        )
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [
+                encode_engine.submit_with_context(
+                    executor,
+                    encode_engine.run_ffmpeg,
+                    build_proxy_command(sequence_spec, chunk, levels, threads_per_job if worker_count > 1 else None),
+                    f"{sequence_spec['base_name']} proxies {chunk[0]}-{chunk[1]}",
+                    chunk[1] - chunk[0] + 1,
+                )
+                for chunk in chunks
+            ]
+            for future in futures:
+                future.result()
+    else:
+        print(f"Proxies for {sequence_spec['base_name']} are up to date")
+
+    return {
+        level: dict(sequence_spec, input_dir=proxy_dir_for(sequence_spec["input_dir"], level))
+        for level in levels
+    }
@@ -0,0 +1,276 @@
+# Repair image sequences in place without copying frame data.
+# Collapses byte-identical frames into hardlinks of one file so held frames of
+# static shots stop taking disk space, and fills missing frame numbers with
+# hardlinks to the nearest earlier frame (symlink, then copy, where hardlinks
+# are not supported) so encoders see an unbroken sequence.
+# Linked frames share their bytes: delete a frame before re-rendering it rather
+# than letting a renderer overwrite it in place.
+# Filled frames are recorded in a .<sequence>.filled.json file beside the
+# sequence so render_resume still renders them for real.
+#
+# python sequence_repair.py "R:/renders/shot010" --dry-run
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import sequence_index
+
+HASH_BLOCK_BYTES = 1024 * 1024
+LINK_TEMP_SUFFIX = ".repair_tmp"
+FILLED_RECORD_VERSION = 1
+
+
+def link_frame(source_path, target_path):
+    """
+    Make target_path show source_path's frame and return how: "hardlink",
+    "symlink" or "copy".
+    """
+    try:
+        os.link(source_path, target_path)
+        return "hardlink"
+    except (OSError, AttributeError, NotImplementedError):
+        pass
+
+    try:
+        # Relative, so the sequence folder can move as a whole
+        os.symlink(os.path.relpath(source_path, os.path.dirname(target_path)), target_path)
+        return "symlink"
+    except (OSError, AttributeError, NotImplementedError):
+        pass
+
+    shutil.copy2(source_path, target_path)
+    return "copy"
+
+
+def filled_record_path(sequence_spec):
+    # e.g. .beauty.####.exr.filled.json, one per sequence so layers don't share it
+    name = f"{sequence_spec['prefix']}{'#' * sequence_spec['padding']}{sequence_spec['extension']}"
+    return os.path.join(sequence_spec["input_dir"], f".{name}.filled.json")
+
+
+def _frame_signature(path):
+    try:
+        frame_stat = os.stat(path)
+    except OSError:
+        return None
+    return [frame_stat.st_size, frame_stat.st_mtime_ns]
+
+
+def load_filled_frames(sequence_spec):
+    """
+    Return {frame: source_frame} for the frames fill_gaps linked that are
+    still those links. A frame rendered since has a new size or mtime and no
+    longer counts.
+    """
+    try:
+        with open(filled_record_path(sequence_spec), "r", encoding="utf-8") as handle:
+            record = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if record.get("version") != FILLED_RECORD_VERSION:
+        return {}
+
+    filled = {}
+    for frame_text, (source_frame, size, mtime_ns) in record.get("frames", {}).items():
+        frame = int(frame_text)
+        if _frame_signature(sequence_index.sequence_frame_path(sequence_spec, frame)) == [size, mtime_ns]:
+            filled[frame] = source_frame
+    return filled
+
+
+def record_filled_frames(sequence_spec, filled):
+    """
+    Add [(frame, source_frame, method)] from fill_gaps to the sequence's
+    filled record, dropping entries for frames rendered since.
+    """
+    frames = {
+        str(frame): [source_frame] + _frame_signature(sequence_index.sequence_frame_path(sequence_spec, frame))
+        for frame, source_frame in load_filled_frames(sequence_spec).items()
+    }
+    for frame, source_frame, _ in filled:
+        signature = _frame_signature(sequence_index.sequence_frame_path(sequence_spec, frame))
+        if signature:
+            frames[str(frame)] = [source_frame] + signature
+
+    record_path = filled_record_path(sequence_spec)
+    if not frames:
+        if os.path.exists(record_path):
+            os.remove(record_path)
+        return
+    temp_path = record_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump({"version": FILLED_RECORD_VERSION, "frames": frames}, handle, indent=2)
+    os.replace(temp_path, record_path)
+
+
+def fill_gaps(sequence_spec, start_frame=None, end_frame=None, dry_run=False):
+    """
+    Fill every missing frame between start_frame and end_frame (the sequence's
+    own first and last frame by default). Frames before the first rendered
+    frame take the first one, and every filled frame is recorded for
+    load_filled_frames. Returns [(frame, source_frame, method)].
+    """
+    frame_ranges = sequence_spec["frame_ranges"]
+    if not frame_ranges:
+        return []
+    if start_frame is None:
+        start_frame = sequence_index.first_frame(frame_ranges)
+    if end_frame is None:
+        end_frame = sequence_index.last_frame(frame_ranges)
+
+    existing = list(sequence_index.iter_frames(frame_ranges))
+    filled = []
+    for gap_start, gap_end in sequence_index.missing_ranges(frame_ranges, start_frame, end_frame):
+        earlier = [frame for frame in existing if frame < gap_start]
+        source_frame = earlier[-1] if earlier else existing[0]
+        source_path = sequence_index.sequence_frame_path(sequence_spec, source_frame)
+        for frame in range(gap_start, gap_end + 1):
+            method = "dry run"
+            if not dry_run:
+                method = link_frame(source_path, sequence_index.sequence_frame_path(sequence_spec, frame))
+            filled.append((frame, source_frame, method))
+    if filled and not dry_run:
+        record_filled_frames(sequence_spec, filled)
+    return filled
+
+
+def _hash_file(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_duplicate_frames(sequence_spec, max_workers=None):
+    """
+    Return [[frame, ...]] groups of frames with identical bytes, lowest frame
+    first. Only frames sharing a size are hashed, and frames that are already
+    links of one file are hashed once.
+    """
+    frames_by_file = {}
+    for frame in sequence_index.iter_frames(sequence_spec["frame_ranges"]):
+        frame_path = sequence_index.sequence_frame_path(sequence_spec, frame)
+        try:
+            frame_stat = os.stat(frame_path)
+        except OSError:
+            continue
+        frames_by_file.setdefault((frame_stat.st_dev, frame_stat.st_ino, frame_stat.st_size), []).append(frame)
+
+    files_by_size = {}
+    for file_key in frames_by_file:
+        files_by_size.setdefault(file_key[2], []).append(file_key)
+    to_hash = [file_key for file_keys in files_by_size.values() if len(file_keys) > 1 for file_key in file_keys]
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        digests = executor.map(
+            _hash_file,
+            [sequence_index.sequence_frame_path(sequence_spec, frames_by_file[file_key][0]) for file_key in to_hash],
+        )
+        frames_by_digest = {}
+        for file_key, digest in zip(to_hash, digests):
+            frames_by_digest.setdefault((file_key[2], digest), []).extend(frames_by_file[file_key])
+
+    return sorted(sorted(frames) for frames in frames_by_digest.values() if len(frames) > 1)
+
+
+def dedupe_frames(sequence_spec, max_workers=None, dry_run=False):
+    """
+    Replace duplicate frames with hardlinks to the first frame of their group.
+    Returns (frames relinked, bytes reclaimed). Bytes only count when the
+    replaced file had no other links keeping its data alive.
+    """
+    relinked = 0
+    reclaimed = 0
+    for frames in find_duplicate_frames(sequence_spec, max_workers):
+        keep_path = sequence_index.sequence_frame_path(sequence_spec, frames[0])
+        keep_stat = os.stat(keep_path)
+        for frame in frames[1:]:
+            frame_path = sequence_index.sequence_frame_path(sequence_spec, frame)
+            frame_stat = os.stat(frame_path)
+            if (frame_stat.st_dev, frame_stat.st_ino) == (keep_stat.st_dev, keep_stat.st_ino):
+                continue
+
+            if not dry_run:
+                temp_path = frame_path + LINK_TEMP_SUFFIX
+                try:
+                    os.link(keep_path, temp_path)
+                except (OSError, AttributeError, NotImplementedError) as exc:
+                    print(f"Hardlinks are not supported for {sequence_spec['input_dir']}, skipping dedupe: {exc}")
+                    return relinked, reclaimed
+                os.replace(temp_path, frame_path)
+
+            relinked += 1
+            # Another link to the old file (an earlier dedupe group) keeps its bytes
+            if frame_stat.st_nlink == 1:
+                reclaimed += frame_stat.st_size
+    return relinked, reclaimed
+
+
+def repair_sequence(sequence_spec, fill=True, dedupe=True, start_frame=None, end_frame=None,
+                    max_workers=None, dry_run=False):
+    """
+    Dedupe, then fill gaps, so filled frames link to the surviving copy.
+    Returns a report dict and prints a summary.
+    """
+    report = {"base_name": sequence_spec["base_name"], "filled": [], "relinked": 0, "bytes_reclaimed": 0}
+    if dedupe:
+        report["relinked"], report["bytes_reclaimed"] = dedupe_frames(sequence_spec, max_workers, dry_run)
+    if fill:
+        report["filled"] = fill_gaps(sequence_spec, start_frame, end_frame, dry_run)
+
+    prefix = "Would repair" if dry_run else "Repaired"
+    methods = {}
+    for _, _, method in report["filled"]:
+        methods[method] = methods.get(method, 0) + 1
+    filled_text = "no gaps"
+    if report["filled"]:
+        filled_frames = sequence_index.frames_to_ranges([frame for frame, _, _ in report["filled"]])
+        method_text = ", ".join(f"{count} {method}" for method, count in sorted(methods.items()))
+        filled_text = f"filled {sequence_index.format_ranges(filled_frames)} ({method_text})"
+    print(
+        f"{prefix} {sequence_spec['base_name']}: {filled_text}; "
+        f"{report['relinked']} duplicate frame(s) hardlinked, {report['bytes_reclaimed'] / 1e6:.1f} MB reclaimed"
+    )
+    return report
+
+
+def repair_folder(folder, extensions=None, recursive=False, **kwargs):
+    """
+    Repair every sequence found in folder. Returns the reports.
+    """
+    sequences = sequence_index.scan_sequences(folder, extensions=extensions, recursive=recursive, use_cache=False)
+    reports = [repair_sequence(sequence_spec, **kwargs) for sequence_spec in sequences]
+    total = sum(report["bytes_reclaimed"] for report in reports)
+    print(f"{len(reports)} sequence(s) in {folder}: {total / 1e6:.1f} MB reclaimed")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill sequence gaps and hardlink duplicate frames without copying data.")
+    parser.add_argument("folders", nargs="+", help="Folders holding image sequences.")
+    parser.add_argument("--extensions", default="", help="Comma separated extensions to repair (default: all).")
+    parser.add_argument("--recursive", action="store_true", help="Also repair sequences in subfolders.")
+    parser.add_argument("--no-fill", action="store_true", help="Leave gaps alone.")
+    parser.add_argument("--no-dedupe", action="store_true", help="Leave duplicate frames alone.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching files.")
+    args = parser.parse_args()
+
+    extensions = [value.strip() for value in args.extensions.split(",") if value.strip()] or None
+    for folder in args.folders:
+        repair_folder(
+            folder,
+            extensions,
+            args.recursive,
+            fill=not args.no_fill,
+            dedupe=not args.no_dedupe,
+            dry_run=args.dry_run,
+        )
+
+
+if __name__ == "__main__":
+    main()
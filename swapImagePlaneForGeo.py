@@ -1,6 +1,9 @@
 import maya.cmds as cmds  # type: ignore
 import maya.api.OpenMaya as om  # type: ignore
 
+import frame_cache
+import sequence_index
+
 
 MM_PER_INCH = 25.4
 FIT_FILL = 0
@@ -447,6 +450,29 @@ def _get_connected_source_file(image_plane_shape):
     return None
 
 
+def _cache_video_frames(video_path, image_plane_shape):
+    # File nodes can't read movies, so extract just the frames the playback
+    # range shows into the shared frame cache and point at those instead.
+    # Returns None if the clip can't be cached.
+    frame_offset = int(_get_attr(image_plane_shape, "frameOffset", 0) or 0)
+    start_frame = int(cmds.playbackOptions(query=True, minTime=True)) + frame_offset
+    end_frame = int(cmds.playbackOptions(query=True, maxTime=True)) + frame_offset
+
+    try:
+        # Clips shorter than the timeline, or offset past it, only have some
+        # (or none) of those frames; keep to the ones that exist
+        frame_count = frame_cache.video_frame_count(video_path)
+        start_frame = min(max(1, start_frame), frame_count)
+        end_frame = min(max(start_frame, end_frame), frame_count)
+
+        print("Extracting frames {}-{} of {} into the frame cache".format(start_frame, end_frame, video_path))
+        sequence = frame_cache.extract_frames(video_path, start_frame, end_frame)
+    except (OSError, RuntimeError, ValueError) as exc:
+        cmds.warning("Could not cache frames of {}, using the image plane path: {}".format(video_path, exc))
+        return None
+    return sequence_index.sequence_frame_path(sequence, start_frame)
+
+
 def _copy_image_source(image_plane_shape, file_node):
     source_file = _get_connected_source_file(image_plane_shape)
 
@@ -467,6 +493,12 @@ def _copy_image_source(image_plane_shape, file_node):
             return "source_file"
 
     image_name = _get_attr(image_plane_shape, "imageName", "")
+    if image_name and frame_cache.is_video_file(image_name):
+        cached_frame = _cache_video_frames(image_name, image_plane_shape)
+        if cached_frame:
+            cmds.setAttr(file_node + ".fileTextureName", cached_frame, type="string")
+            return "video_cache"
+
     if image_name:
         cmds.setAttr(file_node + ".fileTextureName", image_name, type="string")
         return "image_plane"
@@ -511,9 +543,13 @@ def _build_redshift_network(base_name, image_plane_shape, visible_plane):
     if image_source_mode != "source_file" and cmds.attributeQuery("frameExtension", node=image_plane_shape, exists=True):
         _copy_value_or_connection(image_plane_shape + ".frameExtension", file_node + ".frameExtension")
 
+    if image_source_mode == "video_cache":
+        # Movie planes step through frames without useFrameExtension; the cached PNGs need it
+        cmds.setAttr(file_node + ".useFrameExtension", 1)
+
     if cmds.attributeQuery("frameCache", node=image_plane_shape, exists=True) and cmds.attributeQuery("useCache", node=file_node, exists=True):
-        frame_cache = int(cmds.getAttr(image_plane_shape + ".frameCache"))
-        cmds.setAttr(file_node + ".useCache", frame_cache > 0)
+        frame_cache_size = int(cmds.getAttr(image_plane_shape + ".frameCache"))
+        cmds.setAttr(file_node + ".useCache", frame_cache_size > 0)
         if not cmds.attributeQuery("sourceImagePlaneFrameCache", node=file_node, exists=True):
             cmds.addAttr(
                 file_node,
@@ -521,7 +557,7 @@ def _build_redshift_network(base_name, image_plane_shape, visible_plane):
                 attributeType="long",
                 keyable=True,
             )
-        cmds.setAttr(file_node + ".sourceImagePlaneFrameCache", frame_cache)
+        cmds.setAttr(file_node + ".sourceImagePlaneFrameCache", frame_cache_size)
 
     cmds.connectAttr(file_node + ".outColor", material + ".diffuse_color", force=True)
     cmds.connectAttr(file_node + ".outColor", material + ".emission_color", force=True)
@@ -0,0 +1,25 @@
+# Check every frame of the render sequence(s) found from Maya's render settings
+# for truncation, corruption and size mismatches. Prints the frames to re-render.
+
+import encode_engine
+import frame_validate
+import render_paths
+
+
+def main():
+    settings = render_paths.find_image_sequence_from_maya_settings()
+    sequence_specs = encode_engine.find_sequence_specs(
+        settings["search_root"],
+        settings["extension"],
+        settings["frame_padding"],
+        settings["dir_patterns"]
+    )
+    if not sequence_specs:
+        raise FileNotFoundError(
+            f"No image sequences found under {settings['search_root']} with extension {settings['extension']}"
+        )
+    return frame_validate.validate_sequences(sequence_specs, settings["start_frame"], settings["end_frame"])
+
+
+if __name__ == "__main__":
+    main()
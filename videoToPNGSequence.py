@@ -4,7 +4,14 @@ import os
 import subprocess
 import maya.cmds as cmds # type: ignore
 
-def main():
+import encode_jobs
+import video_extract
+
+def main(preset=video_extract.DEFAULT_PNG_PRESET, workers=None):
+    """
+    preset trades PNG size for speed (see video_extract.PNG_COMPRESSION_PRESETS).
+    workers None splits the clip across the machine's cores; 1 runs one ffmpeg.
+    """
     # Prompt user for a .mov or .mp4 file using Maya's file dialog
     file_filter = "Video Files (*.mov *.mp4)"
     video_file = cmds.fileDialog2(fileFilter=file_filter, dialogStyle=2, fileMode=1)
@@ -17,34 +24,23 @@ def main():
     base_dir = os.path.dirname(video_file)
     base_name = os.path.splitext(os.path.basename(video_file))[0]
     output_dir = os.path.join(base_dir, base_name)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # Build ffmpeg command to extract PNG sequence
-    # Modified: include movie name as prefix, output PNG, scale resolution by half, and set compression level
-    output_pattern = os.path.join(output_dir, f"{base_name}_%04d.png") # Changed extension to .png
-    command = [
-        "ffmpeg",
-        "-y",                   # Overwrite output files without asking
-        "-i", video_file,       # Input video file
-        "-vf", "scale=iw/2:ih/2", # Scale video to half width and height
-        "-compression_level", "100", # Set PNG compression level (0-100, 100=max)
-        output_pattern         # Output naming pattern (now PNG)
-    ]
-    
-    # Ensure ffmpeg is in PATH
-    env = os.environ.copy()
-    env["PATH"] += os.pathsep + "C:/ffmpeg/ffmpeg-master-latest-win64-gpl/bin"  # Adjust ffmpeg path as needed
-    
-    # Execute the ffmpeg command
-    print("Running command:", " ".join(command))
-    result = subprocess.run(command, shell=True, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    print("FFmpeg Output:\n", result.stdout)
-    print("FFmpeg Errors:\n", result.stderr)
-    if result.returncode != 0:
-        cmds.warning("FFmpeg conversion failed.")
-        return
     
+    # Extract <movie name>_%04d.png at half resolution, split by time across worker processes.
+    # Run it as a background job so Maya stays usable while it extracts
+    encode_jobs.submit_job(
+        base_name,
+        video_extract.extract_png_sequence,
+        video_file,
+        output_dir,
+        base_name,
+        preset,
+        workers=workers,
+        on_complete=lambda _: open_output_dir(output_dir),
+        on_error=lambda exc: cmds.warning(f"FFmpeg conversion failed: {exc}")
+    )
+
+
+def open_output_dir(output_dir):
     # Open the output directory in Explorer
     subprocess.run(["explorer", os.path.normpath(output_dir)])
     
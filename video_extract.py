@@ -0,0 +1,138 @@
+# Parallel video to PNG sequence extraction.
+# Splits the clip into frame-accurate time ranges and runs one ffmpeg per
+# range, each seeking with -ss and numbering its frames into the same sequence,
+# so PNG compression is spread across cores instead of one encoder thread.
+
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import encode_engine
+
+# Speed versus size for the PNG encoder. zlib level is clamped to 0-9 and
+# pred picks the per-row filter; mixed tries every filter on every row.
+PNG_COMPRESSION_PRESETS = {
+    "fast": ["-compression_level", "1", "-pred", "none"],
+    "balanced": ["-compression_level", "6", "-pred", "paeth"],
+    "small": ["-compression_level", "9", "-pred", "mixed"],
+}
+DEFAULT_PNG_PRESET = "balanced"
+
+# Default resize for animated textures and image planes
+DEFAULT_SCALE = "iw/2:ih/2"
+
+# Below this many frames per worker the extra seeks cost more than they save
+MIN_FRAMES_PER_WORKER = 24
+
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+FPS_PATTERN = re.compile(r"Video:.*?, (\d+(?:\.\d+)?) (?:fps|tbr)")
+
+# ffmpeg prints NTSC rates rounded; seeks drift on long clips without the exact value
+NTSC_RATES = {
+    23.98: 24000 / 1001,
+    29.97: 30000 / 1001,
+    47.95: 48000 / 1001,
+    59.94: 60000 / 1001,
+    119.88: 120000 / 1001,
+}
+
+
+def probe_video(video_file):
+    """
+    Return (duration_seconds, fps) parsed from ffmpeg's stream summary.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", video_file],
+        env=encode_engine.get_ffmpeg_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    duration_match = DURATION_PATTERN.search(result.stderr)
+    fps_match = FPS_PATTERN.search(result.stderr)
+    if not duration_match or not fps_match:
+        raise ValueError(f"Could not read duration and frame rate from {video_file}")
+
+    hours, minutes, seconds = duration_match.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    fps = float(fps_match.group(1))
+    return duration, NTSC_RATES.get(fps, fps)
+
+
+def split_frames(frame_count, worker_count):
+    """
+    Split frame indices 0..frame_count-1 into worker_count [start, end] ranges.
+    """
+    chunk_size = -(-frame_count // worker_count)
+    return [
+        [start, min(start + chunk_size, frame_count) - 1]
+        for start in range(0, frame_count, chunk_size)
+    ]
+
+
+def build_extract_command(video_file, output_pattern, fps, chunk, start_number, preset, scale, is_last, threads=None):
+    chunk_start, chunk_end = chunk
+    command = ["ffmpeg", "-y"]
+    if chunk_start:
+        # Seek half a frame early so timestamp rounding can't skip the first frame;
+        # input -ss decodes from the previous keyframe and drops frames before it
+        command += ["-ss", f"{(chunk_start - 0.5) / fps:.6f}"]
+    command += ["-i", video_file]
+    if scale:
+        command += ["-vf", f"scale={scale}"]
+    # The last chunk runs to the end in case the probed frame count is short
+    if not is_last:
+        command += ["-frames:v", str(chunk_end - chunk_start + 1)]
+    # Write decoded frames as-is; the image muxer must not drop or duplicate any
+    command += ["-fps_mode", "passthrough"]
+    command += PNG_COMPRESSION_PRESETS[preset]
+    if threads:
+        command += ["-threads", str(threads)]
+    command += ["-start_number", str(start_number + chunk_start), output_pattern]
+    return command
+
+
+def extract_png_sequence(video_file, output_dir, base_name=None, preset=DEFAULT_PNG_PRESET, scale=DEFAULT_SCALE,
+                         workers=None, start_number=1):
+    """
+    Extract every frame of video_file to output_dir/<base_name>_%04d.png.
+    workers None sizes the pool to the machine; 1 runs a single ffmpeg.
+    Returns the output pattern.
+    """
+    if preset not in PNG_COMPRESSION_PRESETS:
+        raise ValueError(f"Unknown PNG preset {preset}. Choose from {', '.join(PNG_COMPRESSION_PRESETS)}")
+
+    base_name = base_name or os.path.splitext(os.path.basename(video_file))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    output_pattern = os.path.join(output_dir, f"{base_name}_%04d.png").replace("\\", "/")
+
+    duration, fps = probe_video(video_file)
+    frame_count = max(1, round(duration * fps))
+    max_workers = max(1, frame_count // MIN_FRAMES_PER_WORKER)
+    if workers:
+        max_workers = min(max_workers, workers)
+    worker_count, threads_per_job = encode_engine.plan_parallel_jobs(max_workers, max_workers, os.cpu_count())
+    chunks = split_frames(frame_count, worker_count)
+
+    print(f"Extracting ~{frame_count} frames from {video_file} with {len(chunks)} worker(s), {preset} compression")
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [
+            encode_engine.submit_with_context(
+                executor,
+                encode_engine.run_ffmpeg,
+                build_extract_command(
+                    video_file, output_pattern, fps, chunk, start_number, preset, scale,
+                    index == len(chunks) - 1,
+                    threads_per_job if len(chunks) > 1 else None
+                ),
+                f"{base_name} {chunk[0] + start_number}-{chunk[1] + start_number}",
+                chunk[1] - chunk[0] + 1,
+            )
+            for index, chunk in enumerate(chunks)
+        ]
+        for future in futures:
+            future.result()
+
+    return output_pattern